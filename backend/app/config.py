@@ -22,7 +22,109 @@ MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 500))
 DEFAULT_TONE = os.getenv("DEFAULT_TONE", "engaging")
 INCLUDE_HASHTAGS = os.getenv("INCLUDE_HASHTAGS", "true").lower() == "true"
 
-print("🔑 Configuration loaded:")
-print(f"  - Gemini API Key: {'✅' if GEMINI_API_KEY else '❌'}")
-print(f"  - HuggingFace Token: {'✅' if HUGGINGFACE_TOKEN else '❌'}")
-print(f"  - Facebook Token: {'✅' if FB_ACCESS_TOKEN else '❌'}")
+# Generation Pipeline Settings (per-stage deadlines in seconds)
+TEXT_STAGE_TIMEOUT = float(os.getenv("TEXT_STAGE_TIMEOUT", 30))
+IMAGE_STAGE_TIMEOUT = float(os.getenv("IMAGE_STAGE_TIMEOUT", 90))
+VIDEO_STAGE_TIMEOUT = float(os.getenv("VIDEO_STAGE_TIMEOUT", 240))
+
+# Provider Concurrency Limits (max in-flight calls per worker)
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 32))
+HF_IMAGE_MAX_CONCURRENCY = int(os.getenv("HF_IMAGE_MAX_CONCURRENCY", 8))
+HF_VIDEO_MAX_CONCURRENCY = int(os.getenv("HF_VIDEO_MAX_CONCURRENCY", 2))
+HF_REQUEST_TIMEOUT = float(os.getenv("HF_REQUEST_TIMEOUT", 120))
+FACEBOOK_PUBLISH_MAX_CONCURRENCY = int(os.getenv("FACEBOOK_PUBLISH_MAX_CONCURRENCY", 4))
+LINKEDIN_PUBLISH_MAX_CONCURRENCY = int(os.getenv("LINKEDIN_PUBLISH_MAX_CONCURRENCY", 4))
+
+# Provider health (adaptive concurrency and fallback short-circuit for Gemini/HuggingFace)
+PROVIDER_MIN_CONCURRENCY = int(os.getenv("PROVIDER_MIN_CONCURRENCY", 1))
+PROVIDER_HEALTH_WINDOW = int(os.getenv("PROVIDER_HEALTH_WINDOW", 20))  # Recent calls used for the error rate
+PROVIDER_TRIP_QUOTA_ERRORS = int(os.getenv("PROVIDER_TRIP_QUOTA_ERRORS", 3))  # Consecutive 429s before tripping
+PROVIDER_TRIP_ERROR_RATE = float(os.getenv("PROVIDER_TRIP_ERROR_RATE", 0.5))
+PROVIDER_TRIP_COOLDOWN = float(os.getenv("PROVIDER_TRIP_COOLDOWN", 60))  # Seconds to serve fallbacks once tripped
+
+# Generation Cache Settings
+GENERATION_CACHE_ENABLED = os.getenv("GENERATION_CACHE_ENABLED", "true").lower() == "true"
+GENERATION_CACHE_DIR = os.getenv("GENERATION_CACHE_DIR", ".cache/generations")
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", 24 * 60 * 60))
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", 256))
+GENERATION_CACHE_MAX_MEMORY_MB = int(os.getenv("GENERATION_CACHE_MAX_MEMORY_MB", 64))
+GENERATION_CACHE_MAX_DISK_MB = int(os.getenv("GENERATION_CACHE_MAX_DISK_MB", 512))
+
+# Media Store Settings
+MEDIA_STORE_DIR = os.getenv("MEDIA_STORE_DIR", "generated_media")
+MEDIA_STORE_TTL = int(os.getenv("MEDIA_STORE_TTL", 7 * 24 * 60 * 60))
+IMAGE_RENDITION_PRESET = os.getenv("IMAGE_RENDITION_PRESET", "balanced")  # high | balanced | small
+PLACEHOLDER_CACHE_SIZE = int(os.getenv("PLACEHOLDER_CACHE_SIZE", 128))  # Rendered placeholder PNGs kept in memory
+# Text-to-image models as name=model:tier (tier: fast | balanced | best), routed per request
+IMAGE_BACKENDS = os.getenv(
+    "IMAGE_BACKENDS",
+    "flux-dev=black-forest-labs/FLUX.1-dev:best,flux-schnell=black-forest-labs/FLUX.1-schnell:fast"
+)
+IMAGE_BACKEND_WINDOW = int(os.getenv("IMAGE_BACKEND_WINDOW", 50))  # Recent calls kept for p50/p95 and success rate
+
+# Background Job Settings
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", 60 * 60))
+
+# Posting Scheduler Settings
+SCHEDULER_JOBSTORE = os.getenv("SCHEDULER_JOBSTORE", "sqlite")  # sqlite | memory
+SCHEDULER_DB_PATH = os.getenv("SCHEDULER_DB_PATH", "scheduler.sqlite")
+SCHEDULER_LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", 30))
+SCHEDULER_HEARTBEAT_INTERVAL = int(os.getenv("SCHEDULER_HEARTBEAT_INTERVAL", 10))
+SCHEDULER_MISFIRE_GRACE_TIME = int(os.getenv("SCHEDULER_MISFIRE_GRACE_TIME", 5 * 60))
+
+# LinkedIn identity cache (person ID per access token), shared by all workers
+IDENTITY_CACHE_DB_PATH = os.getenv("IDENTITY_CACHE_DB_PATH", SCHEDULER_DB_PATH)
+IDENTITY_CACHE_DEFAULT_TTL = int(os.getenv("IDENTITY_CACHE_DEFAULT_TTL", 24 * 60 * 60))  # When token expiry is unknown
+LINKEDIN_ASSET_CACHE_TTL = int(os.getenv("LINKEDIN_ASSET_CACHE_TTL", 30 * 24 * 60 * 60))
+
+# Publishing HTTP Settings (Facebook / LinkedIn)
+PUBLISH_HTTP_CONNECT_TIMEOUT = float(os.getenv("PUBLISH_HTTP_CONNECT_TIMEOUT", 5))
+PUBLISH_HTTP_READ_TIMEOUT = float(os.getenv("PUBLISH_HTTP_READ_TIMEOUT", 30))
+PUBLISH_HTTP_RETRIES = int(os.getenv("PUBLISH_HTTP_RETRIES", 3))
+PUBLISH_HTTP_BACKOFF = float(os.getenv("PUBLISH_HTTP_BACKOFF", 0.5))
+PUBLISH_HTTP_MAX_RETRY_AFTER = float(os.getenv("PUBLISH_HTTP_MAX_RETRY_AFTER", 30))
+PUBLISH_HTTP_POOL_SIZE = int(os.getenv("PUBLISH_HTTP_POOL_SIZE", 10))
+PUBLISH_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("PUBLISH_CIRCUIT_FAILURE_THRESHOLD", 5))
+PUBLISH_CIRCUIT_RESET_TIMEOUT = float(os.getenv("PUBLISH_CIRCUIT_RESET_TIMEOUT", 30))
+BATCH_POST_MAX_ITEMS = int(os.getenv("BATCH_POST_MAX_ITEMS", 100))
+
+# Publishing quotas (token bucket per platform and account)
+FACEBOOK_POSTS_PER_MINUTE = float(os.getenv("FACEBOOK_POSTS_PER_MINUTE", 30))
+LINKEDIN_POSTS_PER_MINUTE = float(os.getenv("LINKEDIN_POSTS_PER_MINUTE", 10))
+PUBLISH_BURST_SIZE = int(os.getenv("PUBLISH_BURST_SIZE", 3))
+# Quotas are shared by all workers through this SQLite file; empty paces each process on its own
+PUBLISH_QUOTA_DB_PATH = os.getenv("PUBLISH_QUOTA_DB_PATH", SCHEDULER_DB_PATH)
+PUBLISH_SCHEDULE_JITTER = int(os.getenv("PUBLISH_SCHEDULE_JITTER", 120))  # Seconds to spread recurring posts
+# Longest quota wait a /batch-post request sits through before the batch runs as a
+# background job (single posts are queued as a job whenever they would wait at all)
+PUBLISH_MAX_QUEUE_DELAY = float(os.getenv("PUBLISH_MAX_QUEUE_DELAY", 10))
+
+# Media worker pool (placeholder/video rendering and image encoding run in separate processes)
+MEDIA_POOL_WORKERS = int(os.getenv("MEDIA_POOL_WORKERS", os.cpu_count() or 1))
+MEDIA_POOL_QUEUE_SIZE = int(os.getenv("MEDIA_POOL_QUEUE_SIZE", 16))  # Tasks allowed to wait for a free worker
+
+# Shared provider clients
+HF_HTTP_POOL_SIZE = int(os.getenv("HF_HTTP_POOL_SIZE", 10))  # Keep-alive connections to the HuggingFace API
+# Comma-separated providers to build at startup instead of on first use, e.g.
+# "planner_agent,image_generator" (see /startup/report for the names)
+PROVIDER_WARMUP = [name.strip() for name in os.getenv("PROVIDER_WARMUP", "").split(",") if name.strip()]
+
+# Bulk campaign generation (/generate-bulk)
+BULK_GENERATE_MAX_ITEMS = int(os.getenv("BULK_GENERATE_MAX_ITEMS", 500))
+BULK_TEXT_BATCH_SIZE = int(os.getenv("BULK_TEXT_BATCH_SIZE", 8))  # Text requests packed into one Gemini prompt
+BULK_TEXT_BATCH_MAX_CHARS = int(os.getenv("BULK_TEXT_BATCH_MAX_CHARS", 12000))  # Prompt size cap per batch
+# A batch's deadline is TEXT_STAGE_TIMEOUT plus this many seconds per packed request beyond the first
+BULK_TEXT_BATCH_ITEM_TIMEOUT = float(os.getenv("BULK_TEXT_BATCH_ITEM_TIMEOUT", 10))
+BULK_MEDIA_CONCURRENCY = int(os.getenv("BULK_MEDIA_CONCURRENCY", 4))  # Image/video generations in flight per bulk run
+
+# Coalesce concurrent identical generations (double clicks, client retries) into one provider call
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+def print_config_summary():
+    """Print which credentials are configured; called once at app startup rather than on import"""
+    print("🔑 Configuration loaded:")
+    print(f"  - Gemini API Key: {'✅' if GEMINI_API_KEY else '❌'}")
+    print(f"  - HuggingFace Token: {'✅' if HUGGINGFACE_TOKEN else '❌'}")
+    print(f"  - Facebook Token: {'✅' if FB_ACCESS_TOKEN else '❌'}")
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from app.config import (
+    GENERATION_CACHE_ENABLED,
+    GENERATION_CACHE_DIR,
+    GENERATION_CACHE_TTL,
+    GENERATION_CACHE_MAX_ENTRIES,
+    GENERATION_CACHE_MAX_MEMORY_MB,
+    GENERATION_CACHE_MAX_DISK_MB,
+)
+
+class GenerationCache:
+    """
+    Two-tier, content-addressed cache for generation results.
+
+    Keys are a hash of the normalized prompt, the model and the generation
+    parameters. Entries live in an in-memory LRU (bounded by entry count and
+    approximate size) backed by a directory of JSON files (bounded by total
+    bytes, oldest files evicted first). Both tiers honour the same TTL, and a
+    disk hit is promoted back into memory.
+    """
+
+    def __init__(self, name: str, cache_dir: str, ttl: float, max_entries: int,
+                 max_memory_bytes: int, max_disk_bytes: int, enabled: bool = True):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.enabled = enabled
+
+        self._memory = OrderedDict()  # key -> (expires_at, size, value)
+        self._memory_bytes = 0
+        self._disk_bytes = None  # computed lazily from the cache directory
+        self._lock = threading.RLock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    # ---------- keys ----------
+
+    @staticmethod
+    def make_key(prompt: str, model: str, params: Optional[dict] = None) -> str:
+        """Hash of the whitespace/case-normalized prompt, model and parameters"""
+        normalized_prompt = " ".join(prompt.split()).lower()
+        material = json.dumps(
+            {"prompt": normalized_prompt, "model": model, "params": params or {}},
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    # ---------- public API ----------
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+
+        value = self._get_disk(key)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+            else:
+                self._counters["disk_hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl
+        payload = json.dumps({"expires_at": expires_at, "value": value})
+        self._set_memory(key, value, len(payload), expires_at)
+        self._set_disk(key, payload)
+        with self._lock:
+            self._counters["writes"] += 1
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Memory hits return immediately; the disk tier is read in a worker thread"""
+        if not self.enabled:
+            return None
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any):
+        if self.enabled:
+            await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                "enabled": self.enabled,
+                **self._counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes or 0,
+            }
+
+    # ---------- memory tier ----------
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at <= time.time():
+                self._memory.pop(key)
+                self._memory_bytes -= size
+                return None
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return value
+
+    def _set_memory(self, key: str, value: Any, size: int, expires_at: float):
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old:
+                self._memory_bytes -= old[1]
+            self._memory[key] = (expires_at, size, value)
+            self._memory_bytes += size
+            while len(self._memory) > self.max_entries or self._memory_bytes > self.max_memory_bytes:
+                _, (_, evicted_size, _) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                self._counters["evictions"] += 1
+
+    # ---------- disk tier ----------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _get_disk(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = f.read()
+            entry = json.loads(payload)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            self._remove_disk(path)
+            return None
+
+        self._set_memory(key, entry["value"], len(payload), entry["expires_at"])
+        return entry["value"]
+
+    def _set_disk(self, key: str, payload: str):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            with self._lock:
+                self._ensure_disk_usage()
+                if os.path.exists(path):
+                    self._disk_bytes -= os.path.getsize(path)
+                os.replace(temp_path, path)
+                self._disk_bytes += len(payload.encode("utf-8"))
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+        except OSError as e:
+            print(f"⚠️ Could not write {self.name} cache entry: {e}")
+
+    def _remove_disk(self, path: str):
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                if self._disk_bytes is not None:
+                    self._disk_bytes -= size
+            except OSError:
+                pass
+
+    def _ensure_disk_usage(self):
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(entry.stat().st_size for entry in self._disk_entries())
+
+    def _disk_entries(self):
+        try:
+            return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _evict_disk(self):
+        """Drop expired files, then the least recently written ones, until under budget"""
+        now = time.time()
+        entries = sorted(self._disk_entries(), key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self._disk_bytes <= self.max_disk_bytes and entry.stat().st_mtime + self.ttl > now:
+                continue
+            self._remove_disk(entry.path)
+            self._counters["evictions"] += 1
+
+def _build_cache(name: str) -> GenerationCache:
+    return GenerationCache(
+        name=name,
+        cache_dir=os.path.join(GENERATION_CACHE_DIR, name),
+        ttl=GENERATION_CACHE_TTL,
+        max_entries=GENERATION_CACHE_MAX_ENTRIES,
+        max_memory_bytes=GENERATION_CACHE_MAX_MEMORY_MB * 1024 * 1024,
+        max_disk_bytes=GENERATION_CACHE_MAX_DISK_MB * 1024 * 1024,
+        enabled=GENERATION_CACHE_ENABLED,
+    )
+
+text_cache = _build_cache("text")
+image_cache = _build_cache("image")
+rendition_cache = _build_cache("rendition")
+
+def get_cache_stats() -> dict:
+    return {cache.name: cache.stats() for cache in (text_cache, image_cache, rendition_cache)}
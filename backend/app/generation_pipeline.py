@@ -0,0 +1,94 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+# ========== DATA STRUCTURES ==========
+
+@dataclass
+class GenerationStage:
+    name: str
+    func: Callable[[], Any]
+    timeout: float
+    fallback: Optional[Callable[[], Any]] = None
+
+@dataclass
+class StageResult:
+    name: str
+    status: str  # "ok", "timeout" or "error"
+    result: Any = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    def to_event(self) -> dict:
+        """Serializable view of the stage outcome for streaming clients"""
+        return {
+            "event": self.name,
+            "status": self.status,
+            "elapsed": round(self.elapsed, 3),
+            "error": self.error,
+            "data": self.result,
+        }
+
+# ========== PIPELINE ==========
+
+class GenerationPipeline:
+    """
+    Runs independent generation stages (text, image, video) concurrently.
+
+    Each stage is either a coroutine function, awaited directly, or a blocking
+    callable executed in a worker thread so the event loop stays free, and
+    each one has its own deadline. When a stage fails or
+    misses its deadline its fallback (if any) is used instead, so wall-clock
+    time is bounded by the slowest stage rather than the sum of all of them.
+    Timed-out coroutines are cancelled; a timed-out worker thread cannot be
+    killed, so its late result is simply discarded.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, GenerationStage] = {}
+
+    def add_stage(self, name: str, func: Callable[[], Any], timeout: float,
+                  fallback: Optional[Callable[[], Any]] = None) -> "GenerationPipeline":
+        self.stages[name] = GenerationStage(name=name, func=func, timeout=timeout, fallback=fallback)
+        return self
+
+    async def _call(self, func: Callable[[], Any]) -> Any:
+        if asyncio.iscoroutinefunction(func):
+            return await func()
+        return await asyncio.to_thread(func)
+
+    async def _run_stage(self, stage: GenerationStage) -> StageResult:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._call(stage.func), timeout=stage.timeout)
+            return StageResult(stage.name, "ok", result, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            print(f"⏱️ Stage '{stage.name}' missed its {stage.timeout:.0f}s deadline")
+            status, error = "timeout", f"Stage exceeded {stage.timeout:.0f}s deadline"
+        except Exception as e:
+            print(f"❌ Stage '{stage.name}' failed: {e}")
+            status, error = "error", str(e)
+
+        result = None
+        if stage.fallback:
+            try:
+                result = await self._call(stage.fallback)
+            except Exception as e:
+                print(f"❌ Fallback for stage '{stage.name}' failed: {e}")
+        return StageResult(stage.name, status, result, time.perf_counter() - start, error)
+
+    async def run(self) -> Dict[str, StageResult]:
+        """Run all stages concurrently and wait for every one of them"""
+        results = await asyncio.gather(*(self._run_stage(stage) for stage in self.stages.values()))
+        return {result.name: result for result in results}
+
+    async def as_completed(self) -> AsyncIterator[StageResult]:
+        """Run all stages concurrently and yield each result as soon as it is ready"""
+        tasks = [asyncio.create_task(self._run_stage(stage)) for stage in self.stages.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
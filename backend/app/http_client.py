@@ -0,0 +1,254 @@
+import io
+import os
+import time
+import uuid
+import threading
+from typing import BinaryIO, Dict, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import (
+    PUBLISH_HTTP_CONNECT_TIMEOUT,
+    PUBLISH_HTTP_READ_TIMEOUT,
+    PUBLISH_HTTP_RETRIES,
+    PUBLISH_HTTP_BACKOFF,
+    PUBLISH_HTTP_MAX_RETRY_AFTER,
+    PUBLISH_HTTP_POOL_SIZE,
+    PUBLISH_CIRCUIT_FAILURE_THRESHOLD,
+    PUBLISH_CIRCUIT_RESET_TIMEOUT,
+)
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+class PublishingRetry(Retry):
+    """
+    Exponential backoff that honours Retry-After, capped so a misbehaving
+    server cannot park a worker thread for minutes.
+
+    Idempotent requests are retried on 429 and 5xx. POSTs (which would
+    duplicate a published post if the server had processed them) are only
+    retried when the server explicitly refused them with 429 or 503.
+    """
+
+    REFUSED_STATUS_CODES = frozenset({429, 503})
+    MAX_RETRY_AFTER = PUBLISH_HTTP_MAX_RETRY_AFTER
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code in self.REFUSED_STATUS_CODES:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, self.MAX_RETRY_AFTER) if retry_after is not None else None
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures against one host.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    are rejected for reset_timeout seconds; then a single trial call is let
+    through (half-open), whose outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(f"Circuit open for {self.name}, skipping request")
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    print(f"🔌 Circuit opened for {self.name} after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures}
+
+class MultipartStream(io.RawIOBase):
+    """
+    A multipart/form-data body read lazily from its parts.
+
+    Form fields are encoded up front (they are small); file parts are read
+    straight from the given buffers or open files as the request is sent,
+    so an image is never copied into a second, fully built request body.
+    Passing it as data= makes requests stream it with a Content-Length,
+    and it can be rewound so urllib3 can replay it on retry.
+    """
+
+    def __init__(self, fields: Dict[str, str], files: Dict[str, Tuple[str, BinaryIO, str]]):
+        super().__init__()
+        self.boundary = uuid.uuid4().hex
+        self._parts = []  # (stream, start offset in that stream, length)
+
+        for name, value in fields.items():
+            self._add_bytes(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode("utf-8")
+                + str(value).encode("utf-8") + b"\r\n"
+            )
+        for name, (filename, stream, content_type) in files.items():
+            self._add_bytes(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
+            )
+            start = stream.tell()
+            length = stream.seek(0, os.SEEK_END) - start
+            stream.seek(start)
+            self._parts.append((stream, start, length))
+            self._add_bytes(b"\r\n")
+        self._add_bytes(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        self._length = sum(length for _, _, length in self._parts)
+        self._position = 0
+
+    def _add_bytes(self, data: bytes):
+        self._parts.append((io.BytesIO(data), 0, len(data)))
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._length
+        self._position = min(max(offset, 0), self._length)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer)
+        written = 0
+        part_start = 0
+        for stream, start, length in self._parts:
+            part_end = part_start + length
+            if written < len(view) and self._position < part_end:
+                stream.seek(start + self._position - part_start)
+                chunk = stream.read(min(len(view) - written, part_end - self._position))
+                view[written:written + len(chunk)] = chunk
+                written += len(chunk)
+                self._position += len(chunk)
+            part_start = part_end
+        return written
+
+class PublishingHTTPClient:
+    """
+    Shared HTTP layer for the social publishing APIs.
+
+    One keep-alive Session pools connections per host, so consecutive calls
+    (for example LinkedIn's userinfo, register, upload and post) reuse the
+    same TLS connection. Every request gets explicit connect/read timeouts,
+    transient failures are retried with backoff, and each host has its own
+    circuit breaker.
+    """
+
+    FAILURE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, connect_timeout: float, read_timeout: float, retries: int,
+                 backoff_factor: float, pool_size: int, failure_threshold: int, reset_timeout: float):
+        self.timeout = (connect_timeout, read_timeout)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+        retry = PublishingRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.FAILURE_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False,  # Hand the final response back to the caller
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        breaker = self._breaker(url)
+        breaker.before_request()
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+
+        if response.status_code in self.FAILURE_STATUS_CODES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
+
+publishing_http = PublishingHTTPClient(
+    connect_timeout=PUBLISH_HTTP_CONNECT_TIMEOUT,
+    read_timeout=PUBLISH_HTTP_READ_TIMEOUT,
+    retries=PUBLISH_HTTP_RETRIES,
+    backoff_factor=PUBLISH_HTTP_BACKOFF,
+    pool_size=PUBLISH_HTTP_POOL_SIZE,
+    failure_threshold=PUBLISH_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=PUBLISH_CIRCUIT_RESET_TIMEOUT,
+)
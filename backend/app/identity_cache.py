@@ -0,0 +1,108 @@
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Optional
+from app.config import IDENTITY_CACHE_DB_PATH, IDENTITY_CACHE_DEFAULT_TTL, LINKEDIN_ASSET_CACHE_TTL
+from app.scheduler_store import connect_sqlite
+
+class IdentityCache:
+    """
+    Cache of remote identities: LinkedIn person IDs keyed by access token,
+    or uploaded asset URNs keyed by owner and image hash.
+
+    Entries live until they expire (for person IDs, with the token), in a
+    per-process dict backed by a SQLite table every worker shares, so a
+    value resolved on one worker is already known to the others. Keys are
+    stored only as SHA-256 hashes, so access tokens never hit the disk.
+    """
+
+    def __init__(self, name: str, db_path: str, default_ttl: float):
+        self.name = name
+        self.db_path = db_path
+        self.default_ttl = default_ttl
+        self._memory = {}  # key hash -> (identity, expires_at)
+        self._lock = threading.Lock()
+        self._table_ready = False
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = connect_sqlite(self.db_path)
+        if not self._table_ready:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS identity_cache ("
+                "name TEXT NOT NULL, token_hash TEXT NOT NULL, identity TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (name, token_hash))"
+            )
+            self._table_ready = True
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        key = self._hash_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        try:
+            connection = self._connect()
+            try:
+                row = connection.execute(
+                    "SELECT identity, expires_at FROM identity_cache "
+                    "WHERE name = ? AND token_hash = ? AND expires_at > ?",
+                    (self.name, key, now)
+                ).fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not read {self.name} identity cache: {e}")
+            return None
+
+        if not row:
+            return None
+        with self._lock:
+            self._memory[key] = (row[0], row[1])
+        return row[0]
+
+    def set(self, key: str, identity: str, ttl: float = None):
+        """Cache identity for ttl seconds (e.g. a token's expires_in), or the default TTL"""
+        key = self._hash_key(key)
+        expires_at = time.time() + (ttl or self.default_ttl)
+        with self._lock:
+            self._memory[key] = (identity, expires_at)
+        try:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO identity_cache (name, token_hash, identity, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.name, key, identity, expires_at)
+                )
+                connection.execute("DELETE FROM identity_cache WHERE expires_at <= ?", (time.time(),))
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not write {self.name} identity cache: {e}")
+
+    def invalidate(self, key: str):
+        """Forget an entry, e.g. after the API rejected the token or asset"""
+        key = self._hash_key(key)
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            connection = self._connect()
+            try:
+                connection.execute(
+                    "DELETE FROM identity_cache WHERE name = ? AND token_hash = ?", (self.name, key)
+                )
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not invalidate {self.name} identity cache entry: {e}")
+
+linkedin_identity_cache = IdentityCache("linkedin", IDENTITY_CACHE_DB_PATH, IDENTITY_CACHE_DEFAULT_TTL)
+linkedin_asset_cache = IdentityCache("linkedin_asset", IDENTITY_CACHE_DB_PATH, LINKEDIN_ASSET_CACHE_TTL)
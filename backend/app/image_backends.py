@@ -0,0 +1,213 @@
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+from PIL import Image
+from app.provider_limits import hf_image_limiter, ProviderTrippedError
+
+# Quality tiers, lowest to highest
+QUALITY_TIERS = ["fast", "balanced", "best"]
+# Latency assumed for a backend (seconds) until it has been measured
+TIER_PRIOR_LATENCY = {"fast": 3.0, "balanced": 10.0, "best": 25.0}
+
+class ImageBackend:
+    """
+    One text-to-image model, with rolling latency and success statistics.
+
+    Subclasses implement _generate (blocking) and _agenerate (async), both
+    returning a PIL image. Latency is recorded for successes and for calls
+    cut off by a deadline, so a backend that keeps missing budgets drops out
+    of the routes that cannot afford it.
+    """
+
+    source = "local"  # Reported as the result's "source"
+
+    def __init__(self, name: str, model: str, quality: str, window: int = 50):
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{quality}', expected one of {QUALITY_TIERS}")
+        self.name = name
+        self.model = model
+        self.quality = quality
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._lock = threading.Lock()
+
+    def _generate(self, prompt: str) -> Image.Image:
+        raise NotImplementedError
+
+    async def _agenerate(self, prompt: str) -> Image.Image:
+        raise NotImplementedError
+
+    def generate(self, prompt: str) -> Image.Image:
+        start = time.monotonic()
+        try:
+            image = self._generate(prompt)
+        except ProviderTrippedError:
+            raise  # Says nothing about this model
+        except Exception:
+            self.record(None, False)
+            raise
+        self.record(time.monotonic() - start, True)
+        return image
+
+    async def agenerate(self, prompt: str, timeout: float = None) -> Image.Image:
+        start = time.monotonic()
+        try:
+            image = await asyncio.wait_for(self._agenerate(prompt), timeout)
+        except ProviderTrippedError:
+            raise
+        except asyncio.TimeoutError:
+            self.record(time.monotonic() - start, False)  # At least this slow
+            raise
+        except Exception:
+            self.record(None, False)
+            raise
+        self.record(time.monotonic() - start, True)
+        return image
+
+    def record(self, latency: Optional[float], success: bool):
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            self._outcomes.append(success)
+
+    @property
+    def measured(self) -> bool:
+        with self._lock:
+            return bool(self._latencies)
+
+    def fits(self, budget: float, fraction: float = 0.95) -> bool:
+        """
+        Whether the backend's latency at this percentile is within budget.
+        Unmeasured backends always fit: the caller's deadline bounds the
+        first calls, and those calls give the router real numbers.
+        """
+        return budget is None or not self.measured or self.percentile(fraction) <= budget
+
+    def percentile(self, fraction: float) -> float:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return TIER_PRIOR_LATENCY[self.quality]
+        return latencies[min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))]
+
+    def success_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return outcomes.count(True) / len(outcomes) if outcomes else 1.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = len(self._latencies)
+        return {
+            "model": self.model,
+            "quality": self.quality,
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p95_ms": round(self.percentile(0.95) * 1000, 1),
+            "success_rate": round(self.success_rate(), 3),
+            "samples": samples,
+        }
+
+class HuggingFaceImageBackend(ImageBackend):
+    """A HuggingFace Inference text-to-image model, called through the shared clients"""
+
+    source = "huggingface"
+
+    def __init__(self, name: str, model: str, quality: str, client, async_client, window: int = 50):
+        super().__init__(name, model, quality, window)
+        self.client = client
+        self.async_client = async_client
+
+    def _generate(self, prompt: str) -> Image.Image:
+        with hf_image_limiter.sync_slot():
+            return self.client.text_to_image(prompt, model=self.model)
+
+    async def _agenerate(self, prompt: str) -> Image.Image:
+        async with hf_image_limiter.slot():
+            return await self.async_client.text_to_image(prompt, model=self.model)
+
+class FakeImageBackend(ImageBackend):
+    """
+    Local stand-in that returns a solid-colour image after a delay, failing
+    at failure_rate; for tests and for exercising routing without a token.
+    """
+
+    source = "fake"
+
+    def __init__(self, name: str, quality: str, delay: float = 0.0, failure_rate: float = 0.0,
+                 size: tuple = (512, 512), window: int = 50):
+        super().__init__(name, f"fake/{name}", quality, window)
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.size = size
+
+    def _image(self) -> Image.Image:
+        if random.random() < self.failure_rate:
+            raise RuntimeError(f"Fake backend {self.name} failed")
+        return Image.new("RGB", self.size, color=(102, 126, 234))
+
+    def _generate(self, prompt: str) -> Image.Image:
+        time.sleep(self.delay)
+        return self._image()
+
+    async def _agenerate(self, prompt: str) -> Image.Image:
+        await asyncio.sleep(self.delay)
+        return self._image()
+
+class ImageBackendRouter:
+    """
+    Picks image backends per request by quality tier and latency budget.
+
+    Backends are ordered by distance from the requested tier (the best tier
+    by default), then by p50. With a latency budget only backends whose
+    measured p95 fits are eligible, those whose p50 (or tier prior, before
+    any calls) exceeds it are tried last, and each attempt is cut off at the
+    time left, so a request never waits on a model too slow for it. Backends
+    with a poor recent success rate go to the back of the line.
+    """
+
+    def __init__(self, min_success_rate: float = 0.5):
+        self.min_success_rate = min_success_rate
+        self.backends: Dict[str, ImageBackend] = {}
+
+    def register(self, backend: ImageBackend) -> ImageBackend:
+        self.backends[backend.name] = backend
+        return backend
+
+    def route(self, latency_budget: float = None, quality: str = None) -> List[ImageBackend]:
+        """Backends to try, in order; empty when none can meet the budget"""
+        if quality is not None and quality not in QUALITY_TIERS:
+            raise ValueError(f"Unknown quality tier '{quality}', expected one of {QUALITY_TIERS}")
+        wanted = QUALITY_TIERS.index(quality or QUALITY_TIERS[-1])
+        candidates = [
+            backend for backend in self.backends.values()
+            if backend.fits(latency_budget)
+        ]
+
+        def order(backend: ImageBackend) -> tuple:
+            expected = backend.percentile(0.5)
+            over_budget = latency_budget is not None and expected > latency_budget
+            return (
+                backend.success_rate() < self.min_success_rate,
+                over_budget,
+                expected if over_budget else 0.0,  # Unlikely to fit: quickest first
+                abs(QUALITY_TIERS.index(backend.quality) - wanted),
+                expected,
+            )
+        return sorted(candidates, key=order)
+
+    def stats(self) -> dict:
+        return {name: backend.stats() for name, backend in self.backends.items()}
+
+def parse_image_backends(spec: str) -> List[tuple]:
+    """Parse "name=model:tier,..." into (name, model, tier) tuples"""
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = entry.partition("=")
+        model, _, quality = target.rpartition(":")
+        if not name or not model or quality not in QUALITY_TIERS:
+            raise ValueError(f"Invalid IMAGE_BACKENDS entry '{entry}', expected name=model:{'|'.join(QUALITY_TIERS)}")
+        backends.append((name.strip(), model.strip(), quality))
+    return backends
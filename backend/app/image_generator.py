@@ -1,130 +1,182 @@
-import os
-from huggingface_hub import InferenceClient
-from app.config import HUGGINGFACE_TOKEN
-from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
+import time
+import asyncio
+from typing import Optional
+from app.providers import get_image_backend_router
+from app.image_backends import ImageBackend, ImageBackendRouter
+from app.generation_cache import image_cache
+from app.single_flight import image_flights
+from app.media_store import media_store
+from app.placeholder_renderer import render_simple_placeholder, encode_png
+from app.media_pool import media_pool
+from PIL import Image
 import base64
 
 # ========== CONFIGURATION ==========
 
 class ImageGenerator:
-    def __init__(self):
-        # Use the token from config.py
-        self.hf_token = HUGGINGFACE_TOKEN or os.getenv("HF_TOKEN", "")
-        self.client = None
+    def __init__(self, router: ImageBackendRouter = None):
+        """
+        Models come from the shared image backend router in app.providers;
+        pass another router (e.g. with FakeImageBackends) to use it instead.
+        """
+        self.router = router if router is not None else get_image_backend_router()
         
-        if self.hf_token:
-            try:
-                self.client = InferenceClient(token=self.hf_token)
-                print(f"✅ HuggingFace client initialized successfully")
-            except Exception as e:
-                print(f"❌ Failed to initialize HF client: {e}")
-                self.client = None
+        if self.router.backends:
+            print(f"✅ Image generator routing across backends: {', '.join(self.router.backends)}")
         else:
             print("⚠️ No HuggingFace token found - will use placeholder images")
 
-    def generate_image(self, prompt: str) -> dict:
+    def generate_image(self, prompt: str, use_cache: bool = True, inline: bool = True,
+                       latency_budget: float = None, quality: str = None) -> dict:
         """
-        Generate image using FLUX.1-dev model or fallback to placeholder
-        Returns dict with image data and metadata
+        Generate an image with the best backend for the quality tier and
+        latency budget (see ImageBackendRouter), or fall back to a placeholder.
+        Returns dict with the stored media reference and metadata; the base64
+        payload is only included when inline is True. Identical requests made
+        while one is running share its result.
         """
-        if self.client and self.hf_token:
+        key = self._flight_key(prompt, use_cache, inline, latency_budget, quality)
+        return image_flights.run(key, lambda: self._generate_image(prompt, use_cache, inline, latency_budget, quality))
+
+    async def agenerate_image(self, prompt: str, use_cache: bool = True, inline: bool = True,
+                              latency_budget: float = None, quality: str = None) -> dict:
+        """
+        Async variant of generate_image. Backend calls are awaited on the event
+        loop (HuggingFace ones bounded by the image concurrency limit), each cut
+        off at whatever is left of the latency budget; PNG encoding and
+        placeholder rendering run on media worker processes, driven (along
+        with media storage) from a worker thread. Identical requests attach
+        to the one in flight.
+        """
+        key = self._flight_key(prompt, use_cache, inline, latency_budget, quality)
+        return await image_flights.do(
+            key, lambda publish: self._agenerate_image(prompt, use_cache, inline, latency_budget, quality)
+        )
+
+    def _flight_key(self, prompt: str, use_cache: bool, inline: bool, latency_budget: float, quality: str) -> str:
+        return image_cache.make_key(prompt, "image", {
+            "use_cache": use_cache, "inline": inline, "latency_budget": latency_budget, "quality": quality
+        })
+
+    def _generate_image(self, prompt: str, use_cache: bool, inline: bool,
+                        latency_budget: float, quality: str) -> dict:
+        backends = self.router.route(latency_budget, quality)
+        if use_cache:
+            for backend in backends:
+                cached = self._cached_result(image_cache.get(image_cache.make_key(prompt, backend.model)), inline)
+                if cached is not None:
+                    return cached
+
+        for backend in backends:
             try:
-                print(f"🎨 Generating AI image with prompt: {prompt[:100]}...")
-                image = self.client.text_to_image(
-                    prompt,
-                    model="black-forest-labs/FLUX.1-dev"
-                )
+                print(f"🎨 Generating AI image with {backend.name}: {prompt[:100]}...")
+                image = backend.generate(prompt)
                 
-                # Convert PIL Image to base64
                 if image:
-                    buffered = BytesIO()
-                    image.save(buffered, format="PNG")
-                    img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                    
-                    return {
-                        "success": True,
-                        "image_base64": img_str,
-                        "source": "huggingface"
-                    }
+                    cache_entry, result = self._finalize(self._encode_image(image), backend, inline)
+                    if use_cache:
+                        image_cache.set(image_cache.make_key(prompt, backend.model), cache_entry)
+                    return result
                 
             except Exception as e:
-                print(f"HuggingFace image generation failed: {str(e)}")
+                print(f"Image generation with {backend.name} failed: {str(e)}")
         
         # Fall back to placeholder
         print("🎨 Generating placeholder image...")
-        placeholder = self._generate_placeholder_image(prompt)
-        return {
-            "success": False,
-            "image_base64": placeholder,
-            "source": "placeholder"
+        _, result = self._finalize(self._generate_placeholder_image(prompt), None, inline)
+        return result
+    
+    async def _agenerate_image(self, prompt: str, use_cache: bool, inline: bool,
+                               latency_budget: float, quality: str) -> dict:
+        deadline = time.monotonic() + latency_budget if latency_budget else None
+        backends = self.router.route(latency_budget, quality)
+        if use_cache:
+            for backend in backends:
+                cached = await image_cache.aget(image_cache.make_key(prompt, backend.model))
+                cached = await asyncio.to_thread(self._cached_result, cached, inline)
+                if cached is not None:
+                    return cached
+
+        for backend in backends:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                break  # Budget spent; later backends would be cut off before starting
+            if not backend.fits(remaining, 0.5):
+                continue  # Would most likely miss the budget
+            try:
+                print(f"🎨 Generating AI image with {backend.name}: {prompt[:100]}...")
+                image = await backend.agenerate(prompt, timeout=remaining)
+                
+                if image:
+                    cache_entry, result = await asyncio.to_thread(
+                        lambda: self._finalize(self._encode_image(image), backend, inline)
+                    )
+                    if use_cache:
+                        await image_cache.aset(image_cache.make_key(prompt, backend.model), cache_entry)
+                    return result
+                
+            except asyncio.TimeoutError:
+                # Also raised by the HuggingFace client's own timeout, with or without a budget
+                limit = f"the {remaining:.1f}s left of the budget" if remaining is not None else "its request timeout"
+                print(f"⏱️ Image backend {backend.name} exceeded {limit}")
+            except Exception as e:
+                print(f"Image generation with {backend.name} failed: {str(e)}")
+        
+        print("🎨 Generating placeholder image...")
+        _, result = await asyncio.to_thread(
+            lambda: self._finalize(self._generate_placeholder_image(prompt), None, inline)
+        )
+        return result
+
+    def _encode_image(self, image: Image.Image) -> bytes:
+        """Convert a PIL Image to PNG bytes on a media worker process"""
+        return media_pool.run(encode_png, image)
+
+    def _finalize(self, image_bytes: bytes, backend: Optional[ImageBackend], inline: bool) -> tuple:
+        """
+        Store generated PNG bytes and build the result (backend is None for a
+        placeholder). Returns the cacheable entry (a media reference, never
+        the payload) and the caller's result.
+        """
+        source = backend.source if backend else "placeholder"
+        if image_bytes is None:
+            return None, {"success": False, "image_base64": None, "source": source}
+
+        ref = media_store.put(image_bytes, "image/png")
+        entry = {
+            "success": backend is not None,
+            "source": source,
+            "media_id": ref.media_id,
+            "image_url": ref.url
         }
+        if backend:
+            entry.update({"backend": backend.name, "model": backend.model})
+        return entry, self._with_payload(entry, image_bytes, inline)
+
+    def _with_payload(self, entry: dict, image_bytes: bytes, inline: bool) -> dict:
+        if not inline:
+            return dict(entry)
+        return {**entry, "image_base64": base64.b64encode(image_bytes).decode("utf-8")}
+
+    def _cached_result(self, cached: dict, inline: bool) -> dict:
+        """Rebuild a result from a cache entry, or None if its media has expired"""
+        if not cached or not media_store.exists(cached.get("media_id")):
+            return None
+        image_bytes = media_store.read(cached["media_id"]) if inline else None
+        return self._with_payload(cached, image_bytes, inline)
     
     def create_image_prompt(self, business_type: str, content_description: str) -> str:
         """Create an optimized prompt for image generation"""
         return f"Professional {business_type} marketing image: {content_description}, high quality, modern design, clean background, commercial photography style"
     
-    def _generate_placeholder_image(self, prompt: str) -> str:
+    def _generate_placeholder_image(self, prompt: str) -> bytes:
         """Generate a placeholder image with the prompt text"""
         try:
-            # Create a simple placeholder image
-            width, height = 800, 600
-            image = Image.new('RGB', (width, height), color='#f0f8ff')
-            draw = ImageDraw.Draw(image)
-            
-            # Try to use a default font, fall back to default if not available
-            try:
-                font = ImageFont.truetype("arial.ttf", 24)
-                small_font = ImageFont.truetype("arial.ttf", 16)
-            except:
-                font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-            
-            # Add title
-            title = "EcoLens AI Generated Content"
-            draw.text((50, 50), title, fill='#333', font=font)
-            
-            # Add prompt text (wrapped)
-            wrapped_prompt = self._wrap_text(prompt, 60)
-            prompt_lines = wrapped_prompt.split('\n')
-            
-            y_offset = 150
-            for line in prompt_lines[:8]:  # Limit to 8 lines
-                draw.text((50, y_offset), line, fill='#666', font=small_font)
-                y_offset += 30
-            
-            # Convert to base64
-            buffered = BytesIO()
-            image.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            return img_str
-            
+            return render_simple_placeholder(prompt)
         except Exception as e:
             print(f"Placeholder image generation failed: {str(e)}")
             return None
     
-    def _wrap_text(self, text: str, width: int) -> str:
-        """Simple text wrapping"""
-        words = text.split()
-        lines = []
-        current_line = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= width:
-                current_line.append(word)
-                current_length += len(word) + 1
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-                current_length = len(word)
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return '\n'.join(lines)
-    
     def _generate_fallback_image_prompt(self, user_input) -> str:
         """Generate a suitable image prompt based on business content"""
         business_type = user_input.business_name.lower()
@@ -0,0 +1,92 @@
+from io import BytesIO
+from PIL import Image, ImageOps
+from app.config import IMAGE_RENDITION_PRESET
+from app.generation_cache import rendition_cache
+from app.media_store import media_store, MediaRef
+from app.media_pool import media_pool
+from app.platform_specs import PLATFORM_SPECS
+
+# Encoder settings per output format
+IMAGE_FORMATS = {
+    "webp": {"pil_format": "WEBP", "content_type": "image/webp", "options": {"method": 4}},
+    "jpeg": {"pil_format": "JPEG", "content_type": "image/jpeg", "options": {"optimize": True, "progressive": True}},
+}
+# Quality per preset and format
+QUALITY_PRESETS = {
+    "high": {"webp": 90, "jpeg": 90},
+    "balanced": {"webp": 80, "jpeg": 82},
+    "small": {"webp": 65, "jpeg": 70},
+}
+# Formats the publishing APIs accept for photo posts (neither takes WebP)
+PLATFORM_IMAGE_FORMATS = {"facebook": "jpeg", "linkedin": "jpeg"}
+DEFAULT_IMAGE_FORMAT = "webp"
+
+def render_rendition(image_bytes: bytes, width: int = None, height: int = None,
+                     image_format: str = DEFAULT_IMAGE_FORMAT, quality: int = 80) -> bytes:
+    """
+    Re-encode an image for delivery: cover-crop to width x height (if given),
+    flatten transparency onto white and save as WebP/JPEG. EXIF, ICC and
+    other metadata are not carried over.
+    """
+    spec = IMAGE_FORMATS[image_format]
+    with Image.open(BytesIO(image_bytes)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        else:
+            image = image.convert("RGB")
+
+        if width and height and image.size != (width, height):
+            image = ImageOps.fit(image, (width, height), method=Image.Resampling.LANCZOS)
+
+        buffered = BytesIO()
+        image.save(buffered, format=spec["pil_format"], quality=quality, **spec["options"])
+        return buffered.getvalue()
+
+def get_rendition(media_id: str, platform: str = None, image_format: str = None,
+                  preset: str = IMAGE_RENDITION_PRESET) -> MediaRef:
+    """
+    Stored rendition of an image for a platform (or at native size when no
+    platform is given). Renditions live in the media store like any other
+    media and are looked up through the rendition cache, so each
+    (image, platform, format, preset) is encoded once, on a media worker
+    process. Call from a worker thread, not the event loop.
+    """
+    if platform and platform not in PLATFORM_SPECS:
+        raise ValueError(f"Unknown platform '{platform}', expected one of {list(PLATFORM_SPECS)}")
+    image_format = image_format or PLATFORM_IMAGE_FORMATS.get(platform, DEFAULT_IMAGE_FORMAT)
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format '{image_format}', expected one of {list(IMAGE_FORMATS)}")
+    if preset not in QUALITY_PRESETS:
+        raise ValueError(f"Unknown quality preset '{preset}', expected one of {list(QUALITY_PRESETS)}")
+    quality = QUALITY_PRESETS[preset][image_format]
+
+    cache_key = rendition_cache.make_key(
+        media_id, "rendition", {"platform": platform, "format": image_format, "quality": quality}
+    )
+    cached = rendition_cache.get(cache_key)
+    if cached:
+        ref = media_store.get(cached)
+        if ref:
+            return ref
+
+    spec = PLATFORM_SPECS[platform] if platform else {}
+    image_bytes = media_store.read(media_id)
+    rendition = media_pool.run(
+        render_rendition, image_bytes, spec.get("width"), spec.get("height"), image_format, quality
+    )
+    ref = media_store.put(rendition, IMAGE_FORMATS[image_format]["content_type"])
+    rendition_cache.set(cache_key, ref.media_id)
+    print(f"🖼️ Rendition {platform or 'native'}/{image_format}: {len(image_bytes)} -> {len(rendition)} bytes")
+    return ref
+
+def get_publish_rendition_id(media_id: str, platform: str) -> str:
+    """Media ID to upload for a platform, falling back to the original if it cannot be re-encoded"""
+    try:
+        return get_rendition(media_id, platform).media_id
+    except Exception as e:
+        print(f"⚠️ Could not build {platform} rendition for {media_id}, uploading original: {e}")
+        return media_id
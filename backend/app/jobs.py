@@ -0,0 +1,171 @@
+import json
+import time
+import uuid
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from app.config import JOB_MAX_WORKERS, JOB_QUEUE_SIZE, JOB_RESULT_TTL
+
+class Job:
+    """A long-running generation tracked by ID, with progress and a final result"""
+
+    def __init__(self, kind: str, runner: Callable[["Job"], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.runner = runner
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.progress = 0.0
+        self.stage = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def update(self, progress: float = None, stage: str = None, status: str = None):
+        if progress is not None:
+            self.progress = round(min(max(progress, 0.0), 1.0), 3)
+        if stage is not None:
+            self.stage = stage
+        if status is not None:
+            self.status = status
+        # Wake every waiter, then arm a fresh event for the next change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def watch(self) -> asyncio.Event:
+        """Event that will be set on the next change to this job"""
+        return self._changed
+
+    def to_dict(self) -> dict:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "succeeded":
+            data["result"] = self.result
+        if self.error:
+            data["error"] = self.error
+        return data
+
+class JobManager:
+    """
+    Runs generation jobs on a bounded pool of asyncio workers.
+
+    Submitting returns immediately with a Job; at most max_workers jobs run at
+    once and at most queue_size wait behind them. Finished jobs, including
+    their results, are kept for result_ttl seconds.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int, result_ttl: float):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Job] = {}
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    def submit(self, kind: str, runner: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Queue runner(job) for execution; must be called from the event loop"""
+        self._sweep()
+        self._ensure_workers()
+
+        job = Job(kind, runner)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Job queue is full, please retry later")
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job:
+        self._sweep()
+        job = self.jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.started_at = time.time()
+        job.update(status="running")
+        try:
+            job.result = await job.runner(job)
+            job.finished_at = time.time()
+            job.update(progress=1.0, status="succeeded")
+        except Exception as e:
+            print(f"❌ Job {job.id} ({job.kind}) failed: {e}")
+            job.error = str(e)
+            job.finished_at = time.time()
+            job.update(status="failed")
+        finally:
+            job.runner = None  # Release the request state captured by the runner
+
+    def _sweep(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        statuses = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses,
+        }
+
+job_manager = JobManager(JOB_MAX_WORKERS, JOB_QUEUE_SIZE, JOB_RESULT_TTL)
+
+def job_links(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+async def job_events(job: Job, keepalive: float = 15.0):
+    """Server-Sent Events stream of job snapshots until the job finishes"""
+    last_sent = None
+    while True:
+        changed = job.watch()  # Armed before the snapshot so no update is missed
+        snapshot = job.to_dict()
+        key = (snapshot["status"], snapshot["progress"], snapshot["stage"])
+        if key != last_sent:
+            event = "done" if job.finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+            last_sent = key
+        if job.finished:
+            return
+        try:
+            await asyncio.wait_for(changed.wait(), keepalive)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
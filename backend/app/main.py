@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException
+import time
+_import_started = time.perf_counter()  # Start of the import phase in the startup report
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from app.schemas import PlannerRequest, AnswersRequest
-from app.planner_agent import PlannerAgent, PlannerInput
-from app.social_media_posting import router as social_media_router
-from pydantic import BaseModel
-import os
-import uuid
-from PIL import Image, ImageDraw, ImageFont
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.schemas import PlannerRequest, AnswersRequest, VideoEncodingOptions
+from app.planner_agent import PlannerInput
+from app.social_media_posting import router as social_media_router, start_posting_scheduler, stop_posting_scheduler
+from app.generation_pipeline import GenerationPipeline
+from app.provider_limits import get_limiter_stats
+from app.generation_cache import get_cache_stats
+from app.media_store import media_store, media_response
+from app.image_renditions import get_rendition
+from app.placeholder_renderer import render_enhanced_placeholder, placeholder_cache_stats
+from app.jobs import job_manager, job_links, job_events
+from app.providers import (
+    get_planner_agent, get_image_generator, get_video_generator, get_image_backend_router,
+    warm_up, record_startup_phase, startup_report
+)
+from app.media_pool import media_pool, MediaPoolBusyError
+from app.single_flight import get_single_flight_stats
+from app.config import (
+    BULK_GENERATE_MAX_ITEMS, BULK_TEXT_BATCH_SIZE, BULK_TEXT_BATCH_MAX_CHARS, BULK_TEXT_BATCH_ITEM_TIMEOUT,
+    BULK_MEDIA_CONCURRENCY
+)
+from app.config import print_config_summary, PROVIDER_WARMUP, TEXT_STAGE_TIMEOUT, IMAGE_STAGE_TIMEOUT, VIDEO_STAGE_TIMEOUT, PUBLISH_SCHEDULE_JITTER
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional
+import asyncio
+import json
+from functools import partial
 import base64
-from io import BytesIO
-from datetime import datetime
 
 app = FastAPI()
 
@@ -31,7 +51,23 @@ app.add_middleware(
 # Register social media router
 app.include_router(social_media_router, prefix="/social")
 
-agent = PlannerAgent()
+@app.on_event("startup")
+def start_background_services():
+    started = time.perf_counter()
+    print_config_summary()
+    start_posting_scheduler()
+    record_startup_phase("scheduler", started)
+    if PROVIDER_WARMUP:
+        started = time.perf_counter()
+        warm_up(PROVIDER_WARMUP)
+        record_startup_phase("warmup", started)
+    print(f"🚀 Startup timings (ms): {startup_report()['phases_ms']}")
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    # Hand the scheduler lease over right away instead of waiting for it to expire
+    stop_posting_scheduler()
+    media_pool.shutdown()
 
 # Add missing ContentRequest model for the new endpoints
 class ContentRequest(BaseModel):
@@ -43,106 +79,21 @@ class ContentRequest(BaseModel):
     description: str = ""
     sharing_enabled: bool = False
     sharing_settings: dict = None
+    stream: bool = False  # Stream text as Gemini writes it and each stage as soon as it finishes
+    stream_format: Literal["ndjson", "sse"] = "ndjson"  # JSON lines or Server-Sent Events
+    use_cache: bool = True  # Set to False to bypass the generation cache
+    image_quality: Optional[Literal["fast", "balanced", "best"]] = None  # Preferred image model tier (default best)
+    image_latency_budget: Optional[float] = None  # Seconds; only image models that fit are tried
+    video_encoding: Optional[VideoEncodingOptions] = None  # Codec/CRF/preset for rendered videos
+    inline_media: bool = True  # Set to False to receive media IDs/URLs instead of base64 payloads
+    background: bool = False  # Run as a background job and return its ID immediately
 
-def _create_simple_placeholder(category: str, prompt: str) -> str:
-    """Create a simple placeholder image and return as base64"""
+def _create_simple_placeholder(category: str, prompt: str) -> bytes:
+    """Create a simple placeholder image and return it as PNG bytes"""
     try:
-        img = Image.new('RGB', (800, 600), color='#f8f9fa')
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 32)
-            heading_font = ImageFont.truetype("arial.ttf", 24)
-            content_font = ImageFont.truetype("arial.ttf", 18)
-            small_font = ImageFont.truetype("arial.ttf", 14)
-        except:
-            title_font = ImageFont.load_default()
-            heading_font = ImageFont.load_default()
-            content_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        # Create gradient background
-        for y in range(600):
-            r = int(248 + (7 * y / 600))
-            g = int(249 + (6 * y / 600))  
-            b = int(250 + (5 * y / 600))
-            draw.line([(0, y), (800, y)], fill=(r, g, b))
-        
-        # Add decorative elements
-        draw.rectangle([0, 0, 800, 80], fill='#667eea')
-        draw.rectangle([0, 520, 800, 600], fill='#764ba2')
-        
-        # Add main title
-        title = "🎨 EcoLens AI Generated Image"
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(((800 - title_width) // 2, 25), title, fill='white', font=title_font)
-        
-        # Add category badge
-        draw.rectangle([50, 120, 300, 160], fill='#28a745', outline='#1e7e34', width=2)
-        draw.text((60, 132), f"📂 {category}", fill='white', font=heading_font)
-        
-        # Add content description
-        content_y = 200
-        draw.text((50, content_y), "📝 Generated Content:", fill='#343a40', font=heading_font)
-        
-        # Word wrap and display content
-        if prompt and prompt.strip():
-            words = prompt.split()
-            lines = []
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                if len(test_line) > 50:  # Wrap at ~50 characters
-                    if current_line:
-                        lines.append(' '.join(current_line))
-                        current_line = [word]
-                    else:
-                        lines.append(word)
-                else:
-                    current_line.append(word)
-            
-            if current_line:
-                lines.append(' '.join(current_line))
-            
-            # Draw content lines
-            y_offset = content_y + 40
-            for i, line in enumerate(lines[:8]):  # Max 8 lines
-                draw.text((70, y_offset + (i * 25)), f"• {line}", fill='#495057', font=content_font)
-        else:
-            draw.text((70, content_y + 40), "• Professional marketing content", fill='#495057', font=content_font)
-            draw.text((70, content_y + 65), "• Tailored for your business needs", fill='#495057', font=content_font)
-            draw.text((70, content_y + 90), "• AI-powered visual generation", fill='#495057', font=content_font)
-        
-        # Add feature highlights
-        feature_y = 420
-        draw.text((50, feature_y), "✨ Features:", fill='#6c757d', font=heading_font)
-        features = [
-            "🎯 Targeted for your industry",
-            "🚀 Ready for social media",
-            "💡 Professional design"
-        ]
-        
-        for i, feature in enumerate(features):
-            draw.text((70, feature_y + 30 + (i * 25)), feature, fill='#6c757d', font=content_font)
-        
-        # Add footer
-        footer_text = f"Generated by EcoLens AI • {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-        footer_bbox = draw.textbbox((0, 0), footer_text, font=small_font)
-        footer_width = footer_bbox[2] - footer_bbox[0]
-        draw.text(((800 - footer_width) // 2, 550), footer_text, fill='white', font=small_font)
-        
-        # Add success indicator
-        draw.rectangle([650, 120, 750, 160], fill='#17a2b8', outline='#138496', width=2)
-        draw.text((660, 132), "✅ SUCCESS", fill='white', font=content_font)
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-        return img_str
-        
+        return render_enhanced_placeholder(category, prompt)
+    except MediaPoolBusyError:
+        raise
     except Exception as e:
         print(f"❌ Enhanced placeholder creation failed: {e}")
         return None
@@ -157,23 +108,241 @@ async def root():
         "endpoints": ["/generate", "/generate-with-answers", "/save-image"]
     }
 
-# Import the ImageGenerator
-try:
-    from app.image_generator import ImageGenerator
-    image_generator = ImageGenerator()
-    print("✅ ImageGenerator with HuggingFace initialized")
-except ImportError as e:
-    print(f"⚠️ Could not import ImageGenerator: {e}")
-    image_generator = None
-
-# Import the VideoGenerator
-try:
-    from app.video_generator import VideoGenerator
-    video_generator = VideoGenerator()
-    print("✅ VideoGenerator initialized")
-except ImportError as e:
-    print(f"⚠️ Could not import VideoGenerator: {e}")
-    video_generator = None
+@app.get("/providers/limits")
+async def provider_limits():
+    """In-flight and queued calls per generation provider"""
+    return get_limiter_stats()
+
+@app.get("/providers/image-backends")
+async def image_backend_stats():
+    """Measured p50/p95 latency and success rate per image model"""
+    return get_image_backend_router().stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and usage for the generation cache"""
+    return {**get_cache_stats(), "placeholder": placeholder_cache_stats()}
+
+@app.get("/coalescing/stats")
+async def coalescing_stats():
+    """Generations started vs. identical requests that attached to one already running"""
+    return get_single_flight_stats()
+
+@app.get("/media-pool/stats")
+async def media_pool_stats():
+    """Busy, queued and rejected tasks on the media worker processes"""
+    return media_pool.stats()
+
+def _media_pool_busy(e: MediaPoolBusyError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+@app.get("/startup/report")
+async def get_startup_report():
+    """Import/startup phase timings and which generators have been built so far"""
+    return startup_report()
+
+async def _generate_image_stage(request: ContentRequest) -> dict:
+    """Image stage of /generate: AI image with an enhanced placeholder fallback"""
+    image_generator = get_image_generator()
+    if image_generator:
+        try:
+            ai_prompt = image_generator.create_image_prompt(request.category, request.description or "professional marketing content")
+            img_result = await image_generator.agenerate_image(
+                ai_prompt, use_cache=request.use_cache, inline=request.inline_media,
+                latency_budget=request.image_latency_budget, quality=request.image_quality
+            )
+            if img_result and img_result.get("media_id"):
+                return _media_fields("image", img_result.get("image_base64"), img_result["media_id"], {
+                    "image_source": img_result.get("source", "huggingface"),
+                    "image_backend": img_result.get("backend"),
+                    "image_prompt": ai_prompt
+                })
+        except Exception as e:
+            print(f"❌ Image generation error: {e}")
+    return await asyncio.to_thread(_placeholder_image_stage, request)
+
+def _placeholder_image_stage(request: ContentRequest) -> dict:
+    """Fallback for the image stage when generation fails or misses its deadline"""
+    image_bytes = _create_simple_placeholder(request.category, request.description)
+    if image_bytes is None:
+        return None
+    ref = media_store.put(image_bytes, "image/png")
+    image_data = base64.b64encode(image_bytes).decode("utf-8") if request.inline_media else None
+    return _media_fields("image", image_data, ref.media_id, {
+        "image_source": "enhanced_placeholder",
+        "image_prompt": request.description or "professional marketing content"
+    })
+
+def _media_fields(kind: str, payload: Optional[str], media_id: str, extra: dict) -> dict:
+    """Response fields for a stored image/video; base64 data only when inlined"""
+    fields = {f"{kind}_id": media_id, f"{kind}_url": f"/media/{media_id}", **extra}
+    if payload:
+        fields[f"{kind}_data"] = payload
+    return fields
+
+async def _generate_video_stage(request: ContentRequest) -> dict:
+    """Video stage of /generate"""
+    video_generator = get_video_generator()
+    if not video_generator:
+        return None
+
+    # Determine video style based on platform
+    platform = request.platform.lower() if request.platform else "general"
+    if "linkedin" in platform:
+        video_style = "professional"
+    elif "tiktok" in platform or "instagram" in platform:
+        video_style = "creative"
+    else:
+        video_style = "marketing"
+
+    video_prompt = video_generator.create_video_prompt(
+        request.category,
+        request.description or "professional marketing video",
+        video_style
+    )
+    video_result = await video_generator.agenerate_video(
+        video_prompt, duration=15, encoding=request.video_encoding, inline=request.inline_media
+    )
+
+    if video_result and video_result.get("media_id"):
+        return _media_fields("video", video_result.get("video_base64"), video_result["media_id"], {
+            "video_source": video_result.get("source", "huggingface"),
+            "video_prompt": video_prompt
+        })
+    return None
+
+def _requested_media(request: ContentRequest) -> tuple:
+    """(is_marketing_image, is_video_content) for a request's content type"""
+    content_type = request.content_type.lower()
+    is_marketing_image = "marketing images" in content_type or "images" in content_type
+    is_video_content = "video" in content_type or "videos" in content_type
+    return is_marketing_image, is_video_content
+
+def _planner_input(request: ContentRequest) -> PlannerInput:
+    return PlannerInput(
+        business_name=request.category,
+        output_type="gemini",
+        periodic_content=False,
+        additional_prompt=request.description or "",
+        use_cache=request.use_cache,
+        inline_media=request.inline_media
+    )
+
+def _build_generation_pipeline(request: ContentRequest, user_input: PlannerInput,
+                               is_marketing_image: bool, is_video_content: bool,
+                               on_text_delta=None, stage_funcs: dict = None,
+                               text_timeout: float = TEXT_STAGE_TIMEOUT) -> GenerationPipeline:
+    """
+    Text, image and video stages are independent, so they all start together.
+    stage_funcs replaces the generating function of a stage by name (fallbacks
+    stay the same), e.g. to await work shared by a bulk run.
+    """
+    agent = get_planner_agent()
+    stage_funcs = stage_funcs or {}
+    pipeline = GenerationPipeline()
+    pipeline.add_stage(
+        "text",
+        stage_funcs.get("text") or partial(agent.agenerate_content, user_input, on_text_delta),
+        text_timeout,
+        fallback=lambda: {
+            "type": "text",
+            "content": agent._generate_fallback_text_content(user_input, "text stage deadline exceeded")
+        }
+    )
+    if is_marketing_image:
+        pipeline.add_stage(
+            "image",
+            stage_funcs.get("image") or partial(_generate_image_stage, request),
+            IMAGE_STAGE_TIMEOUT,
+            fallback=lambda: _placeholder_image_stage(request)
+        )
+    if is_video_content:
+        pipeline.add_stage("video", stage_funcs.get("video") or partial(_generate_video_stage, request), VIDEO_STAGE_TIMEOUT)
+    return pipeline
+
+def _build_generate_response(request: ContentRequest, report, results: dict) -> dict:
+    """Assemble the /generate response from the finished pipeline stages"""
+    text_result = results["text"].result
+    marketing_text = text_result["content"]
+
+    response = {
+        "content": marketing_text,
+        "category": request.category,
+        "type": text_result["type"],
+        "summary": report.task_summary
+    }
+
+    image_stage = results.get("image")
+    if image_stage and image_stage.result and image_stage.result.get("image_id"):
+        response.update(image_stage.result)
+
+    video_stage = results.get("video")
+    if video_stage and video_stage.result:
+        response.update(video_stage.result)
+        response["type"] = "video"  # Override type if video is generated
+
+    # Schedule auto-sharing if enabled
+    scheduled_jobs = []
+    if request.sharing_enabled and request.sharing_settings:
+        response_for_sharing = dict(response)
+        response_for_sharing["content"] = marketing_text
+        scheduled_jobs = schedule_auto_sharing(response_for_sharing, request.sharing_settings)
+    response["scheduled_posts"] = scheduled_jobs
+    return response
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def _stream_event(event: dict, stream_format: str) -> str:
+    """Frame one streaming event as a JSON line or a Server-Sent Event"""
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    return json.dumps(event) + "\n"
+
+def _streaming_response(events, stream_format: str) -> StreamingResponse:
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"} if stream_format == "sse" else None
+    return StreamingResponse(events, media_type=STREAM_MEDIA_TYPES[stream_format], headers=headers)
+
+async def _stream_generation(request: ContentRequest, report, pipeline: GenerationPipeline, events: asyncio.Queue):
+    """
+    Yield a text_delta event per Gemini chunk (events receives them from the
+    text stage), one event per stage as it finishes, then a done event with
+    the assembled response: content, task summary and media references.
+    """
+    async def run_stages():
+        try:
+            async for stage_result in pipeline.as_completed():
+                events.put_nowait(stage_result)
+        finally:
+            events.put_nowait(None)
+
+    runner = asyncio.create_task(run_stages())
+    results = {}
+    try:
+        while (item := await events.get()) is not None:
+            if isinstance(item, str):
+                yield _stream_event({"event": "text_delta", "data": item}, request.stream_format)
+            else:
+                results[item.name] = item
+                yield _stream_event(item.to_event(), request.stream_format)
+    finally:
+        runner.cancel()
+
+    response = await asyncio.to_thread(_build_generate_response, request, report, results)
+    yield _stream_event({"event": "done", "data": response}, request.stream_format)
+
+async def _run_generation_job(job, request: ContentRequest, report, pipeline: GenerationPipeline) -> dict:
+    """Background job runner for /generate; each finished stage advances progress"""
+    results = {}
+    total_steps = len(pipeline.stages) + 1  # Stages plus response assembly
+    async for stage_result in pipeline.as_completed():
+        results[stage_result.name] = stage_result
+        job.update(progress=len(results) / total_steps, stage=stage_result.name)
+
+    job.update(stage="assemble")
+    return await asyncio.to_thread(_build_generate_response, request, report, results)
+
+def _job_accepted(job) -> JSONResponse:
+    return JSONResponse(status_code=202, content=job_links(job))
 
 # Add the new generate endpoint that the frontend expects
 @app.post("/generate")
@@ -183,193 +352,327 @@ async def generate_content_new(request: ContentRequest):
         print(f"🔍 Content type: {request.content_type}")
         print(f"🔄 Auto-sharing enabled: {request.sharing_enabled}")
 
-        # Detect content type
-        is_marketing_image = (
-            "marketing images" in request.content_type.lower()
-            or "images" in request.content_type.lower()
-        )
-        is_video_content = (
-            "video" in request.content_type.lower()
-            or "videos" in request.content_type.lower()
-        )
-        is_text_content = not is_marketing_image and not is_video_content
+        is_marketing_image, is_video_content = _requested_media(request)
 
         # Generate text content using PlannerAgent (always call)
-        user_input = PlannerInput(
-            business_name=request.category,
-            output_type="gemini",
-            periodic_content=False,
-            additional_prompt=request.description or ""
-        )
-        report = agent.analyze_prompt(user_input)
+        user_input = _planner_input(request)
+        report = get_planner_agent().analyze_prompt(user_input)
         if report.clarification_questions:
             return {
                 "status": "clarification_needed",
                 "questions": report.clarification_questions,
                 "summary": report.task_summary
             }
-        text_result = agent.generate_content(user_input)
-        marketing_text = text_result["content"]
-
-        # Generate image if requested
-        image_data = None
-        image_source = None
-        image_prompt = None
-        if is_marketing_image:
-            if image_generator:
-                try:
-                    ai_prompt = image_generator.create_image_prompt(request.category, request.description or "professional marketing content")
-                    img_result = image_generator.generate_image(ai_prompt)
-                    if img_result and img_result.get("image_base64"):
-                        image_data = img_result["image_base64"]
-                        image_source = img_result.get("source", "huggingface")
-                        image_prompt = ai_prompt
-                except Exception as e:
-                    image_data = None
-            if not image_data:
-                image_data = _create_simple_placeholder(request.category, request.description)
-                image_source = "enhanced_placeholder"
-                image_prompt = request.description or "professional marketing content"
-
-        # Generate video if requested
-        video_data = None
-        video_source = None
-        video_prompt = None
-        if is_video_content:
-            if video_generator:
-                try:
-                    # Determine video style based on platform
-                    platform = request.platform.lower() if request.platform else "general"
-                    if "linkedin" in platform:
-                        video_style = "professional"
-                    elif "tiktok" in platform or "instagram" in platform:
-                        video_style = "creative"
-                    else:
-                        video_style = "marketing"
-                    
-                    video_prompt = video_generator.create_video_prompt(
-                        request.category, 
-                        request.description or "professional marketing video",
-                        video_style
-                    )
-                    video_result = video_generator.generate_video(video_prompt, duration=15)
-                    
-                    if video_result and video_result.get("video_base64"):
-                        video_data = video_result["video_base64"]
-                        video_source = video_result.get("source", "huggingface")
-                except Exception as e:
-                    print(f"❌ Video generation error: {e}")
-                    video_data = None
-
-        # Build response
-        response = {
-            "content": marketing_text,
-            "category": request.category,
-            "type": text_result["type"],
-            "summary": report.task_summary
-        }
-        
-        if image_data:
-            response["image_data"] = image_data
-            response["image_source"] = image_source
-            response["image_prompt"] = image_prompt
-            
-        if video_data:
-            response["video_data"] = video_data
-            response["video_source"] = video_source
-            response["video_prompt"] = video_prompt
-            response["type"] = "video"  # Override type if video is generated
-
-        # Schedule auto-sharing if enabled
-        scheduled_jobs = []
-        if request.sharing_enabled and request.sharing_settings:
-            response_for_sharing = dict(response)
-            response_for_sharing["content"] = marketing_text
-            scheduled_jobs = schedule_auto_sharing(response_for_sharing, request.sharing_settings)
-        response["scheduled_posts"] = scheduled_jobs
-        return response
 
+        # Streamed text deltas and stage results share one queue, in arrival order
+        stream_events = asyncio.Queue() if request.stream and not request.background else None
+        pipeline = _build_generation_pipeline(
+            request, user_input, is_marketing_image, is_video_content,
+            on_text_delta=stream_events.put_nowait if stream_events else None
+        )
+
+        if request.background:
+            return _job_accepted(job_manager.submit(
+                "generate", partial(_run_generation_job, request=request, report=report, pipeline=pipeline)
+            ))
+
+        if request.stream:
+            return _streaming_response(
+                _stream_generation(request, report, pipeline, stream_events), request.stream_format
+            )
+
+        results = await pipeline.run()
+        return await asyncio.to_thread(_build_generate_response, request, report, results)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error in new generate endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating content: {str(e)}")
 
+class BulkGenerateRequest(BaseModel):
+    items: List[ContentRequest]  # stream/background are ignored per item
+
+async def _await_shared(awaitable):
+    # Shielded so one item missing its deadline does not cancel work other items share
+    return await asyncio.shield(awaitable)
+
+def _text_batches(pending: list) -> list:
+    """Split (key, PlannerInput) pairs into batches bounded by item count and prompt size"""
+    agent = get_planner_agent()
+    batches, batch, batch_chars = [], [], 0
+    for key, user_input in pending:
+        chars = len(agent._build_text_prompt(user_input))
+        if batch and (len(batch) >= BULK_TEXT_BATCH_SIZE or batch_chars + chars > BULK_TEXT_BATCH_MAX_CHARS):
+            batches.append(batch)
+            batch, batch_chars = [], 0
+        batch.append((key, user_input))
+        batch_chars += chars
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _text_batch_timeout(size: int) -> float:
+    """Deadline for one batched Gemini call; packed prompts take longer to answer"""
+    return TEXT_STAGE_TIMEOUT + BULK_TEXT_BATCH_ITEM_TIMEOUT * (size - 1)
+
+async def _run_text_batch(batch: list, futures: dict):
+    timeout = _text_batch_timeout(len(batch))
+    try:
+        results = await asyncio.wait_for(
+            get_planner_agent().agenerate_text_batch([user_input for _, user_input in batch]), timeout
+        )
+        for (key, _), result in zip(batch, results):
+            futures[key].set_result(result)
+    except asyncio.TimeoutError:
+        e = RuntimeError(f"Text batch of {len(batch)} missed its {timeout:.0f}s deadline")
+        for key, _ in batch:
+            if not futures[key].done():
+                futures[key].set_exception(e)
+    except Exception as e:
+        for key, _ in batch:
+            if not futures[key].done():
+                futures[key].set_exception(e)
+
+async def _stream_bulk_generation(items: List[ContentRequest]):
+    """
+    NDJSON body of /generate-bulk: one item event per request as soon as it
+    is ready (in completion order, tagged with its index), then a done event.
+
+    Identical text prompts, images and videos are generated once and shared.
+    Text misses are packed into batched Gemini prompts that all start right
+    away, and images/videos run through a window of BULK_MEDIA_CONCURRENCY.
+    Each item keeps the fallbacks and image/video deadlines of /generate;
+    text is bounded by its batch's deadline, which grows with the batch.
+    """
+    started = time.perf_counter()
+    agent = get_planner_agent()
+    loop = asyncio.get_running_loop()
+    media_window = asyncio.Semaphore(BULK_MEDIA_CONCURRENCY)
+    text_futures, pending_texts, media_tasks = {}, [], {}
+
+    def shared_media(kind: str, key: tuple, generate):
+        task = media_tasks.get((kind, key))
+        if task is None:
+            async def run():
+                async with media_window:
+                    return await generate()
+            task = media_tasks[(kind, key)] = asyncio.create_task(run())
+        return partial(_await_shared, task)
+
+    async def run_item(index: int, request: ContentRequest, pipeline: GenerationPipeline, report):
+        try:
+            results = await pipeline.run()
+            response = await asyncio.to_thread(_build_generate_response, request, report, results)
+            return {"event": "item", "index": index, "status": "done", "data": response}
+        except Exception as e:
+            print(f"❌ Bulk item {index} failed: {e}")
+            return {"event": "item", "index": index, "status": "error", "error": str(e)}
+
+    item_tasks = []
+    try:
+        for index, request in enumerate(items):
+            user_input = _planner_input(request)
+            report = agent.analyze_prompt(user_input)
+            if report.clarification_questions:
+                yield json.dumps({
+                    "event": "item", "index": index, "status": "clarification_needed",
+                    "questions": report.clarification_questions, "summary": report.task_summary
+                }) + "\n"
+                continue
+
+            text_key = agent._text_cache_key(agent._build_text_prompt(user_input))
+            if text_key not in text_futures:
+                text_futures[text_key] = loop.create_future()
+                pending_texts.append((text_key, user_input))
+
+            is_marketing_image, is_video_content = _requested_media(request)
+            stage_funcs = {"text": partial(_await_shared, text_futures[text_key])}
+            if is_marketing_image:
+                image_key = (request.category, request.description, request.use_cache, request.inline_media)
+                stage_funcs["image"] = shared_media("image", image_key, partial(_generate_image_stage, request))
+            if is_video_content:
+                encoding = request.video_encoding.model_dump_json() if request.video_encoding else None
+                video_key = (request.category, request.description, request.platform.lower(), encoding, request.inline_media)
+                stage_funcs["video"] = shared_media("video", video_key, partial(_generate_video_stage, request))
+
+            pipeline = _build_generation_pipeline(
+                request, user_input, is_marketing_image, is_video_content, stage_funcs=stage_funcs,
+                text_timeout=_text_batch_timeout(BULK_TEXT_BATCH_SIZE)  # Backstop, batches enforce their own
+            )
+            item_tasks.append(asyncio.create_task(run_item(index, request, pipeline, report)))
+
+        text_batches = _text_batches(pending_texts)
+        item_tasks.extend(asyncio.create_task(_run_text_batch(batch, text_futures)) for batch in text_batches)
+        for next_done in asyncio.as_completed(item_tasks):
+            event = await next_done
+            if event:  # Text batch tasks finish with None
+                yield json.dumps(event) + "\n"
+    finally:
+        for task in [*item_tasks, *media_tasks.values()]:
+            task.cancel()
+
+    yield json.dumps({"event": "done", "data": {
+        "items": len(items),
+        "unique_texts": len(text_futures),
+        "text_batches": len(text_batches),
+        "unique_media": len(media_tasks),
+        "elapsed": round(time.perf_counter() - started, 3)
+    }}) + "\n"
+
+@app.post("/generate-bulk")
+async def generate_bulk(request: BulkGenerateRequest):
+    """Generate a whole campaign in one run, streamed back as NDJSON (see _stream_bulk_generation)"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(request.items) > BULK_GENERATE_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_GENERATE_MAX_ITEMS} items per bulk request")
+    print(f"📦 Bulk generation of {len(request.items)} items")
+    return StreamingResponse(_stream_bulk_generation(request.items), media_type="application/x-ndjson")
+
+async def _generate_video_response(request: dict, encoding: VideoEncodingOptions, job=None) -> dict:
+    """Body of /generate-video, shared by the inline and background paths"""
+    business_type = request.get("business_type", "General Business")
+    description = request.get("description", "professional marketing video")
+    platform = request.get("platform", "instagram")
+    duration = request.get("duration", 15)
+    inline_media = request.get("inline_media", True)
+
+    if job:
+        job.update(progress=0.05, stage="video")
+
+    # Generate platform-specific video
+    video_generator = get_video_generator()
+    if platform in ["instagram", "tiktok", "youtube", "linkedin"]:
+        result = await video_generator.agenerate_social_media_video(description, platform, encoding, inline_media)
+    else:
+        prompt = video_generator.create_video_prompt(business_type, description)
+        result = await video_generator.agenerate_video(prompt, duration, encoding, inline_media)
+    
+    response = {
+        "success": result["success"],
+        "media_id": result.get("media_id"),
+        "video_url": result.get("video_url"),
+        "source": result["source"],
+        "format": result["format"],
+        "duration": result["duration"],
+        "platform": platform
+    }
+    if inline_media:
+        response["video_data"] = result["video_base64"]
+    return response
+
 # Add video-specific endpoint
 @app.post("/generate-video")
 async def generate_video_endpoint(request: dict):
     """Generate video content specifically"""
     try:
-        business_type = request.get("business_type", "General Business")
-        description = request.get("description", "professional marketing video")
-        platform = request.get("platform", "instagram")
-        duration = request.get("duration", 15)
+        try:
+            encoding = VideoEncodingOptions(**(request.get("encoding") or {}))
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid encoding options: {e}")
         
-        if not video_generator:
+        if not get_video_generator():
             raise HTTPException(status_code=503, detail="Video generator not available")
+
+        if request.get("background"):
+            return _job_accepted(job_manager.submit(
+                "generate-video", lambda job: _generate_video_response(request, encoding, job)
+            ))
         
-        # Generate platform-specific video
-        if platform in ["instagram", "tiktok", "youtube", "linkedin"]:
-            result = video_generator.generate_social_media_video(description, platform)
-        else:
-            prompt = video_generator.create_video_prompt(business_type, description)
-            result = video_generator.generate_video(prompt, duration)
-        
-        return {
-            "success": result["success"],
-            "video_data": result["video_base64"],
-            "source": result["source"],
-            "format": result["format"],
-            "duration": result["duration"],
-            "platform": platform
-        }
+        return await _generate_video_response(request, encoding)
         
+    except HTTPException:
+        raise
+    except MediaPoolBusyError as e:
+        raise _media_pool_busy(e)
     except Exception as e:
         print(f"❌ Error generating video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating video: {str(e)}")
 
+# Background job status, polled or streamed as Server-Sent Events
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return job_manager.get(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    job = job_manager.get(job_id)
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/jobs")
+async def get_job_stats():
+    return job_manager.stats()
+
+# Media download endpoint: serves stored images/videos with range request support
+@app.get("/media/{media_id}")
+async def get_media(media_id: str, request: Request):
+    return media_response(request, media_id)
+
+async def _rendition_ref(media_id: str, platform: Optional[str], image_format: Optional[str], preset: Optional[str]):
+    ref = media_store.get(media_id)
+    if not ref:
+        raise HTTPException(status_code=404, detail="Media not found")
+    if not ref.content_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail=f"Renditions are only available for images, not {ref.content_type}")
+    options = {"preset": preset} if preset else {}
+    try:
+        return await asyncio.to_thread(get_rendition, media_id, platform, image_format, **options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except MediaPoolBusyError as e:
+        raise _media_pool_busy(e)
+    except OSError as e:  # Includes PIL's UnidentifiedImageError for undecodable files
+        raise HTTPException(status_code=400, detail=f"Could not decode image: {e}")
+
+# Resized/compressed image rendition, e.g. /media/{id}/rendition?platform=linkedin&format=webp
+@app.get("/media/{media_id}/rendition")
+async def get_media_rendition(media_id: str, request: Request, platform: Optional[str] = None,
+                              format: Optional[str] = None, preset: Optional[str] = None):
+    ref = await _rendition_ref(media_id, platform, format, preset)
+    return media_response(request, ref.media_id)
+
 # Add video download endpoint
 @app.post("/save-video")
-async def save_video(request: dict):
+async def save_video(request: dict, http_request: Request):
     """Save and download generated video"""
     try:
+        media_id = request.get("media_id")
         video_data = request.get("video_data")
         filename = request.get("filename", "ecolens_video.mp4")
         
-        if not video_data:
+        if not media_id and not video_data:
             raise HTTPException(status_code=400, detail="No video data provided")
         
-        # Create videos directory
-        videos_dir = "generated_videos"
-        if not os.path.exists(videos_dir):
-            os.makedirs(videos_dir)
-        
-        # Save video file
-        video_bytes = base64.b64decode(video_data)
-        filepath = os.path.join(videos_dir, filename)
+        # Legacy clients still send the video itself; store it so it can be served from disk
+        if not media_id:
+            video_bytes = await asyncio.to_thread(base64.b64decode, video_data)
+            media_id = (await asyncio.to_thread(media_store.put, video_bytes, "video/mp4")).media_id
         
-        with open(filepath, 'wb') as f:
-            f.write(video_bytes)
-        
-        return FileResponse(
-            filepath,
-            media_type='video/mp4',
-            filename=filename,
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return media_response(http_request, media_id, filename=filename)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error saving video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error saving video: {str(e)}")
 
 # Keep the original generate endpoint for backward compatibility
 @app.post("/generate-original")
-def generate_content_original(payload: PlannerRequest):
+async def generate_content_original(payload: PlannerRequest):
     user_input = PlannerInput(
         business_name=payload.business_name,
         output_type=payload.output_type,
         periodic_content=payload.periodic_content,
-        additional_prompt=payload.additional_prompt
+        additional_prompt=payload.additional_prompt,
+        use_cache=payload.use_cache,
+        inline_media=payload.inline_media
     )
-    report = agent.analyze_prompt(user_input)
+    report = get_planner_agent().analyze_prompt(user_input)
 
     if report.clarification_questions:
         return {
@@ -378,16 +681,42 @@ def generate_content_original(payload: PlannerRequest):
             "summary": report.task_summary
         }
 
-    result = agent.generate_content(user_input)
+    result = await get_planner_agent().agenerate_content(user_input)
     return {
         "status": "done",
         "content_type": result["type"],
         "content": result["content"],
         "summary": report.task_summary,
         **({"image_prompt": result["prompt"]} if result["type"] == "image" else {}),
-        **({"image_data": result.get("image_data")} if result["type"] == "image" and result.get("image_data") else {})
+        **({"image_data": result.get("image_data")} if result["type"] == "image" and result.get("image_data") else {}),
+        **({"image_id": result["image_id"], "image_url": result["image_url"]} if result.get("image_id") else {})
     }
 
+def _answers_response(result: dict, report, category: str) -> dict:
+    # Ensure type is always present and default to "text" if missing
+    response = {
+        "content": result.get("content", ""),
+        "category": category,
+        "type": result.get("type", "text"),
+        "summary": report.task_summary
+    }
+    if result.get("image_id"):
+        response.update({"image_id": result["image_id"], "image_url": result["image_url"]})
+    return response
+
+async def _stream_answers(user_input: PlannerInput, report, category: str, stream_format: str):
+    """Streaming body of /generate-with-answers: text deltas, then the full response"""
+    deltas = asyncio.Queue()
+    generation = asyncio.create_task(get_planner_agent().agenerate_content(user_input, deltas.put_nowait))
+    generation.add_done_callback(lambda _: deltas.put_nowait(None))
+    try:
+        while (delta := await deltas.get()) is not None:
+            yield _stream_event({"event": "text_delta", "data": delta}, stream_format)
+        result = await generation
+    finally:
+        generation.cancel()
+    yield _stream_event({"event": "done", "data": _answers_response(result, report, category)}, stream_format)
+
 # Update the generate-with-answers endpoint to handle the new format
 @app.post("/generate-with-answers")
 async def generate_with_answers_new(request: dict):
@@ -417,9 +746,10 @@ async def generate_with_answers_new(request: dict):
             business_name=category,
             output_type="gemini",
             periodic_content=False,
-            additional_prompt=description
+            additional_prompt=description,
+            use_cache=request.get("use_cache", True)
         )
-        report = agent.analyze_prompt(user_input)
+        report = get_planner_agent().analyze_prompt(user_input)
         if report.clarification_questions:
             return {
                 "status": "clarification_needed",
@@ -429,16 +759,17 @@ async def generate_with_answers_new(request: dict):
                 "category": category,
                 "content": "Clarification required"
             }
-        result = agent.generate_content(user_input)
-        # Ensure type is always present and default to "text" if missing
-        result_type = result.get("type", "text")
-        result_content = result.get("content", "")
-        return {
-            "content": result_content,
-            "category": category,
-            "type": result_type,
-            "summary": report.task_summary
-        }
+        if request.get("stream"):
+            stream_format = request.get("stream_format", "ndjson")
+            if stream_format not in STREAM_MEDIA_TYPES:
+                raise HTTPException(status_code=400, detail=f"stream_format must be one of {list(STREAM_MEDIA_TYPES)}")
+            return _streaming_response(_stream_answers(user_input, report, category, stream_format), stream_format)
+
+        result = await get_planner_agent().agenerate_content(user_input)
+        return _answers_response(result, report, category)
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         print(f"❌ Error generating content with answers: {str(e)}")
@@ -450,37 +781,30 @@ async def generate_with_answers_new(request: dict):
 
 # Add save-image endpoint for download functionality
 @app.post("/save-image")
-async def save_image(request: dict):
+async def save_image(request: dict, http_request: Request):
     try:
         prompt = request.get("prompt", "Generated Image")
         category = request.get("category", "AI Generated")
         
-        # Create images directory
-        images_dir = "generated_images"
-        if not os.path.exists(images_dir):
-            os.makedirs(images_dir)
-        
         # Generate image
-        image_data = _create_simple_placeholder(category, prompt)
+        image_bytes = await asyncio.to_thread(_create_simple_placeholder, category, prompt)
         
-        if image_data:
-            # Save as file
-            image_bytes = base64.b64decode(image_data)
-            img = Image.open(BytesIO(image_bytes))
-            
-            filename = f"ecolens_generated_{uuid.uuid4().hex[:8]}.png"
-            filepath = os.path.join(images_dir, filename)
-            img.save(filepath, 'PNG')
-            
-            return FileResponse(
-                filepath, 
-                media_type='image/png',
-                filename=filename,
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
+        if image_bytes:
+            ref = await asyncio.to_thread(media_store.put, image_bytes, "image/png")
+            extension = "png"
+            if request.get("format") or request.get("platform"):
+                # Compressed WebP/JPEG rendition instead of the lossless PNG
+                ref = await _rendition_ref(ref.media_id, request.get("platform"), request.get("format"), request.get("preset"))
+                extension = ref.content_type.split("/")[1].replace("jpeg", "jpg")
+            filename = f"ecolens_generated_{ref.media_id[:8]}.{extension}"
+            return media_response(http_request, ref.media_id, filename=filename)
         else:
             raise HTTPException(status_code=500, detail="Failed to generate image")
         
+    except HTTPException:
+        raise
+    except MediaPoolBusyError as e:
+        raise _media_pool_busy(e)
     except Exception as e:
         print(f"❌ Error in save-image: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -546,8 +870,8 @@ def schedule_auto_sharing(content_data: dict, sharing_settings: dict):
         time_setting = settings.get('time')
         
         if platform_id.lower() == 'linkedin':
-            # Pass image_data if present
-            post_args = [content_data.get('content', ''), content_data.get('image_data'), content_data.get('image_source')]
+            # Pass the image reference if present
+            post_args = [content_data.get('content', ''), content_data.get('image_id'), content_data.get('image_source')]
             if frequency == 'daily':
                 print(f"   🔄 Setting up daily LinkedIn posting at {time_setting}")
                 schedule_daily_post('linkedin', content_data, time_setting, post_args)
@@ -631,14 +955,15 @@ def schedule_custom_post(platform: str, content: dict, time: str, days: list, po
             print(f"   📅 Next {day_name}: {next_run}")
             
             # Import scheduler from social_media_posting
-            from app.social_media_posting import scheduler, post_to_linkedin, LINKEDIN_ACCESS_TOKEN
+            from app.social_media_posting import scheduler, post_to_linkedin, store_image_reference
 
             # Schedule the recurring job for this specific day
             if platform.lower() == 'linkedin':
                 job_id = f"custom_linkedin_{day_name}_{hour}_{minute}_{int(next_run.timestamp())}"
 
                 # Add the job with cron trigger for weekly recurrence
-                if content.get("image_data"):
+                image_id = store_image_reference(content.get("image_data"), content.get("image_id"))
+                if image_id:
                     # Schedule with image
                     scheduler.add_job(
                         post_to_linkedin,
@@ -646,7 +971,9 @@ def schedule_custom_post(platform: str, content: dict, time: str, days: list, po
                         day_of_week=target_weekday,
                         hour=hour,
                         minute=minute,
-                        args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN, content.get('image_data')],
+                        jitter=PUBLISH_SCHEDULE_JITTER,
+                        args=[content.get('content', '')],  # Token resolved when the job runs, never persisted
+                        kwargs={"image_id": image_id},
                         id=job_id,
                         replace_existing=True
                     )
@@ -657,7 +984,8 @@ def schedule_custom_post(platform: str, content: dict, time: str, days: list, po
                         day_of_week=target_weekday,
                         hour=hour,
                         minute=minute,
-                        args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN],
+                        jitter=PUBLISH_SCHEDULE_JITTER,
+                        args=[content.get('content', '')],
                         id=job_id,
                         replace_existing=True
                     )
@@ -687,17 +1015,20 @@ def schedule_daily_post(platform: str, content: dict, time: str, post_args=None)
         print(f"   📅 Scheduling daily post for {platform} at {next_run}")
         
         # Import scheduler from social_media_posting
-        from app.social_media_posting import scheduler, post_to_linkedin, LINKEDIN_ACCESS_TOKEN
+        from app.social_media_posting import scheduler, post_to_linkedin, store_image_reference
 
         if platform.lower() == 'linkedin':
             job_id = f"daily_linkedin_{int(next_run.timestamp())}"
-            if content.get("image_data"):
+            image_id = store_image_reference(content.get("image_data"), content.get("image_id"))
+            if image_id:
                 scheduler.add_job(
                     post_to_linkedin,
                     'interval',
                     days=1,
+                    jitter=PUBLISH_SCHEDULE_JITTER,
                     start_date=next_run,
-                    args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN, content.get('image_data')],
+                    args=[content.get('content', '')],
+                    kwargs={"image_id": image_id},
                     id=job_id,
                     replace_existing=True
                 )
@@ -706,8 +1037,9 @@ def schedule_daily_post(platform: str, content: dict, time: str, post_args=None)
                     post_to_linkedin,
                     'interval',
                     days=1,
+                    jitter=PUBLISH_SCHEDULE_JITTER,
                     start_date=next_run,
-                    args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN],
+                    args=[content.get('content', '')],
                     id=job_id,
                     replace_existing=True
                 )
@@ -736,17 +1068,20 @@ def schedule_weekly_post(platform: str, content: dict, time: str, post_args=None
         print(f"   📅 Scheduling weekly post for {platform} at {next_run}")
         
         # Import scheduler from social_media_posting
-        from app.social_media_posting import scheduler, post_to_linkedin, LINKEDIN_ACCESS_TOKEN
+        from app.social_media_posting import scheduler, post_to_linkedin, store_image_reference
 
         if platform.lower() == 'linkedin':
             job_id = f"weekly_linkedin_{int(next_run.timestamp())}"
-            if content.get("image_data"):
+            image_id = store_image_reference(content.get("image_data"), content.get("image_id"))
+            if image_id:
                 scheduler.add_job(
                     post_to_linkedin,
                     'interval',
                     weeks=1,
+                    jitter=PUBLISH_SCHEDULE_JITTER,
                     start_date=next_run,
-                    args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN, content.get('image_data')],
+                    args=[content.get('content', '')],
+                    kwargs={"image_id": image_id},
                     id=job_id,
                     replace_existing=True
                 )
@@ -755,8 +1090,9 @@ def schedule_weekly_post(platform: str, content: dict, time: str, post_args=None
                     post_to_linkedin,
                     'interval',
                     weeks=1,
+                    jitter=PUBLISH_SCHEDULE_JITTER,
                     start_date=next_run,
-                    args=[content.get('content', ''), LINKEDIN_ACCESS_TOKEN],
+                    args=[content.get('content', '')],
                     id=job_id,
                     replace_existing=True
                 )
@@ -864,4 +1200,5 @@ async def cancel_linkedin_schedule(schedule_id: str):
 #
 # If you POST this with Postman and get a valid JSON response with "content", "type", and "category", 
 # then the backend is working and the issue is in the frontend display logic.
-# If you get an error or empty content, check the PlannerAgent's generate_content method and logs.
\ No newline at end of file
+# If you get an error or empty content, check the PlannerAgent's generate_content method and logs.
+record_startup_phase("imports", _import_started)
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+from app.config import MEDIA_POOL_WORKERS, MEDIA_POOL_QUEUE_SIZE
+
+class MediaPoolBusyError(RuntimeError):
+    """Raised when every media worker is busy and the wait queue is full"""
+
+class MediaWorkerPool:
+    """
+    Process pool for CPU-bound media work: PIL drawing, NumPy frame assembly,
+    ffmpeg-fed video renders and PNG/JPEG/WebP encoding.
+
+    Running these in the API process holds the GIL (or the event loop) and
+    stalls unrelated requests; here they run in max_workers separate
+    processes instead. Tasks are module-level functions taking and returning
+    plain data (bytes, PIL images, strings). At most max_workers tasks run
+    and queue_size wait; beyond that submissions are rejected straight away
+    with MediaPoolBusyError so callers can shed load instead of piling up.
+
+    Workers are spawned (not forked, the API process runs scheduler and
+    HTTP threads) on first use.
+    """
+
+    def __init__(self, max_workers: int, queue_size: int):
+        self.max_workers = max(1, max_workers)
+        self.capacity = self.max_workers + max(0, queue_size)
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            print(f"🏭 Media worker pool started with {self.max_workers} processes")
+        return self._executor
+
+    def submit(self, func: Callable[..., Any], *args) -> Future:
+        """Queue func(*args) on a worker process; raises MediaPoolBusyError when saturated"""
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise MediaPoolBusyError(
+                    f"Media workers are saturated ({self.in_flight} tasks in flight), please retry later"
+                )
+            try:
+                future = self._get_executor().submit(func, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OOM killer); start a fresh pool
+                print("⚠️ Media worker pool broken, restarting it")
+                # Stop the broken pool's management thread and surviving workers before replacing it
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                future = self._get_executor().submit(func, *args)
+            self.in_flight += 1
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future: Future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on a worker and wait for it; for code already off the event loop"""
+        return self.submit(func, *args).result()
+
+    async def arun(self, func: Callable[..., Any], *args) -> Any:
+        """Await func(*args) on a worker without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+media_pool = MediaWorkerPool(MEDIA_POOL_WORKERS, MEDIA_POOL_QUEUE_SIZE)
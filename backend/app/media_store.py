@@ -0,0 +1,226 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+from urllib.parse import quote
+from typing import Callable, Iterable, List, Optional
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from app.config import MEDIA_STORE_DIR, MEDIA_STORE_TTL
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "video/mp4": "mp4",
+}
+EXTENSION_CONTENT_TYPES = {ext: content_type for content_type, ext in CONTENT_TYPE_EXTENSIONS.items()}
+MEDIA_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def guess_image_type(data: bytes) -> str:
+    """Content type of encoded image bytes from their signature, defaulting to PNG"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+@dataclass
+class MediaRef:
+    media_id: str
+    content_type: str
+    size: int
+
+    @property
+    def url(self) -> str:
+        return f"/media/{self.media_id}"
+
+    def to_dict(self) -> dict:
+        return {
+            "media_id": self.media_id,
+            "url": self.url,
+            "content_type": self.content_type,
+            "size": self.size,
+        }
+
+class MediaStore:
+    """
+    Content-addressed store for generated images and videos.
+
+    Media IDs are derived from a SHA-256 of the bytes, so identical media is
+    written once and shared. Files are served directly from disk (see
+    media_response) instead of being base64-encoded into JSON, and files not
+    written or re-used for longer than the TTL are removed, unless a pin
+    source (such as the posting scheduler) still references them.
+    """
+
+    CLEANUP_INTERVAL = 60 * 60
+
+    def __init__(self, root: str, ttl: float):
+        self.root = root
+        self.ttl = ttl
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+        self._pin_sources: List[Callable[[], Iterable[str]]] = []
+
+    def add_pin_source(self, source: Callable[[], Iterable[str]]):
+        """Register a callable returning media IDs that must survive TTL cleanup"""
+        self._pin_sources.append(source)
+
+    def _path(self, media_id: str, ext: str) -> str:
+        return os.path.join(self.root, media_id[:2], f"{media_id}.{ext}")
+
+    def put(self, data: bytes, content_type: str) -> MediaRef:
+        ext = CONTENT_TYPE_EXTENSIONS.get(content_type)
+        if not ext:
+            raise ValueError(f"Unsupported media type: {content_type}")
+
+        media_id = hashlib.sha256(data).hexdigest()[:32]
+        path = self._path(media_id, ext)
+        if os.path.exists(path):
+            os.utime(path)  # Re-use refreshes the TTL
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+        self._maybe_cleanup()
+        return MediaRef(media_id, content_type, len(data))
+
+    def get(self, media_id: str) -> Optional[MediaRef]:
+        path = self.path(media_id)
+        if not path:
+            return None
+        ext = path.rsplit(".", 1)[1]
+        return MediaRef(media_id, EXTENSION_CONTENT_TYPES[ext], os.path.getsize(path))
+
+    def path(self, media_id: str) -> Optional[str]:
+        if not media_id or not MEDIA_ID_PATTERN.match(media_id):
+            return None
+        for ext in EXTENSION_CONTENT_TYPES:
+            path = self._path(media_id, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def exists(self, media_id: str) -> bool:
+        return self.path(media_id) is not None
+
+    def read(self, media_id: str) -> bytes:
+        path = self.path(media_id)
+        if not path:
+            raise KeyError(f"Unknown media ID: {media_id}")
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _maybe_cleanup(self):
+        now = time.time()
+        with self._lock:
+            if now - self._last_cleanup < self.CLEANUP_INTERVAL:
+                return
+            self._last_cleanup = now
+        self.cleanup_expired()
+
+    def _pinned_ids(self) -> set:
+        pinned = set()
+        for source in self._pin_sources:
+            pinned.update(source())
+        return pinned
+
+    def cleanup_expired(self) -> int:
+        try:
+            pinned = self._pinned_ids()
+        except Exception as e:
+            # Without the pin list we could delete media a scheduled post still needs
+            print(f"⚠️ Skipping media cleanup, could not list pinned media: {e}")
+            return 0
+
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.split(".", 1)[0] in pinned:
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        if removed:
+            print(f"🧹 Removed {removed} expired media files")
+        return removed
+
+media_store = MediaStore(MEDIA_STORE_DIR, MEDIA_STORE_TTL)
+
+# ========== HTTP SERVING ==========
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+UNSAFE_FILENAME_CHARS = re.compile(r'[^A-Za-z0-9._ -]')
+
+def content_disposition(filename: str) -> str:
+    """
+    Attachment header for a client-supplied filename: an ASCII-only quoted
+    fallback, plus the exact name as an RFC 5987 filename* parameter
+    """
+    filename = os.path.basename(filename.replace("\\", "/")).strip() or "download"
+    fallback = UNSAFE_FILENAME_CHARS.sub("_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def _iter_file_range(path: str, start: int, length: int, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def media_response(request: Request, media_id: str, filename: str = None):
+    """Stream a stored media file, honouring single-range Range requests"""
+    ref = media_store.get(media_id)
+    if not ref:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    path = media_store.path(media_id)
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "public, max-age=31536000, immutable"}
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    range_header = request.headers.get("range")
+    match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    if not match or not (match.group(1) or match.group(2)):
+        return FileResponse(path, media_type=ref.content_type, headers=headers)
+
+    size = ref.size
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:  # Suffix range: the last N bytes
+        start = max(size - int(match.group(2)), 0)
+        end = size - 1
+    end = min(end, size - 1)
+
+    if start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _iter_file_range(path, start, length),
+        status_code=206,
+        media_type=ref.content_type,
+        headers=headers
+    )
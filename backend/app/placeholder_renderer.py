@@ -0,0 +1,135 @@
+from functools import lru_cache
+from io import BytesIO
+from typing import List
+import numpy as np
+from PIL import Image, ImageDraw
+from app.config import PLACEHOLDER_CACHE_SIZE
+from app.video_renderer import load_font
+from app.media_pool import media_pool
+
+WIDTH, HEIGHT = 800, 600
+
+def wrap_words(text: str, width: int) -> List[str]:
+    """Greedy word wrap to lines of at most width characters (long words get their own line)"""
+    lines = []
+    current_line = []
+    for word in text.split():
+        test_line = ' '.join(current_line + [word])
+        if len(test_line) > width and current_line:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+        else:
+            current_line.append(word)
+    if current_line:
+        lines.append(' '.join(current_line))
+    return lines
+
+def encode_png(image: Image.Image) -> bytes:
+    buffered = BytesIO()
+    image.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+# ========== ENHANCED PLACEHOLDER (/generate, /save-image) ==========
+
+@lru_cache(maxsize=1)
+def _enhanced_base() -> Image.Image:
+    """Gradient, header/footer bars and every piece of static text, rendered once"""
+    rows = np.arange(HEIGHT, dtype=np.float32)[:, None] / HEIGHT
+    column = (np.array([248, 249, 250]) + np.array([7, 6, 5]) * rows).astype(np.uint8)
+    image = Image.fromarray(np.repeat(column[:, None, :], WIDTH, axis=1), "RGB")
+    draw = ImageDraw.Draw(image)
+
+    title_font, heading_font, content_font, small_font = load_font(32), load_font(24), load_font(18), load_font(14)
+
+    # Decorative bars and title
+    draw.rectangle([0, 0, 800, 80], fill='#667eea')
+    draw.rectangle([0, 520, 800, 600], fill='#764ba2')
+    title = "🎨 EcoLens AI Generated Image"
+    title_bbox = draw.textbbox((0, 0), title, font=title_font)
+    draw.text(((WIDTH - (title_bbox[2] - title_bbox[0])) // 2, 25), title, fill='white', font=title_font)
+
+    # Category badge (text added per request) and success indicator
+    draw.rectangle([50, 120, 300, 160], fill='#28a745', outline='#1e7e34', width=2)
+    draw.rectangle([650, 120, 750, 160], fill='#17a2b8', outline='#138496', width=2)
+    draw.text((660, 132), "✅ SUCCESS", fill='white', font=content_font)
+
+    draw.text((50, 200), "📝 Generated Content:", fill='#343a40', font=heading_font)
+
+    feature_y = 420
+    draw.text((50, feature_y), "✨ Features:", fill='#6c757d', font=heading_font)
+    features = [
+        "🎯 Targeted for your industry",
+        "🚀 Ready for social media",
+        "💡 Professional design"
+    ]
+    for i, feature in enumerate(features):
+        draw.text((70, feature_y + 30 + (i * 25)), feature, fill='#6c757d', font=content_font)
+
+    footer_text = "Generated by EcoLens AI"
+    footer_bbox = draw.textbbox((0, 0), footer_text, font=small_font)
+    draw.text(((WIDTH - (footer_bbox[2] - footer_bbox[0])) // 2, 550), footer_text, fill='white', font=small_font)
+    return image
+
+def _draw_enhanced(category: str, prompt: str) -> bytes:
+    """Runs on a media worker process, where the base image and fonts stay loaded"""
+    image = _enhanced_base().copy()
+    draw = ImageDraw.Draw(image)
+    heading_font, content_font = load_font(24), load_font(18)
+
+    draw.text((60, 132), f"📂 {category}", fill='white', font=heading_font)
+
+    content_y = 200
+    if prompt and prompt.strip():
+        for i, line in enumerate(wrap_words(prompt, 50)[:8]):  # Max 8 lines
+            draw.text((70, content_y + 40 + (i * 25)), f"• {line}", fill='#495057', font=content_font)
+    else:
+        draw.text((70, content_y + 40), "• Professional marketing content", fill='#495057', font=content_font)
+        draw.text((70, content_y + 65), "• Tailored for your business needs", fill='#495057', font=content_font)
+        draw.text((70, content_y + 90), "• AI-powered visual generation", fill='#495057', font=content_font)
+    return encode_png(image)
+
+@lru_cache(maxsize=PLACEHOLDER_CACHE_SIZE)
+def _render_enhanced(category: str, prompt: str) -> bytes:
+    return media_pool.run(_draw_enhanced, category, prompt)
+
+def render_enhanced_placeholder(category: str, prompt: str) -> bytes:
+    """
+    Branded placeholder PNG for a category and prompt.
+
+    Only the category badge and prompt lines are drawn per call, on a copy
+    of the cached base image in a media worker process, and the encoded PNG
+    is cached here per (category, prompt). The footer carries no timestamp,
+    so a repeated request is always a cache hit. Call from a worker thread,
+    not the event loop.
+    """
+    return _render_enhanced(category, prompt or "")
+
+# ========== SIMPLE PLACEHOLDER (ImageGenerator fallback) ==========
+
+@lru_cache(maxsize=1)
+def _simple_base() -> Image.Image:
+    image = Image.new('RGB', (WIDTH, HEIGHT), color='#f0f8ff')
+    ImageDraw.Draw(image).text((50, 50), "EcoLens AI Generated Content", fill='#333', font=load_font(24))
+    return image
+
+def _draw_simple(prompt: str) -> bytes:
+    image = _simple_base().copy()
+    draw = ImageDraw.Draw(image)
+    small_font = load_font(16)
+    for i, line in enumerate(wrap_words(prompt, 60)[:8]):  # Limit to 8 lines
+        draw.text((50, 150 + i * 30), line, fill='#666', font=small_font)
+    return encode_png(image)
+
+@lru_cache(maxsize=PLACEHOLDER_CACHE_SIZE)
+def render_simple_placeholder(prompt: str) -> bytes:
+    """Plain placeholder PNG showing the wrapped prompt, rendered on a media worker and cached per prompt"""
+    return media_pool.run(_draw_simple, prompt)
+
+def placeholder_cache_stats() -> dict:
+    return {
+        name: {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for name, info in (
+            ("enhanced", _render_enhanced.cache_info()),
+            ("simple", render_simple_placeholder.cache_info()),
+        )
+    }
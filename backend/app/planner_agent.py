@@ -1,15 +1,14 @@
 import os
-from typing import Optional, List
+import json
+import asyncio
+from typing import Callable, Optional, List
 from dataclasses import dataclass
-import google.generativeai as genai
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from app.image_generator import ImageGenerator
 from app.config import GEMINI_API_KEY
-
-# Configure Gemini
-genai.configure(api_key=GEMINI_API_KEY)
+from app.provider_limits import gemini_limiter
+from app.generation_cache import text_cache
+from app.single_flight import content_flights
+from app.providers import get_image_generator
 
 # ========== DATA STRUCTURES ==========
 
@@ -18,6 +17,8 @@ class PlannerInput(BaseModel):
     output_type: str
     periodic_content: bool
     additional_prompt: str
+    use_cache: bool = True
+    inline_media: bool = True  # Include base64 payloads alongside media IDs
 
 class Subtask(BaseModel):
     name: str
@@ -32,9 +33,22 @@ class PlannerReport(BaseModel):
 # ========== CONTENT GENERATION AGENT ==========
 
 class PlannerAgent:
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.image_generator = ImageGenerator()
+    MODEL_NAME = 'gemini-1.5-flash'
+    TEMPERATURE = 0.7
+
+    def __init__(self, image_generator=None):
+        """image_generator defaults to the process-wide instance from app.providers"""
+        self._image_generator = image_generator
+        # The Gemini SDK is slow to import, so it is loaded with the first agent
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(self.MODEL_NAME)
+        self.generation_config = genai.types.GenerationConfig(temperature=self.TEMPERATURE)
+
+    @property
+    def image_generator(self):
+        """The injected ImageGenerator, else the shared one, built on the first image request"""
+        return self._image_generator or get_image_generator()
 
     def analyze_prompt(self, user_input: PlannerInput) -> PlannerReport:
         questions = []
@@ -76,8 +90,20 @@ class PlannerAgent:
             llm_decision_rationale="Analysis based on provided information and best practices"
         )
 
+    def _content_key(self, user_input: PlannerInput) -> str:
+        """Single-flight key: the normalized Gemini prompt plus options that change the result"""
+        return text_cache.make_key(self._build_text_prompt(user_input), self.MODEL_NAME, {
+            "use_cache": user_input.use_cache, "inline_media": user_input.inline_media
+        })
+
     def generate_content(self, user_input: PlannerInput) -> dict:
-        """Generate both text and image content if image is requested"""
+        """
+        Generate both text and image content if image is requested. Identical
+        requests made while one is running share its result.
+        """
+        return content_flights.run(self._content_key(user_input), lambda: self._generate_content(user_input))
+
+    def _generate_content(self, user_input: PlannerInput) -> dict:
         image_needed = self._should_generate_image(user_input.output_type, user_input.additional_prompt)
         text_result = self._generate_text_content(user_input)
         if image_needed:
@@ -89,21 +115,76 @@ class PlannerAgent:
                 "image_label": image_result.get("content", ""),
                 "image_prompt": image_result.get("prompt", ""),
                 "image_data": image_result.get("image_data", ""),
+                "image_id": image_result.get("image_id", ""),
+                "image_url": image_result.get("image_url", ""),
                 "image_source": image_result.get("image_source", ""),
             }
         else:
             return text_result
+
+    async def agenerate_content(self, user_input: PlannerInput,
+                                on_text_delta: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Async variant of generate_content; text and image are generated concurrently.
+        If on_text_delta is given, the text is streamed from Gemini and each
+        chunk is passed to it as it arrives.
+
+        Identical requests attach to the one in flight. A streaming caller
+        that attaches late first gets the chunks sent so far; if the request
+        it joined is not streaming, it gets the whole text as one chunk.
+        """
+        if not on_text_delta:
+            return await content_flights.do(
+                self._content_key(user_input), lambda publish: self._agenerate_content(user_input)
+            )
+
+        delivered = []
+        def listener(delta: str):
+            delivered.append(delta)
+            on_text_delta(delta)
+
+        result = await content_flights.do(
+            self._content_key(user_input), lambda publish: self._agenerate_content(user_input, publish), listener
+        )
+        if not delivered:
+            on_text_delta(result["content"])
+        return result
+
+    async def _agenerate_content(self, user_input: PlannerInput,
+                                 on_text_delta: Optional[Callable[[str], None]] = None) -> dict:
+        image_needed = self._should_generate_image(user_input.output_type, user_input.additional_prompt)
+        if not image_needed:
+            return await self._agenerate_text_content(user_input, on_text_delta)
+
+        text_result, image_result = await asyncio.gather(
+            self._agenerate_text_content(user_input, on_text_delta),
+            self._agenerate_image_content(user_input)
+        )
+        return {
+            "type": "image",
+            "content": text_result["content"],
+            "image_label": image_result.get("content", ""),
+            "image_prompt": image_result.get("prompt", ""),
+            "image_data": image_result.get("image_data", ""),
+            "image_id": image_result.get("image_id", ""),
+            "image_url": image_result.get("image_url", ""),
+            "image_source": image_result.get("image_source", ""),
+        }
     
     def _should_generate_image(self, output_type: str, prompt: str) -> bool:
         """Determine if image generation is needed"""
         image_keywords = ['image', 'picture', 'visual', 'graphic', 'logo', 'banner', 'poster']
         return any(keyword in output_type.lower() or keyword in prompt.lower() for keyword in image_keywords)
     
-    def _generate_text_content(self, user_input: PlannerInput) -> dict:
-        """Generate text content using Gemini"""
+    def _build_text_prompt(self, user_input: PlannerInput) -> str:
+        """Build the Gemini prompt for a marketing text request"""
+        return self._build_text_request(user_input) + "\nRespond ONLY with the final content (no metadata, no explanation).\n"
+
+    def _build_text_request(self, user_input: PlannerInput) -> str:
+        """The request part of the text prompt, without the reply-format instruction"""
         user_prompt = user_input.additional_prompt or f"Create engaging {user_input.output_type} content for a {user_input.business_name} business"
         
-        prompt = f"""
+        return f"""
 You are a professional content creator specializing in business marketing content.
 
 Create {user_input.output_type} content for the following business:
@@ -115,25 +196,168 @@ Specific Request: {user_prompt}
 
 Generate engaging, professional content that would be suitable for this business. 
 Be creative and provide valuable content that would appeal to their target audience.
-
-Respond ONLY with the final content (no metadata, no explanation).
 """
+
+    def _text_cache_key(self, prompt: str) -> str:
+        return text_cache.make_key(prompt, self.MODEL_NAME, {"temperature": self.TEMPERATURE})
+
+    def _generate_text_content(self, user_input: PlannerInput) -> dict:
+        """Generate text content using Gemini"""
+        prompt = self._build_text_prompt(user_input)
+        cache_key = self._text_cache_key(prompt)
+        if user_input.use_cache:
+            cached = text_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(temperature=0.7),
-            )
-            return {
+            with gemini_limiter.sync_slot():
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=self.generation_config,
+                )
+            result = {
                 "type": "text",
                 "content": response.text.strip()
             }
+            if user_input.use_cache:
+                text_cache.set(cache_key, result)
+            return result
+        except Exception as e:
+            return {
+                "type": "text",
+                "content": self._generate_fallback_text_content(user_input, str(e))
+            }
+
+    async def _agenerate_text_content(self, user_input: PlannerInput,
+                                      on_delta: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Generate text content using Gemini without blocking the event loop.
+
+        With on_delta, the completion is streamed and every chunk is handed to
+        it as soon as Gemini produces it (a cache hit arrives as one chunk).
+        Chunks are provisional: if the stream fails part-way the returned
+        result carries the fallback content instead.
+        """
+        prompt = self._build_text_prompt(user_input)
+        cache_key = self._text_cache_key(prompt)
+        if user_input.use_cache:
+            cached = await text_cache.aget(cache_key)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached["content"])
+                return cached
+
+        try:
+            async with gemini_limiter.slot():
+                if on_delta:
+                    content = await self._astream_text(prompt, on_delta)
+                else:
+                    response = await self.model.generate_content_async(
+                        prompt,
+                        generation_config=self.generation_config,
+                    )
+                    content = response.text
+            result = {
+                "type": "text",
+                "content": content.strip()
+            }
+            if user_input.use_cache:
+                await text_cache.aset(cache_key, result)
+            return result
         except Exception as e:
             return {
                 "type": "text",
                 "content": self._generate_fallback_text_content(user_input, str(e))
             }
+
+    async def _astream_text(self, prompt: str, on_delta: Callable[[str], None]) -> str:
+        """Stream a Gemini completion chunk by chunk and return the full text"""
+        response = await self.model.generate_content_async(
+            prompt,
+            generation_config=self.generation_config,
+            stream=True,
+        )
+        chunks = []
+        async for chunk in response:
+            if chunk.text:
+                chunks.append(chunk.text)
+                on_delta(chunk.text)
+        return "".join(chunks)
     
+    def _build_batch_prompt(self, user_inputs: List[PlannerInput]) -> str:
+        """One Gemini prompt covering several text requests, answered as a JSON array"""
+        requests = "\n".join(
+            f"### Request {i}\n{self._build_text_request(user_input).strip()}\n"
+            for i, user_input in enumerate(user_inputs, start=1)
+        )
+        return f"""
+You will receive {len(user_inputs)} independent content requests. Answer each one on its own, exactly as if it were the only request.
+
+{requests}
+Respond ONLY with a JSON array of {len(user_inputs)} strings, where string i is the final content for Request i (no metadata, no explanation).
+"""
+
+    @staticmethod
+    def _parse_batch_response(text: str, expected: int) -> Optional[List[str]]:
+        """Split a batched reply into one string per request, or None if it does not line up"""
+        text = text.strip()
+        if text.startswith("```"):
+            text = text.strip("`").removeprefix("json").strip()
+        try:
+            contents = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(contents, list) or len(contents) != expected:
+            return None
+        if not all(isinstance(content, str) and content.strip() for content in contents):
+            return None
+        return contents
+
+    async def agenerate_text_batch(self, user_inputs: List[PlannerInput]) -> List[dict]:
+        """
+        Generate text for several requests with a single Gemini call.
+
+        Cached prompts are answered from the cache and the rest are packed
+        into one prompt that asks for a JSON array. Results are cached per
+        request, under the same keys a single request uses. If the reply
+        cannot be split into exactly one piece per request, each request is
+        generated on its own instead, so a bad batch never mixes up answers.
+        """
+        results: List[Optional[dict]] = [None] * len(user_inputs)
+        pending = []
+        for i, user_input in enumerate(user_inputs):
+            if user_input.use_cache:
+                results[i] = await text_cache.aget(self._text_cache_key(self._build_text_prompt(user_input)))
+            if results[i] is None:
+                pending.append(i)
+
+        contents = None
+        if len(pending) > 1:
+            try:
+                async with gemini_limiter.slot():
+                    response = await self.model.generate_content_async(
+                        self._build_batch_prompt([user_inputs[i] for i in pending]),
+                        generation_config=self.generation_config,
+                    )
+                contents = self._parse_batch_response(response.text, len(pending))
+                if contents is None:
+                    print(f"⚠️ Batched Gemini reply did not split into {len(pending)} items, generating them one by one")
+            except Exception as e:
+                print(f"⚠️ Batched Gemini call failed, generating {len(pending)} items one by one: {e}")
+
+        if contents is None:
+            singles = await asyncio.gather(*(self._agenerate_text_content(user_inputs[i]) for i in pending))
+            for i, result in zip(pending, singles):
+                results[i] = result
+            return results
+
+        for i, content in zip(pending, contents):
+            results[i] = {"type": "text", "content": content.strip()}
+            if user_inputs[i].use_cache:
+                await text_cache.aset(self._text_cache_key(self._build_text_prompt(user_inputs[i])), results[i])
+        return results
+
     def _generate_image_content(self, user_input: PlannerInput) -> dict:
         """Generate image content using Hugging Face"""
         try:
@@ -141,14 +365,18 @@ Respond ONLY with the final content (no metadata, no explanation).
                 user_input.business_name, 
                 user_input.additional_prompt
             )
-            image_result = self.image_generator.generate_image(image_prompt)
+            image_result = self.image_generator.generate_image(
+                image_prompt, use_cache=user_input.use_cache, inline=user_input.inline_media
+            )
             
-            if image_result and image_result.get("image_base64"):
+            if image_result and image_result.get("media_id"):
                 return {
                     "type": "image",
                     "content": f"Generated image for {user_input.business_name}",
                     "prompt": image_prompt,
-                    "image_data": image_result["image_base64"],
+                    "image_data": image_result.get("image_base64"),
+                    "image_id": image_result["media_id"],
+                    "image_url": image_result["image_url"],
                     "image_source": image_result.get("source", "unknown")
                 }
             else:
@@ -159,6 +387,33 @@ Respond ONLY with the final content (no metadata, no explanation).
             # Fallback to text if image generation fails
             return self._generate_text_content(user_input)
 
+    async def _agenerate_image_content(self, user_input: PlannerInput) -> dict:
+        """Generate image content using Hugging Face without blocking the event loop"""
+        try:
+            image_prompt = self.image_generator.create_image_prompt(
+                user_input.business_name, 
+                user_input.additional_prompt
+            )
+            image_result = await self.image_generator.agenerate_image(
+                image_prompt, use_cache=user_input.use_cache, inline=user_input.inline_media
+            )
+            
+            if image_result and image_result.get("media_id"):
+                return {
+                    "type": "image",
+                    "content": f"Generated image for {user_input.business_name}",
+                    "prompt": image_prompt,
+                    "image_data": image_result.get("image_base64"),
+                    "image_id": image_result["media_id"],
+                    "image_url": image_result["image_url"],
+                    "image_source": image_result.get("source", "unknown")
+                }
+            else:
+                return await self._agenerate_text_content(user_input)
+        except Exception as e:
+            print(f"Image generation error: {e}")
+            return await self._agenerate_text_content(user_input)
+
     def _generate_fallback_text_content(self, user_input: PlannerInput, error_msg: str) -> str:
         """Generate fallback content when API is unavailable"""
         business_type = user_input.business_name
@@ -174,33 +429,3 @@ Respond ONLY with the final content (no metadata, no explanation).
     def generate_final_content(self, user_input: PlannerInput, report: PlannerReport) -> str:
         # Mock implementation - replace with your actual logic
         return f"Generated content for {user_input.business_name}: {user_input.additional_prompt}"
-
-# ========== FASTAPI SERVER ==========
-
-class PlannerRequest(BaseModel):
-    business_name: str
-    output_type: str
-    periodic_content: bool
-    additional_prompt: Optional[str] = ""
-
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-agent = PlannerAgent()
-
-@app.post("/generate")
-def generate(payload: PlannerRequest):
-    user_input = PlannerInput(
-        business_name=payload.business_name,
-        output_type=payload.output_type,
-        periodic_content=payload.periodic_content,
-        additional_prompt=payload.additional_prompt
-    )
-    content = agent.generate_content(user_input)
-    return {"status": "done", "content": content}
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Target dimensions and style per social platform, shared by the video
+# generator (clip size/length) and the image rendition pipeline
+PLATFORM_SPECS = {
+    "instagram": {"width": 1080, "height": 1080, "duration": 15, "style": "creative"},
+    "tiktok": {"width": 1080, "height": 1920, "duration": 30, "style": "creative"},
+    "youtube": {"width": 1920, "height": 1080, "duration": 60, "style": "professional"},
+    "linkedin": {"width": 1200, "height": 675, "duration": 30, "style": "professional"},
+    "facebook": {"width": 1200, "height": 630, "duration": 30, "style": "creative"},
+}
+DEFAULT_PLATFORM = "instagram"
+
+def get_platform_spec(platform: str) -> dict:
+    return PLATFORM_SPECS.get((platform or "").lower(), PLATFORM_SPECS[DEFAULT_PLATFORM])
@@ -0,0 +1,307 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from app.config import (
+    PROVIDER_MIN_CONCURRENCY,
+    PROVIDER_HEALTH_WINDOW,
+    PROVIDER_TRIP_QUOTA_ERRORS,
+    PROVIDER_TRIP_ERROR_RATE,
+    PROVIDER_TRIP_COOLDOWN,
+    GEMINI_MAX_CONCURRENCY,
+    HF_IMAGE_MAX_CONCURRENCY,
+    HF_VIDEO_MAX_CONCURRENCY,
+    FACEBOOK_PUBLISH_MAX_CONCURRENCY,
+    LINKEDIN_PUBLISH_MAX_CONCURRENCY,
+)
+
+class ProviderLimiter:
+    """
+    Caps the number of in-flight calls to one provider within a worker.
+
+    Callers beyond the limit wait on the event loop instead of tying up a
+    thread, so a worker can hold many open requests while only a bounded
+    number of them are actually talking to the provider.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting
+        }
+
+class ProviderTrippedError(RuntimeError):
+    """Raised instead of calling a provider that is tripped (quota exhausted or failing)"""
+
+def classify_provider_error(error: Exception) -> str:
+    """
+    "quota" for 429/quota exhaustion, "server" for 5xx, timeouts and
+    connection failures, "client" for anything else (bad request, safety
+    block...), which says nothing about the provider's health.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None) or getattr(error, "code", None)
+    try:
+        status = int(status) if status is not None else None
+    except (TypeError, ValueError):
+        status = None  # e.g. a gRPC status enum
+    message = str(error).lower()
+    error_type = type(error).__name__.lower()
+
+    if status == 429 or any(hint in message for hint in ("429", "quota", "rate limit", "resource exhausted", "resource_exhausted")):
+        return "quota"
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or (status is not None and status >= 500):
+        return "server"
+    if "timeout" in error_type or "connect" in error_type or "timed out" in message:
+        return "server"
+    return "client"
+
+class AdaptiveProviderLimiter(ProviderLimiter):
+    """
+    ProviderLimiter whose limit follows the provider's health.
+
+    The limit grows by one after a full limit's worth of successes and is
+    halved (at most once per observed call latency) on a quota error, 5xx
+    or timeout: additive increase, multiplicative decrease, between
+    min_limit and the configured maximum.
+
+    After trip_quota_errors consecutive quota errors, or when at least
+    trip_error_rate of the recent window failed, the provider is tripped
+    for cooldown seconds: slot() and check() raise ProviderTrippedError at
+    once, so callers go straight to their fallback instead of paying a
+    failing round trip. Then a single trial call is let through; success
+    closes the circuit at min_limit, failure trips it again.
+
+    Blocking callers use sync_slot(), which shares the same limit, health
+    window and trial call with the async slot().
+    """
+
+    def __init__(self, name: str, limit: int, min_limit: int, window: int,
+                 trip_quota_errors: int, trip_error_rate: float, cooldown: float):
+        super().__init__(name, limit)
+        self.max_limit = limit
+        self.min_limit = max(1, min(min_limit, limit))
+        self.trip_quota_errors = trip_quota_errors
+        self.trip_error_rate = trip_error_rate
+        self.cooldown = cooldown
+        self.state = "closed"  # closed -> open (tripped) -> half_open -> closed
+        self.tripped_until = 0.0
+        self.latency = None  # Moving average of successful call latency, seconds
+        self.quota_errors = 0  # Consecutive
+        self.short_circuited = 0
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._increase_credit = 0.0
+        self._last_decrease = 0.0
+        self._trial_in_flight = False
+        self._condition = asyncio.Condition()
+        self._sync_condition = threading.Condition()
+        self._loop = None  # Loop of the async waiters, woken when a blocking caller frees a slot
+        self._lock = threading.Lock()
+
+    def _short_circuit(self):
+        self.short_circuited += 1
+        raise ProviderTrippedError(
+            f"{self.name} is tripped for another {max(0.0, self.tripped_until - time.monotonic()):.0f}s, using fallback"
+        )
+
+    def check(self):
+        """Raise ProviderTrippedError while tripped; the fast path in front of a slot"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() < self.tripped_until:
+                    self._short_circuit()
+                self.state = "half_open"
+
+    def _try_acquire(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() < self.tripped_until:
+                    self._short_circuit()
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._trial_in_flight or self.in_flight:
+                    return False
+                self._trial_in_flight = True
+            elif self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    @asynccontextmanager
+    async def slot(self):
+        self.check()
+        self._loop = asyncio.get_running_loop()
+        self._add_waiting(1)
+        try:
+            async with self._condition:
+                await self._condition.wait_for(self._try_acquire)
+        finally:
+            self._add_waiting(-1)
+
+        start = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            raise  # Deadline or disconnect on our side, not a provider signal
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+        finally:
+            self._release()
+            async with self._condition:
+                self._condition.notify_all()
+
+    @contextmanager
+    def sync_slot(self):
+        """Blocking counterpart of slot(), for calls made from worker threads"""
+        self.check()
+        self._add_waiting(1)
+        try:
+            with self._sync_condition:
+                self._sync_condition.wait_for(self._try_acquire)
+        finally:
+            self._add_waiting(-1)
+
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        else:
+            self.record_success(time.monotonic() - start)
+        finally:
+            self._release()
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._notify_async()))
+
+    async def _notify_async(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def _add_waiting(self, delta: int):
+        with self._lock:
+            self.waiting += delta
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._trial_in_flight = False
+        with self._sync_condition:
+            self._sync_condition.notify_all()
+
+    def record_success(self, latency: float = None):
+        with self._lock:
+            self._outcomes.append(True)
+            self.quota_errors = 0
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if self.state == "half_open":
+                print(f"🚦 {self.name} recovered, resuming at concurrency {self.min_limit}")
+                self.state = "closed"
+                self.limit = self.min_limit
+                self._increase_credit = 0.0
+                return
+            self._increase_credit += 1 / self.limit
+            if self._increase_credit >= 1:
+                self._increase_credit = 0.0
+                self.limit = min(self.max_limit, self.limit + 1)
+
+    def record_failure(self, error: Exception):
+        kind = classify_provider_error(error)
+        if kind == "client":
+            self.record_success()
+            return
+        with self._lock:
+            self._outcomes.append(False)
+            if kind == "quota":
+                self.quota_errors += 1
+
+            now = time.monotonic()
+            if now - self._last_decrease >= max(1.0, self.latency or 0.0):
+                self.limit = max(self.min_limit, self.limit // 2)
+                self._last_decrease = now
+
+            failures = self._outcomes.count(False)
+            error_rate_exceeded = (
+                len(self._outcomes) >= self._outcomes.maxlen // 2
+                and failures / len(self._outcomes) >= self.trip_error_rate
+            )
+            if self.state == "half_open" or self.quota_errors >= self.trip_quota_errors or error_rate_exceeded:
+                self._trip(kind)
+
+    def _trip(self, kind: str):
+        if self.state != "open":
+            print(f"🚦 {self.name} tripped for {self.cooldown:.0f}s after {kind} errors, serving fallbacks")
+        self.state = "open"
+        self.tripped_until = time.monotonic() + self.cooldown
+        self.limit = self.min_limit
+        self.quota_errors = 0
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                **super().stats(),
+                "max_limit": self.max_limit,
+                "state": self.state,
+                "retry_in": round(max(0.0, self.tripped_until - time.monotonic()), 1) if self.state == "open" else 0,
+                "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+                "error_rate": round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+                "short_circuited": self.short_circuited,
+            }
+
+def _adaptive_limiter(name: str, limit: int) -> AdaptiveProviderLimiter:
+    return AdaptiveProviderLimiter(
+        name, limit,
+        min_limit=PROVIDER_MIN_CONCURRENCY,
+        window=PROVIDER_HEALTH_WINDOW,
+        trip_quota_errors=PROVIDER_TRIP_QUOTA_ERRORS,
+        trip_error_rate=PROVIDER_TRIP_ERROR_RATE,
+        cooldown=PROVIDER_TRIP_COOLDOWN,
+    )
+
+# Generation providers adapt to their health; the publishing limiters stay
+# fixed, those hosts are guarded by the HTTP client's circuit breakers
+gemini_limiter = _adaptive_limiter("gemini", GEMINI_MAX_CONCURRENCY)
+hf_image_limiter = _adaptive_limiter("huggingface_image", HF_IMAGE_MAX_CONCURRENCY)
+hf_video_limiter = _adaptive_limiter("huggingface_video", HF_VIDEO_MAX_CONCURRENCY)
+facebook_publish_limiter = ProviderLimiter("facebook_publish", FACEBOOK_PUBLISH_MAX_CONCURRENCY)
+linkedin_publish_limiter = ProviderLimiter("linkedin_publish", LINKEDIN_PUBLISH_MAX_CONCURRENCY)
+
+def get_limiter_stats() -> dict:
+    return {
+        limiter.name: limiter.stats()
+        for limiter in (
+            gemini_limiter, hf_image_limiter, hf_video_limiter,
+            facebook_publish_limiter, linkedin_publish_limiter,
+        )
+    }
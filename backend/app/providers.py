@@ -0,0 +1,163 @@
+import os
+import time
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable
+from app.config import HUGGINGFACE_TOKEN, HF_REQUEST_TIMEOUT, HF_HTTP_POOL_SIZE, IMAGE_BACKENDS, IMAGE_BACKEND_WINDOW
+
+class LazyProvider:
+    """
+    A process-wide singleton built on first use.
+
+    The factory (and any heavy import inside it) runs once, under a lock, the
+    first time get() is called from any module; later calls return the same
+    instance. How long the build took is kept for the startup report.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.built = False
+        self.build_ms = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self.built:
+            return self.instance
+        with self._lock:
+            if not self.built:
+                start = time.perf_counter()
+                self.instance = self.factory()
+                self.build_ms = round((time.perf_counter() - start) * 1000, 1)
+                self.built = True
+                print(f"⚙️ {self.name} initialized in {self.build_ms} ms")
+        return self.instance
+
+    def stats(self) -> dict:
+        return {"built": self.built, "build_ms": self.build_ms}
+
+_providers: Dict[str, LazyProvider] = {}
+
+def lazy_provider(name: str):
+    """Turn a factory function into a getter for a lazily built, shared instance"""
+    def decorator(factory: Callable[[], Any]) -> Callable[[], Any]:
+        provider = _providers[name] = LazyProvider(name, factory)
+
+        @wraps(factory)
+        def get():
+            return provider.get()
+        return get
+    return decorator
+
+# ========== SHARED CLIENTS ==========
+# One pooled client per backend, used by every generator and route, so all
+# code paths share keep-alive connections
+
+def get_hf_token() -> str:
+    return HUGGINGFACE_TOKEN or os.getenv("HF_TOKEN", "")
+
+@lazy_provider("huggingface_client")
+def get_hf_client():
+    """Blocking InferenceClient, or None without a token"""
+    if not get_hf_token():
+        return None
+    try:
+        from huggingface_hub import InferenceClient
+        return InferenceClient(token=get_hf_token(), timeout=HF_REQUEST_TIMEOUT)
+    except Exception as e:
+        print(f"❌ Failed to initialize HF client: {e}")
+        return None
+
+@lazy_provider("huggingface_async_client")
+def get_hf_async_client():
+    """AsyncInferenceClient, or None without a token"""
+    if not get_hf_token():
+        return None
+    try:
+        from huggingface_hub import AsyncInferenceClient
+        return AsyncInferenceClient(token=get_hf_token(), timeout=HF_REQUEST_TIMEOUT)
+    except Exception as e:
+        print(f"❌ Failed to initialize async HF client: {e}")
+        return None
+
+@lazy_provider("huggingface_http")
+def get_hf_http_client():
+    """Pooled httpx client for raw HuggingFace Inference API calls (text-to-video)"""
+    import httpx
+    limits = httpx.Limits(max_connections=HF_HTTP_POOL_SIZE, max_keepalive_connections=HF_HTTP_POOL_SIZE)
+    return httpx.AsyncClient(timeout=HF_REQUEST_TIMEOUT, limits=limits)
+
+@lazy_provider("huggingface_session")
+def get_hf_session():
+    """Pooled requests session for the blocking HuggingFace Inference API calls"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=HF_HTTP_POOL_SIZE, pool_maxsize=HF_HTTP_POOL_SIZE))
+    return session
+
+@lazy_provider("image_backend_router")
+def get_image_backend_router():
+    """Router over the IMAGE_BACKENDS models; empty (placeholders only) without a HuggingFace token"""
+    from app.image_backends import ImageBackendRouter, HuggingFaceImageBackend, parse_image_backends
+    router = ImageBackendRouter()
+    client, async_client = get_hf_client(), get_hf_async_client()
+    if client and async_client:
+        for name, model, quality in parse_image_backends(IMAGE_BACKENDS):
+            router.register(HuggingFaceImageBackend(name, model, quality, client, async_client, IMAGE_BACKEND_WINDOW))
+    return router
+
+# ========== GENERATORS ==========
+
+@lazy_provider("planner_agent")
+def get_planner_agent():
+    from app.planner_agent import PlannerAgent
+    return PlannerAgent()
+
+@lazy_provider("image_generator")
+def get_image_generator():
+    try:
+        from app.image_generator import ImageGenerator
+        return ImageGenerator()
+    except ImportError as e:
+        print(f"⚠️ Could not import ImageGenerator: {e}")
+        return None
+
+@lazy_provider("video_generator")
+def get_video_generator():
+    try:
+        from app.video_generator import VideoGenerator
+        return VideoGenerator()
+    except ImportError as e:
+        print(f"⚠️ Could not import VideoGenerator: {e}")
+        return None
+
+def warm_up(names: Iterable[str]):
+    """
+    Build the named providers ahead of the first request, e.g. from the
+    startup hook. Unknown names are reported and skipped.
+    """
+    for name in names:
+        provider = _providers.get(name)
+        if provider is None:
+            print(f"⚠️ Unknown provider '{name}' in warm-up list, expected one of {list(_providers)}")
+            continue
+        try:
+            provider.get()
+        except Exception as e:
+            print(f"⚠️ Warm-up of {name} failed: {e}")
+
+# ========== STARTUP TIMING ==========
+
+_phases: Dict[str, float] = {}
+
+def record_startup_phase(name: str, started_at: float):
+    """Record how long a startup phase took, given its time.perf_counter() start"""
+    _phases[name] = round((time.perf_counter() - started_at) * 1000, 1)
+
+def startup_report() -> dict:
+    return {
+        "phases_ms": dict(_phases),
+        "providers": {name: provider.stats() for name, provider in _providers.items()},
+    }
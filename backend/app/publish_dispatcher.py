@@ -0,0 +1,197 @@
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.config import FACEBOOK_POSTS_PER_MINUTE, LINKEDIN_POSTS_PER_MINUTE, PUBLISH_BURST_SIZE, PUBLISH_QUOTA_DB_PATH
+from app.scheduler_store import connect_sqlite
+
+class PublishQuotaExceededError(RuntimeError):
+    """Raised instead of reserving quota that would take longer than allowed to earn"""
+
+    def __init__(self, platform: str, delay: float, retry_after: float):
+        super().__init__(
+            f"{platform} posting quota exhausted: publishing now would wait {delay:.0f}s, retry in {retry_after:.0f}s"
+        )
+        self.delay = delay
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Reservation-style token bucket.
+
+    Every reservation is granted immediately but may drive the balance
+    negative; the caller then waits until its tokens have been earned. A
+    burst therefore queues up in arrival order and drains at exactly the
+    sustained rate instead of being rejected.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float, updated: float, now: float) -> float:
+        return min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+    def _delay(self, tokens: float, count: int) -> float:
+        return max(0.0, (count - tokens) / self.rate)
+
+    def _transact(self, change: Callable[[float], Tuple[float, Any]]) -> Any:
+        """Atomically replace the refilled balance by change(tokens) -> (tokens, result)"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens, result = change(self._refill(self.tokens, self._updated, now))
+            self._updated = now
+            return result
+
+    def estimate(self, count: int = 1) -> float:
+        """Seconds a reservation of count tokens made now would have to wait"""
+        return self._transact(lambda tokens: (tokens, self._delay(tokens, count)))
+
+    def reserve(self, count: int = 1, max_delay: float = None) -> Optional[float]:
+        """
+        Take count tokens and return how many seconds to wait before using
+        them, or None (taking nothing) if that would be longer than max_delay
+        """
+        def take(tokens: float):
+            delay = self._delay(tokens, count)
+            if max_delay is not None and delay > max_delay:
+                return tokens, None
+            return tokens - count, delay
+        return self._transact(take)
+
+    def stats(self) -> dict:
+        tokens = self._transact(lambda tokens: (tokens, tokens))
+        return {
+            "posts_per_minute": round(self.rate * 60, 2),
+            "available": round(max(tokens, 0.0), 2),
+            "backlog_seconds": round(max(0.0, -tokens / self.rate), 1),
+        }
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    Token bucket whose balance lives in a SQLite table every worker shares,
+    so N uvicorn workers together stay within one quota instead of N.
+
+    Each reservation is a short BEGIN IMMEDIATE transaction on the row for
+    this bucket. If the database cannot be used, pacing falls back to this
+    process's own balance rather than failing the post.
+    """
+
+    def __init__(self, db_path: str, key: str, rate_per_second: float, capacity: int):
+        super().__init__(rate_per_second, capacity)
+        self.db_path = db_path
+        self.key = key
+        self._table_ready = False
+
+    def _transact(self, change: Callable[[float], Tuple[float, Any]]) -> Any:
+        try:
+            return self._transact_shared(change)
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️ Shared publish quota unavailable, pacing {self.key} per process: {e}")
+            return super()._transact(change)
+
+    def _transact_shared(self, change: Callable[[float], Tuple[float, Any]]) -> Any:
+        connection = connect_sqlite(self.db_path)
+        try:
+            if not self._table_ready:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS publish_quota ("
+                    "bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+                )
+                self._table_ready = True
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM publish_quota WHERE bucket = ?", (self.key,)
+            ).fetchone()
+            now = time.time()  # Wall clock, so every process measures the same refill
+            tokens, result = change(self._refill(row[0], row[1], now) if row else float(self.capacity))
+            connection.execute(
+                "INSERT OR REPLACE INTO publish_quota (bucket, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.key, tokens, now)
+            )
+            connection.execute("COMMIT")
+            return result
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+class PublishDispatcher:
+    """
+    Paces publishing calls with one token bucket per (platform, account).
+
+    With a db_path the buckets are shared through SQLite by every process
+    using that file; without one each process paces on its own.
+    """
+
+    def __init__(self, posts_per_minute: Dict[str, float], burst_size: int, db_path: str = None):
+        self.posts_per_minute = posts_per_minute
+        self.burst_size = burst_size
+        self.db_path = db_path
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def account_key(account: str) -> str:
+        """Short, non-reversible key so access tokens can double as account IDs"""
+        return hashlib.sha256((account or "default").encode("utf-8")).hexdigest()[:12]
+
+    def _bucket(self, platform: str, account: str) -> TokenBucket:
+        key = (platform, self.account_key(account))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate = self.posts_per_minute[platform] / 60
+                if self.db_path:
+                    bucket = SQLiteTokenBucket(self.db_path, ":".join(key), rate, self.burst_size)
+                else:
+                    bucket = TokenBucket(rate, self.burst_size)
+                self._buckets[key] = bucket
+            return bucket
+
+    def estimate(self, platform: str, account: str, count: int = 1) -> float:
+        """Seconds count posts for this account would wait if reserved now"""
+        return self._bucket(platform, account).estimate(count)
+
+    def reserve(self, platform: str, account: str, count: int = 1, max_delay: float = None) -> float:
+        """
+        Reserve quota for count posts without waiting and return the delay
+        before they may be published. Raises PublishQuotaExceededError when
+        the delay would exceed max_delay. Async callers sleep on the event
+        loop and then publish with the quota already reserved.
+        """
+        bucket = self._bucket(platform, account)
+        delay = bucket.reserve(count, max_delay)
+        if delay is None:
+            delay = bucket.estimate(count)
+            raise PublishQuotaExceededError(platform, delay, delay - max_delay)
+        return delay
+
+    def acquire(self, platform: str, account: str, count: int = 1, max_delay: float = None) -> float:
+        """
+        Block until count posts may be published for this account; returns the
+        wait. Without max_delay this waits as long as needed, which is only
+        meant for background threads such as scheduled jobs.
+        """
+        delay = self.reserve(platform, account, count, max_delay)
+        if delay > 0:
+            print(f"⏳ {platform} quota: delaying {count} post(s) by {delay:.1f}s")
+            time.sleep(delay)
+        return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            buckets = list(self._buckets.items())
+        return {f"{platform}:{account}": bucket.stats() for (platform, account), bucket in buckets}
+
+publish_dispatcher = PublishDispatcher(
+    {"facebook": FACEBOOK_POSTS_PER_MINUTE, "linkedin": LINKEDIN_POSTS_PER_MINUTE},
+    PUBLISH_BURST_SIZE,
+    PUBLISH_QUOTA_DB_PATH or None,
+)
@@ -0,0 +1,299 @@
+import os
+import time
+import uuid
+import pickle
+import socket
+import sqlite3
+import threading
+from typing import Optional
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+from app.config import (
+    SCHEDULER_JOBSTORE,
+    SCHEDULER_DB_PATH,
+    SCHEDULER_LEASE_TTL,
+    SCHEDULER_HEARTBEAT_INTERVAL,
+    SCHEDULER_MISFIRE_GRACE_TIME,
+)
+
+def connect_sqlite(db_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Autocommit mode; writes that must be atomic open their own transaction
+    connection = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA busy_timeout=10000")
+    return connection
+
+class SQLiteJobStore(BaseJobStore):
+    """
+    APScheduler job store backed by a single SQLite file.
+
+    Jobs are pickled the same way APScheduler's SQLAlchemy store does it, so
+    every uvicorn worker pointed at the same file sees the same schedule and
+    jobs survive restarts. A connection is opened per operation, which keeps
+    the store safe to use from request threads and the scheduler thread alike.
+    """
+
+    def __init__(self, db_path: str, tablename: str = "apscheduler_jobs",
+                 pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.db_path = db_path
+        self.tablename = tablename
+        self.pickle_protocol = pickle_protocol
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        connection = connect_sqlite(self.db_path)
+        try:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.tablename} ("
+                "id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.tablename}_next_run_time "
+                f"ON {self.tablename} (next_run_time)"
+            )
+        finally:
+            connection.close()
+
+    def _execute(self, sql: str, params: tuple = ()):
+        connection = connect_sqlite(self.db_path)
+        try:
+            cursor = connection.execute(sql, params)
+            return cursor.rowcount, cursor.fetchall()
+        finally:
+            connection.close()
+
+    def lookup_job(self, job_id):
+        _, rows = self._execute(f"SELECT job_state FROM {self.tablename} WHERE id = ?", (job_id,))
+        return self._reconstitute_job(rows[0][0]) if rows else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        _, rows = self._execute(
+            f"SELECT next_run_time FROM {self.tablename} "
+            "WHERE next_run_time IS NOT NULL ORDER BY next_run_time LIMIT 1"
+        )
+        return utc_timestamp_to_datetime(rows[0][0]) if rows else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        try:
+            self._execute(
+                f"INSERT INTO {self.tablename} (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                (job.id, datetime_to_utc_timestamp(job.next_run_time), self._serialize(job))
+            )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        rowcount, _ = self._execute(
+            f"UPDATE {self.tablename} SET next_run_time = ?, job_state = ? WHERE id = ?",
+            (datetime_to_utc_timestamp(job.next_run_time), self._serialize(job), job.id)
+        )
+        if rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        rowcount, _ = self._execute(f"DELETE FROM {self.tablename} WHERE id = ?", (job_id,))
+        if rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        self._execute(f"DELETE FROM {self.tablename}")
+
+    def _serialize(self, job) -> bytes:
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: tuple = ()):
+        jobs = []
+        failed_job_ids = []
+        _, rows = self._execute(
+            f"SELECT id, job_state FROM {self.tablename} {where} ORDER BY next_run_time", params
+        )
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except Exception:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append(job_id)
+
+        for job_id in failed_job_ids:
+            self._execute(f"DELETE FROM {self.tablename} WHERE id = ?", (job_id,))
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (db_path={self.db_path})>"
+
+class SchedulerLease:
+    """
+    Time-limited leadership lease stored next to the jobs.
+
+    Whoever holds an unexpired lease is the only process allowed to run
+    jobs. The holder renews it on every heartbeat; if it dies, the lease
+    lapses after ttl seconds and another worker takes over.
+    """
+
+    def __init__(self, db_path: str, ttl: float, name: str = "posting-scheduler"):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.name = name
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._table_ready = False  # Created on first use, not when the lease is built
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = connect_sqlite(self.db_path)
+        if not self._table_ready:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scheduler_leases ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._table_ready = True
+        return connection
+
+    def acquire(self) -> bool:
+        """Take or renew the lease; True if this process holds it afterwards"""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO scheduler_leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE scheduler_leases.owner = excluded.owner OR scheduler_leases.expires_at < ?",
+                (self.name, self.owner, now + self.ttl, now)
+            )
+            owner = connection.execute(
+                "SELECT owner FROM scheduler_leases WHERE name = ?", (self.name,)
+            ).fetchone()[0]
+            connection.execute("COMMIT")
+            return owner == self.owner
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def release(self):
+        connection = self._connect()
+        try:
+            connection.execute(
+                "DELETE FROM scheduler_leases WHERE name = ? AND owner = ?", (self.name, self.owner)
+            )
+        finally:
+            connection.close()
+
+class SchedulerCoordinator:
+    """
+    Starts the shared scheduler paused and only lets the lease holder run jobs.
+
+    Every worker can add, list and remove jobs (they go straight to the
+    shared store), but a heartbeat thread decides which single worker
+    executes them. The leader also wakes its scheduler on each heartbeat so
+    jobs added by other workers are picked up.
+    """
+
+    def __init__(self, scheduler: BackgroundScheduler, lease: Optional[SchedulerLease],
+                 heartbeat_interval: float):
+        self.scheduler = scheduler
+        self.lease = lease
+        self.heartbeat_interval = heartbeat_interval
+        self.is_leader = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.lease is None:
+            # Per-process store: nothing to coordinate with
+            self.scheduler.start()
+            self.is_leader = True
+        else:
+            self.scheduler.start(paused=True)
+            self._heartbeat()
+            self._thread = threading.Thread(target=self._run, name="scheduler-heartbeat", daemon=True)
+            self._thread.start()
+
+        print(f"📅 Scheduler started with {len(self.scheduler.get_jobs())} stored jobs "
+              f"({'leader' if self.is_leader else 'follower'})")
+
+    def stop(self):
+        self._stopped.set()
+        if self.lease is not None and self.is_leader:
+            try:
+                self.lease.release()
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not release scheduler lease: {e}")
+        self.is_leader = False
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def _run(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            self._heartbeat()
+
+    def _heartbeat(self):
+        try:
+            leader = self.lease.acquire()
+        except sqlite3.Error as e:
+            print(f"⚠️ Scheduler lease check failed: {e}")
+            leader = False
+
+        if leader and not self.is_leader:
+            print("👑 This worker is now the posting scheduler leader")
+            self.scheduler.resume()
+        elif not leader and self.is_leader:
+            print("⏸️ Lost posting scheduler leadership, pausing job execution")
+            self.scheduler.pause()
+        elif leader:
+            self.scheduler.wakeup()
+        self.is_leader = leader
+
+    def status(self) -> dict:
+        return {
+            "jobstore": SCHEDULER_JOBSTORE,
+            "leader": self.is_leader,
+            "owner": self.lease.owner if self.lease else None,
+            "running": self.scheduler.running,
+        }
+
+# Job store implementations by SCHEDULER_JOBSTORE name. Stores listed in
+# SHARED_JOBSTORES are visible to every worker and need leader election.
+JOBSTORE_BUILDERS = {
+    "sqlite": lambda: SQLiteJobStore(SCHEDULER_DB_PATH),
+    "memory": MemoryJobStore,
+}
+SHARED_JOBSTORES = {"sqlite"}
+
+def create_scheduler_coordinator(kind: str = SCHEDULER_JOBSTORE) -> SchedulerCoordinator:
+    if kind not in JOBSTORE_BUILDERS:
+        raise ValueError(f"Unknown scheduler job store '{kind}', expected one of {list(JOBSTORE_BUILDERS)}")
+
+    scheduler = BackgroundScheduler(
+        jobstores={"default": JOBSTORE_BUILDERS[kind]()},
+        # Followers' jobs are only noticed on the leader's next heartbeat, so
+        # allow them to start late rather than being dropped as misfires
+        job_defaults={"misfire_grace_time": SCHEDULER_MISFIRE_GRACE_TIME, "coalesce": True},
+    )
+    lease = SchedulerLease(SCHEDULER_DB_PATH, SCHEDULER_LEASE_TTL) if kind in SHARED_JOBSTORES else None
+    return SchedulerCoordinator(scheduler, lease, SCHEDULER_HEARTBEAT_INTERVAL)
@@ -1,15 +1,27 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class PlannerRequest(BaseModel):
     business_name: str
     output_type: str
     periodic_content: bool
     additional_prompt: str
+    use_cache: bool = True
+    inline_media: bool = True
 
 class AnswersRequest(BaseModel):
     business_name: str
     output_type: str
     periodic_content: bool
     additional_prompt: str
+    use_cache: bool = True
     answers: List[str]
+
+class VideoEncodingOptions(BaseModel):
+    codec: Literal["h264", "h265"] = "h264"
+    crf: int = Field(23, ge=0, le=51)  # Lower is higher quality and larger output
+    # ffmpeg preset, trades encode time against output size
+    preset: Literal[
+        "ultrafast", "superfast", "veryfast", "faster", "fast",
+        "medium", "slow", "slower", "veryslow"
+    ] = "veryfast"
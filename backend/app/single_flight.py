@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.config import SINGLE_FLIGHT_ENABLED
+
+class _Flight:
+    """One in-flight async computation and the callers attached to it"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+        self.published: List[Any] = []  # Replayed to callers that attach late
+        self.listeners: List[Callable[[Any], None]] = []
+
+    def publish(self, item: Any):
+        self.published.append(item)
+        for listener in list(self.listeners):
+            try:
+                listener(item)
+            except Exception as e:
+                print(f"⚠️ Single-flight listener failed: {e}")
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one computation.
+
+    The first caller for a key starts the work; callers arriving with the
+    same key while it runs attach to it and get the same result (or error)
+    instead of calling the provider again. Nothing is kept once the work
+    finishes, that is the generation cache's job.
+
+    Async work runs as its own task and is only cancelled when every caller
+    waiting on it has gone away, so a retried request whose first attempt
+    was abandoned still gets the original work. Items the work publishes
+    (e.g. streamed text chunks) go to every caller's listener, with the
+    ones already sent replayed to callers that attach late.
+    """
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.started = 0
+        self.coalesced = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._sync_flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    async def do(self, key: str, work: Callable[[Callable[[Any], None]], Awaitable[Any]],
+                 listener: Optional[Callable[[Any], None]] = None) -> Any:
+        """
+        Await work(publish) once per key among concurrent callers. Results are
+        shared, so dicts are handed out as shallow copies.
+        """
+        if not self.enabled:
+            return await work(listener or (lambda item: None))
+
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            if listener:
+                for item in flight.published:
+                    listener(item)
+        else:
+            flight = _Flight()
+            flight.task = asyncio.create_task(work(flight.publish))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            self._flights[key] = flight
+            self.started += 1
+
+        if listener:
+            flight.listeners.append(listener)
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()  # Nobody is left waiting for it
+            raise
+        finally:
+            flight.waiters -= 1
+            if listener:
+                flight.listeners.remove(listener)
+        return dict(result) if isinstance(result, dict) else result
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def run(self, key: str, func: Callable[[], Any]) -> Any:
+        """Blocking variant of do() for callers on worker threads"""
+        if not self.enabled:
+            return func()
+
+        with self._lock:
+            future = self._sync_flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._sync_flights[key] = Future()
+                self.started += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._sync_flights[key]
+        result = future.result()
+        return dict(result) if isinstance(result, dict) else result
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights) + len(self._sync_flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+content_flights = SingleFlight("content", SINGLE_FLIGHT_ENABLED)
+image_flights = SingleFlight("image", SINGLE_FLIGHT_ENABLED)
+video_flights = SingleFlight("video", SINGLE_FLIGHT_ENABLED)
+
+def get_single_flight_stats() -> dict:
+    return {flights.name: flights.stats() for flights in (content_flights, image_flights, video_flights)}
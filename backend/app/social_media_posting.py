@@ -1,14 +1,29 @@
 import os
+import json
+import time
 import base64
-import tempfile
+import asyncio
+import hashlib
+from functools import partial
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
+from io import BytesIO
+from typing import BinaryIO, Callable, List, Literal, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Request
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import requests
 from dotenv import load_dotenv
 import urllib.parse
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
+from app.media_store import media_store, guess_image_type
+from app.image_renditions import get_publish_rendition_id
+from apscheduler.schedulers.background import BackgroundScheduler
+from app.scheduler_store import SchedulerCoordinator, create_scheduler_coordinator
+from app.http_client import publishing_http, MultipartStream
+from app.identity_cache import linkedin_identity_cache, linkedin_asset_cache
+from app.provider_limits import facebook_publish_limiter, linkedin_publish_limiter
+from app.publish_dispatcher import publish_dispatcher
+from app.jobs import job_manager, job_links
+from app.config import BATCH_POST_MAX_ITEMS, PUBLISH_MAX_QUEUE_DELAY
 
 load_dotenv()
 
@@ -26,31 +41,89 @@ LINKEDIN_ACCESS_TOKEN = os.getenv("LINKEDIN_ACCESS_TOKEN")
 LINKEDIN_ORG_ID = os.getenv("LINKEDIN_ORG_ID")
 
 router = APIRouter()
-scheduler = BackgroundScheduler()
-scheduler.start()
+
+# Jobs live in a persistent store shared by all workers; only the elected
+# leader executes them (see scheduler_store.py). The app builds and starts
+# the coordinator on startup (start_posting_scheduler), so importing this
+# module opens no database and spawns no threads.
+scheduler_coordinator: Optional[SchedulerCoordinator] = None
+scheduler: Optional[BackgroundScheduler] = None
 
 # Models
 class FacebookPostNow(BaseModel):
     content: str
     image_data: str = None
+    image_id: str = None  # Media store ID, preferred over inline base64
 
 class FacebookSchedulePost(BaseModel):
     content: str
     scheduled_time: int
     image_data: str = None
+    image_id: str = None
 
 class LinkedInPost(BaseModel):
     content: str
     image_data: str = None  # <-- Add this line to allow image posting via API
+    image_id: str = None
 
 class LinkedInSchedulePost(BaseModel):
     content: str
     scheduled_time: int
 
-def get_person_id(access_token):
-    """Get LinkedIn person ID from access token"""
+class BatchPostItem(BaseModel):
+    platform: Literal["facebook", "linkedin"]
+    content: str
+    image_data: str = None
+    image_id: str = None
+    access_token: str = None  # LinkedIn only; defaults to LINKEDIN_ACCESS_TOKEN
+
+class BatchPostRequest(BaseModel):
+    posts: List[BatchPostItem] = Field(..., min_length=1, max_length=BATCH_POST_MAX_ITEMS)
+
+def load_image_bytes(image_data: str = None, image_id: str = None) -> bytes:
+    """Resolve an image from a media store ID, or decode legacy base64 data"""
+    if image_id:
+        try:
+            return media_store.read(image_id)
+        except KeyError:
+            raise Exception(f"Image {image_id} not found in media store")
+    if image_data:
+        return base64.b64decode(image_data)
+    return None
+
+def store_image_reference(image_data: str = None, image_id: str = None) -> str:
+    """
+    Media store ID to hand to a scheduled job instead of the image itself.
+
+    Legacy base64 data is decoded and stored once (identical images share an
+    ID), so job arguments stay a few hundred bytes however large the image.
+    """
+    if image_id:
+        if not media_store.exists(image_id):
+            raise Exception(f"Image {image_id} not found in media store")
+        return image_id
+    if image_data:
+        image_bytes = base64.b64decode(image_data)
+        return media_store.put(image_bytes, guess_image_type(image_bytes)).media_id
+    return None
+
+def scheduled_media_ids() -> set:
+    """Media referenced by pending scheduled posts, pinned against TTL cleanup"""
+    if scheduler is None:
+        # Unknown until the job store is open; media cleanup is skipped meanwhile
+        raise RuntimeError("Posting scheduler not started yet")
+    return {job.kwargs["image_id"] for job in scheduler.get_jobs() if job.kwargs.get("image_id")}
+
+media_store.add_pin_source(scheduled_media_ids)
+
+def get_person_id(access_token, expires_in: int = None):
+    """Get LinkedIn person ID from access token, cached for the token's lifetime"""
     if not access_token:
         return None
+
+    person_id = linkedin_identity_cache.get(access_token)
+    if person_id:
+        return person_id
         
     url = "https://api.linkedin.com/v2/userinfo"
     headers = {
@@ -58,12 +131,15 @@ def get_person_id(access_token):
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = publishing_http.get(url, headers=headers)
         
         if response.status_code == 200:
             data = response.json()
             print(f"LinkedIn user data: {data}")
-            return data.get('sub')  # This is the person ID
+            person_id = data.get('sub')  # This is the person ID
+            if person_id:
+                linkedin_identity_cache.set(access_token, person_id, expires_in)
+            return person_id
         else:
             print(f"Error getting person ID: {response.status_code} - {response.text}")
             return None
@@ -72,7 +148,8 @@ def get_person_id(access_token):
         return None
 
 # Facebook Functions
-def post_to_facebook(message: str):
+def post_to_facebook(message: str, quota_reserved: bool = False):
+    """Post text to the Facebook page; quota_reserved when the caller already paced it"""
     try:
         if not FB_ACCESS_TOKEN or not FB_PAGE_ID:
             raise Exception("Missing Facebook configuration")
@@ -82,7 +159,9 @@ def post_to_facebook(message: str):
             "message": message,
             "access_token": FB_ACCESS_TOKEN
         }
-        response = requests.post(url, data=payload)
+        if not quota_reserved:
+            publish_dispatcher.acquire("facebook", FB_PAGE_ID)
+        response = publishing_http.post(url, data=payload)
         
         if response.status_code != 200:
             print(f"[ERROR] Facebook post failed: {response.text}")
@@ -97,31 +176,45 @@ def post_to_facebook(message: str):
         print(f"[ERROR] Facebook posting error: {str(e)}")
         raise
 
-def post_image_to_facebook(message: str, image_base64: str):
+def open_image(image_data: str = None, image_id: str = None) -> Tuple[BinaryIO, str]:
+    """Readable stream and content type for an image: the stored file itself, or decoded base64"""
+    if image_id:
+        ref = media_store.get(image_id)
+        if not ref:
+            raise Exception(f"Image {image_id} not found in media store")
+        return open(media_store.path(image_id), "rb"), ref.content_type
+    if image_data:
+        image_bytes = base64.b64decode(image_data)
+        return BytesIO(image_bytes), guess_image_type(image_bytes)
+    raise Exception("No image provided")
+
+def post_image_to_facebook(message: str, image_base64: str = None, image_id: str = None,
+                           quota_reserved: bool = False):
     """Post image with text to Facebook page"""
     try:
         if not FB_ACCESS_TOKEN or not FB_PAGE_ID:
             raise Exception("Missing Facebook configuration")
         
-        # Convert base64 to temporary file
-        image_data = base64.b64decode(image_base64)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
-            temp_file.write(image_data)
-            temp_file_path = temp_file.name
-        
         url = f"https://graph.facebook.com/v18.0/{FB_PAGE_ID}/photos"
         
-        with open(temp_file_path, 'rb') as image_file:
-            files = {'source': image_file}
-            data = {
-                'message': message,
-                'access_token': FB_ACCESS_TOKEN
-            }
+        # Upload a Facebook-sized JPEG rendition, streamed straight from the media store
+        image_id = store_image_reference(image_base64, image_id)
+        if image_id:
+            image_id = get_publish_rendition_id(image_id, "facebook")
+        image_file, content_type = open_image(image_id=image_id)
+        with image_file:
+            extension = content_type.split("/")[1]
+            body = MultipartStream(
+                fields={
+                    'message': message,
+                    'access_token': FB_ACCESS_TOKEN
+                },
+                files={'source': (f"image.{extension}", image_file, content_type)}
+            )
             
-            response = requests.post(url, files=files, data=data)
-        
-        os.unlink(temp_file_path)
+            if not quota_reserved:
+                publish_dispatcher.acquire("facebook", FB_PAGE_ID)
+            response = publishing_http.post(url, data=body, headers={"Content-Type": body.content_type})
         
         if response.status_code != 200:
             print(f"[ERROR] Facebook image post failed: {response.text}")
@@ -136,8 +229,120 @@ def post_image_to_facebook(message: str, image_base64: str):
         print(f"[ERROR] Facebook image posting error: {str(e)}")
         raise Exception(f"Failed to post image to Facebook: {str(e)}")
 
+FB_BATCH_MAX_REQUESTS = 50  # Graph API limit per batch call
+
+def post_batch_to_facebook(messages: List[str], quota_reserved: bool = False) -> List[dict]:
+    """Publish up to 50 text posts to the page in a single Graph API batch request"""
+    if not FB_ACCESS_TOKEN or not FB_PAGE_ID:
+        raise Exception("Missing Facebook configuration")
+    if len(messages) > FB_BATCH_MAX_REQUESTS:
+        raise ValueError(f"A Facebook batch holds at most {FB_BATCH_MAX_REQUESTS} requests")
+
+    batch = [
+        {
+            "method": "POST",
+            "relative_url": f"{FB_PAGE_ID}/feed",
+            "body": urllib.parse.urlencode({"message": message})
+        }
+        for message in messages
+    ]
+    if not quota_reserved:
+        publish_dispatcher.acquire("facebook", FB_PAGE_ID, count=len(messages))
+    response = publishing_http.post(
+        "https://graph.facebook.com/v18.0/",
+        data={"access_token": FB_ACCESS_TOKEN, "batch": json.dumps(batch)}
+    )
+    if response.status_code != 200:
+        print(f"[ERROR] Facebook batch request failed: {response.text}")
+        raise Exception(f"Facebook batch request failed: {response.text}")
+
+    results = []
+    for item in response.json():
+        if item is None:
+            # Graph returns null for requests it did not get to before timing out
+            results.append({"success": False, "error": "No response from Facebook for this post"})
+            continue
+        body = json.loads(item.get("body") or "{}")
+        if item.get("code") == 200:
+            results.append({"success": True, "post_id": body.get("id", "Unknown")})
+        else:
+            error = body.get("error", {}).get("message", f"HTTP {item.get('code')}")
+            results.append({"success": False, "error": error})
+
+    succeeded = sum(1 for result in results if result["success"])
+    print(f"[SUCCESS] Facebook batch published {succeeded}/{len(messages)} posts")
+    return results
+
 # LinkedIn Functions
-def post_to_linkedin(message: str, access_token: str = None, image_data: str = None):
+def upload_linkedin_image(token: str, owner_urn: str, image_bytes: bytes) -> str:
+    """Register an upload with LinkedIn, PUT the image bytes and return the asset URN"""
+    register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
+    register_payload = {
+        "registerUploadRequest": {
+            "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+            "owner": owner_urn,
+            "serviceRelationships": [
+                {
+                    "relationshipType": "OWNER",
+                    "identifier": "urn:li:userGeneratedContent"
+                }
+            ]
+        }
+    }
+    reg_headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+    reg_resp = publishing_http.post(register_url, json=register_payload, headers=reg_headers)
+    reg_resp.raise_for_status()
+    reg_data = reg_resp.json()
+    asset_urn = reg_data["value"]["asset"]
+    upload_url = reg_data["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
+    print(f"🖼️ LinkedIn asset URN: {asset_urn}")
+    print(f"🖼️ LinkedIn upload URL: {upload_url}")
+
+    upload_headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/octet-stream"
+    }
+    upload_resp = publishing_http.put(upload_url, data=image_bytes, headers=upload_headers)
+    upload_resp.raise_for_status()
+    print("✅ Image uploaded to LinkedIn successfully")
+    return asset_urn
+
+def get_linkedin_asset(token: str, owner_urn: str, image_data: str = None, image_id: str = None,
+                       refresh: bool = False) -> Tuple[str, bool]:
+    """
+    Asset URN for an image and whether it was reused, uploading the image
+    only if this owner has not already.
+
+    Assets are cached by (owner, content hash): media store IDs already are
+    content hashes, legacy base64 is hashed the same way after decoding. Recurring posts
+    of the same image therefore skip the register and upload calls.
+    """
+    image_bytes = None
+    content_hash = image_id
+    if not content_hash:
+        image_bytes = load_image_bytes(image_data)
+        content_hash = hashlib.sha256(image_bytes).hexdigest()[:32]  # Same derivation as media IDs
+    cache_key = f"{owner_urn}:{content_hash}"
+
+    if refresh:
+        linkedin_asset_cache.invalidate(cache_key)
+    else:
+        asset_urn = linkedin_asset_cache.get(cache_key)
+        if asset_urn:
+            print(f"♻️ Reusing LinkedIn asset {asset_urn}")
+            return asset_urn, True
+
+    if image_bytes is None:
+        image_bytes = load_image_bytes(image_id=image_id)
+    asset_urn = upload_linkedin_image(token, owner_urn, image_bytes)
+    linkedin_asset_cache.set(cache_key, asset_urn)
+    return asset_urn, False
+
+def post_to_linkedin(message: str, access_token: str = None, image_data: str = None, image_id: str = None,
+                     quota_reserved: bool = False):
     """Post to LinkedIn using access token - supports optional image"""
     token = access_token or LINKEDIN_ACCESS_TOKEN
 
@@ -160,94 +365,71 @@ def post_to_linkedin(message: str, access_token: str = None, image_data: str = N
         "Content-Type": "application/json",
         "X-Restli-Protocol-Version": "2.0.0"
     }
+    owner_urn = f"urn:li:person:{person_id}"
 
-    # --- IMPLEMENT LINKEDIN IMAGE UPLOAD ---
-    asset_urn = None
-    if image_data:
+    def resolve_asset(refresh: bool = False):
+        if not (image_data or image_id):
+            return None, False
         try:
-            # 1. Register upload
-            register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
-            register_payload = {
-                "registerUploadRequest": {
-                    "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                    "owner": f"urn:li:person:{person_id}",
-                    "serviceRelationships": [
-                        {
-                            "relationshipType": "OWNER",
-                            "identifier": "urn:li:userGeneratedContent"
-                        }
-                    ]
-                }
-            }
-            reg_headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            reg_resp = requests.post(register_url, json=register_payload, headers=reg_headers)
-            reg_resp.raise_for_status()
-            reg_data = reg_resp.json()
-            asset_urn = reg_data["value"]["asset"]
-            upload_url = reg_data["value"]["uploadMechanism"]["com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest"]["uploadUrl"]
-            print(f"🖼️ LinkedIn asset URN: {asset_urn}")
-            print(f"🖼️ LinkedIn upload URL: {upload_url}")
-
-            # 2. Upload image (binary)
-            image_bytes = base64.b64decode(image_data)
-            upload_headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/octet-stream"
-            }
-            upload_resp = requests.put(upload_url, data=image_bytes, headers=upload_headers)
-            upload_resp.raise_for_status()
-            print("✅ Image uploaded to LinkedIn successfully")
-
+            # Upload a LinkedIn-sized JPEG rendition rather than the full-size PNG
+            rendition_id = get_publish_rendition_id(store_image_reference(image_data, image_id), "linkedin")
+            return get_linkedin_asset(token, owner_urn, image_id=rendition_id, refresh=refresh)
         except Exception as e:
             print(f"❌ LinkedIn image upload failed: {e}")
-            asset_urn = None
-
-    # 3. Compose payload
-    if asset_urn:
-        share_media_category = "IMAGE"
-        media = [{
-            "status": "READY",
-            "media": asset_urn
-        }]
-    else:
-        share_media_category = "NONE"
-        media = []
-
-    # PATCH: If message is a generic image label, but image and text are both present, use the actual text content.
-    # This function is called with message = content_data['content'] from main.py.
-    # If the message looks like "Generated image for ..." and image_data is present, try to use content_data['text_content'] if available.
-    # But since only 'content' is passed, the fix must be in main.py to always pass the real text.
-
-    payload = {
-        "author": f"urn:li:person:{person_id}",
-        "lifecycleState": "PUBLISHED",
-        "specificContent": {
-            "com.linkedin.ugc.ShareContent": {
-                "shareCommentary": {
-                    "text": message
-                },
-                "shareMediaCategory": share_media_category
+            return None, False
+
+    def build_payload(asset_urn):
+        payload = {
+            "author": owner_urn,
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {
+                        "text": message
+                    },
+                    "shareMediaCategory": "IMAGE" if asset_urn else "NONE"
+                }
+            },
+            "visibility": {
+                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
-        },
-        "visibility": {
-            "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
         }
-    }
-    if asset_urn:
-        payload["specificContent"]["com.linkedin.ugc.ShareContent"]["media"] = media
-
-    # Add debug print to show exactly what is posted
-    print("🔎 LinkedIn POST PAYLOAD:")
-    print(payload)
+        if asset_urn:
+            payload["specificContent"]["com.linkedin.ugc.ShareContent"]["media"] = [{
+                "status": "READY",
+                "media": asset_urn
+            }]
+        return payload
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        asset_urn, reused = resolve_asset()
+        payload = build_payload(asset_urn)
+
+        # Add debug print to show exactly what is posted
+        print("🔎 LinkedIn POST PAYLOAD:")
+        print(payload)
+
+        if not quota_reserved:
+            publish_dispatcher.acquire("linkedin", token)
+        response = publishing_http.post(url, json=payload, headers=headers)
+
+        if reused and response.status_code in (400, 404, 422):
+            # A reused asset may have been expired or deleted on LinkedIn's side:
+            # upload the image again and retry once
+            print(f"⚠️ LinkedIn rejected asset {asset_urn}, re-uploading image")
+            asset_urn, _ = resolve_asset(refresh=True)
+            if not quota_reserved:
+                # A reserving caller's quota covers the retry; scheduled jobs wait a bounded time
+                publish_dispatcher.acquire("linkedin", token, max_delay=PUBLISH_MAX_QUEUE_DELAY)
+            response = publishing_http.post(url, json=build_payload(asset_urn), headers=headers)
+
         print(f"📥 LinkedIn Response Status: {response.status_code}")
         print(f"📥 LinkedIn Response: {response.text}")
 
+        if response.status_code == 401:
+            # Token revoked or expired: don't keep serving its cached identity
+            linkedin_identity_cache.invalidate(token)
+
         if response.status_code != 201:
             error_data = response.json() if response.content else {}
             error_message = error_data.get('message', 'Unknown error')
@@ -266,18 +448,54 @@ def post_to_linkedin(message: str, access_token: str = None, image_data: str = N
         print(f"[ERROR] LinkedIn posting error: {str(e)}")
         raise
 
+def scrub_stored_linkedin_tokens():
+    """
+    Drop access tokens that older LinkedIn jobs carried in their args, so
+    they no longer sit in the job store and the jobs pick up the current
+    token when they run. Call once the scheduler has started.
+    """
+    scrubbed = 0
+    for job in scheduler.get_jobs():
+        if job.func is post_to_linkedin and len(job.args) > 1:
+            job.modify(args=job.args[:1])
+            scrubbed += 1
+    if scrubbed:
+        print(f"🧹 Removed stored LinkedIn tokens from {scrubbed} scheduled jobs")
+
+def start_posting_scheduler():
+    """Build and start the posting scheduler; called from the app's startup hook"""
+    global scheduler_coordinator, scheduler
+    if scheduler_coordinator is not None:
+        return
+    scheduler_coordinator = create_scheduler_coordinator()
+    scheduler = scheduler_coordinator.scheduler
+    scheduler_coordinator.start()
+    scrub_stored_linkedin_tokens()
+
+def stop_posting_scheduler():
+    """Stop the scheduler and hand its lease over; called from the app's shutdown hook"""
+    global scheduler_coordinator, scheduler
+    if scheduler_coordinator is not None:
+        scheduler_coordinator.stop()
+    scheduler_coordinator = scheduler = None
+
 # Facebook Routes
 @router.post("/post-now")
-def post_to_facebook_now(data: FacebookPostNow):
-    """Post content to Facebook immediately"""
+async def post_to_facebook_now(data: FacebookPostNow):
+    """Post content to Facebook immediately, or as a queued job while the page's quota is busy"""
     try:
-        if data.image_data:
-            result = post_image_to_facebook(data.content, data.image_data)
+        if data.image_data or data.image_id:
+            post = partial(post_image_to_facebook, data.content, data.image_data, data.image_id)
         else:
-            result = post_to_facebook(data.content)
+            post = partial(post_to_facebook, data.content)
+        result = await _publish_now("facebook", FB_PAGE_ID, post)
+        if isinstance(result, JSONResponse):
+            return result
         
         return {"success": True, "message": "Posted to Facebook successfully", **result}
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error posting to Facebook: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error posting to Facebook: {str(e)}")
@@ -288,12 +506,14 @@ def schedule_facebook_post(data: FacebookSchedulePost):
     try:
         scheduled_datetime = datetime.fromtimestamp(data.scheduled_time)
         
-        if data.image_data:
+        image_id = store_image_reference(data.image_data, data.image_id)
+        if image_id:
             scheduler.add_job(
                 post_image_to_facebook,
                 "date",
                 run_date=scheduled_datetime,
-                args=[data.content, data.image_data],
+                args=[data.content],
+                kwargs={"image_id": image_id},
                 id=f"fb_image_post_{data.scheduled_time}",
                 replace_existing=True
             )
@@ -317,6 +537,131 @@ def schedule_facebook_post(data: FacebookSchedulePost):
         print(f"❌ Error scheduling Facebook post: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error scheduling post: {str(e)}")
 
+async def _publish_now(platform: str, account: str, post: Callable[..., dict]):
+    """
+    Run post(quota_reserved=True) for an immediate-post endpoint. Quota is
+    reserved without waiting: with none to spare the post becomes a job that
+    waits out its turn on the event loop, and a 202 with the job links and
+    the expected delay is returned instead of the post result.
+    """
+    delay = publish_dispatcher.reserve(platform, account)
+    if delay <= 0:
+        return await asyncio.to_thread(partial(post, quota_reserved=True))
+
+    ready_at = time.monotonic() + delay  # Time spent queued behind other jobs counts
+
+    async def publish_when_ready(job):
+        job.update(stage="waiting for quota")
+        await asyncio.sleep(max(0.0, ready_at - time.monotonic()))
+        job.update(stage="publishing")
+        return await asyncio.to_thread(partial(post, quota_reserved=True))
+
+    job = job_manager.submit(f"{platform}-post", publish_when_ready)
+    print(f"📮 {platform} post queued as job {job.id}, expected quota delay {delay:.0f}s")
+    return JSONResponse(status_code=202, content={**job_links(job), "expected_delay": round(delay, 1)})
+
+def _post_account(post: BatchPostItem) -> Tuple[str, str]:
+    """Quota bucket a batch post is paced by: (platform, account)"""
+    if post.platform == "linkedin":
+        return "linkedin", post.access_token or LINKEDIN_ACCESS_TOKEN
+    return "facebook", FB_PAGE_ID
+
+def _expected_batch_delay(posts: List[BatchPostItem]) -> float:
+    """Longest quota wait any account in the batch would see if it were published now"""
+    counts = {}
+    for post in posts:
+        account = _post_account(post)
+        counts[account] = counts.get(account, 0) + 1
+    return max(publish_dispatcher.estimate(platform, account, count) for (platform, account), count in counts.items())
+
+async def _publish_batch(posts: List[BatchPostItem], job=None) -> dict:
+    """
+    Publish a /batch-post batch. Quota is reserved per post (per Graph
+    batch for Facebook text) and waited out on the event loop, so no thread
+    sleeps; the publishing calls then run with the quota already reserved.
+    """
+    results = [None] * len(posts)
+
+    def done(index: int, result: dict):
+        results[index] = result
+        if job:
+            job.update(progress=sum(1 for result in results if result) / len(posts), stage="publishing")
+
+    async def publish(index: int, limiter, func, *args):
+        await asyncio.sleep(publish_dispatcher.reserve(*_post_account(posts[index])))
+        async with limiter.slot():
+            try:
+                result = await asyncio.to_thread(partial(func, *args, quota_reserved=True))
+                done(index, {"index": index, "platform": posts[index].platform, "success": True, **result})
+            except Exception as e:
+                done(index, {"index": index, "platform": posts[index].platform, "success": False, "error": str(e)})
+
+    async def publish_facebook_batch(indexes: List[int]):
+        await asyncio.sleep(publish_dispatcher.reserve("facebook", FB_PAGE_ID, count=len(indexes)))
+        async with facebook_publish_limiter.slot():
+            try:
+                batch_results = await asyncio.to_thread(
+                    post_batch_to_facebook, [posts[i].content for i in indexes], quota_reserved=True
+                )
+            except Exception as e:
+                batch_results = [{"success": False, "error": str(e)}] * len(indexes)
+        for index, result in zip(indexes, batch_results):
+            done(index, {"index": index, "platform": "facebook", **result})
+
+    tasks = []
+    facebook_text = [
+        i for i, post in enumerate(posts)
+        if post.platform == "facebook" and not (post.image_data or post.image_id)
+    ]
+    for start in range(0, len(facebook_text), FB_BATCH_MAX_REQUESTS):
+        tasks.append(publish_facebook_batch(facebook_text[start:start + FB_BATCH_MAX_REQUESTS]))
+
+    for i, post in enumerate(posts):
+        if post.platform == "linkedin":
+            tasks.append(publish(
+                i, linkedin_publish_limiter, post_to_linkedin,
+                post.content, post.access_token, post.image_data, post.image_id
+            ))
+        elif post.image_data or post.image_id:
+            tasks.append(publish(
+                i, facebook_publish_limiter, post_image_to_facebook,
+                post.content, post.image_data, post.image_id
+            ))
+
+    await asyncio.gather(*tasks)
+
+    succeeded = sum(1 for result in results if result["success"])
+    print(f"📦 Batch publish: {succeeded}/{len(posts)} posts succeeded")
+    return {
+        "success": succeeded == len(posts),
+        "total": len(posts),
+        "succeeded": succeeded,
+        "failed": len(posts) - succeeded,
+        "results": results
+    }
+
+@router.post("/batch-post")
+async def batch_post(data: BatchPostRequest):
+    """
+    Publish many posts across Facebook and LinkedIn concurrently.
+
+    Facebook text posts are grouped into Graph API batch requests; image
+    posts and LinkedIn posts are fanned out individually. Each platform is
+    capped by its own concurrency limit, and every post gets its own result
+    (in request order) instead of one failure aborting the whole batch.
+
+    Posts are paced by the per-account posting quotas. If that means waiting
+    longer than PUBLISH_MAX_QUEUE_DELAY, the batch runs as a background job
+    and a 202 with the job links and the expected delay comes back instead.
+    """
+    expected_delay = _expected_batch_delay(data.posts)
+    if expected_delay > PUBLISH_MAX_QUEUE_DELAY:
+        job = job_manager.submit("batch-post", partial(_publish_batch, data.posts))
+        print(f"📦 Batch publish queued as job {job.id}, expected quota delay {expected_delay:.0f}s")
+        return JSONResponse(status_code=202, content={**job_links(job), "expected_delay": round(expected_delay, 1)})
+
+    return {**await _publish_batch(data.posts), "expected_delay": round(expected_delay, 1)}
+
 # LinkedIn Routes
 @router.get("/linkedin/auth")
 def linkedin_auth():
@@ -332,12 +677,19 @@ def linkedin_auth():
     return RedirectResponse(url)
 
 @router.post("/linkedin/post-now")
-def post_to_linkedin_now(data: LinkedInPost):
+async def post_to_linkedin_now(data: LinkedInPost):
     try:
         # Print received data for debugging
         print("🔎 /linkedin/post-now received:", data)
-        result = post_to_linkedin(data.content, image_data=data.image_data)
+        result = await _publish_now(
+            "linkedin", LINKEDIN_ACCESS_TOKEN,
+            partial(post_to_linkedin, data.content, image_data=data.image_data, image_id=data.image_id)
+        )
+        if isinstance(result, JSONResponse):
+            return result
         return {"success": True, "message": "Posted to LinkedIn successfully", **result}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error posting to LinkedIn: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error posting to LinkedIn: {str(e)}")
@@ -365,7 +717,7 @@ def schedule_linkedin_post(data: LinkedInSchedulePost):
             post_to_linkedin,
             "date",
             run_date=scheduled_datetime,
-            args=[data.content, LINKEDIN_ACCESS_TOKEN],
+            args=[data.content],  # Token resolved when the job runs, never persisted
             id=f"linkedin_post_{data.scheduled_time}",
             replace_existing=True
         )
@@ -411,7 +763,7 @@ async def linkedin_callback(request: Request):
         "client_secret": LINKEDIN_CLIENT_SECRET,
     }
 
-    resp = requests.post(token_url, data=data)
+    resp = publishing_http.post(token_url, data=data)
 
     if resp.status_code != 200:
         return {
@@ -426,6 +778,9 @@ async def linkedin_callback(request: Request):
     if not access_token:
         return {"error": "No access token returned"}
 
+    # Warm the identity cache so the first post with this token skips /v2/userinfo
+    get_person_id(access_token, token_data.get("expires_in"))
+
     # 🟢 Return token info directly without posting yet
     return {
         "access_token": access_token,
@@ -453,6 +808,21 @@ def get_scheduled_posts():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting scheduled posts: {str(e)}")
 
+@router.get("/scheduler/status")
+def get_scheduler_status():
+    """Which job store is in use and whether this worker runs the scheduled jobs"""
+    return {**scheduler_coordinator.status(), "scheduled_jobs": len(scheduler.get_jobs())}
+
+@router.get("/publish/quota")
+def get_publish_quota():
+    """Remaining burst and queued backlog per platform/account token bucket"""
+    return publish_dispatcher.stats()
+
+@router.get("/http/stats")
+def get_publishing_http_stats():
+    """Circuit breaker state per publishing API host"""
+    return publishing_http.stats()
+
 @router.delete("/cancel-post/{job_id}")
 def cancel_scheduled_post(job_id: str):
     """Cancel a scheduled post"""
@@ -524,7 +894,7 @@ def schedule_test_linkedin_post():
             post_to_linkedin,
             "date",
             run_date=scheduled_time,
-            args=[test_content, LINKEDIN_ACCESS_TOKEN],
+            args=[test_content],
             id=f"linkedin_test_{unix_time}",
             replace_existing=True
         )
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import subprocess
+import threading
+from io import BytesIO
+from typing import BinaryIO, Iterable, Optional
+import numpy as np
+import imageio_ffmpeg
+
+# Encoder and codec-specific flags per supported codec
+VIDEO_CODECS = {
+    "h264": {"encoder": "libx264", "args": []},
+    "h265": {"encoder": "libx265", "args": ["-tag:v", "hvc1"]},
+}
+# Streamed output goes through a pipe, so the MP4 is fragmented (empty moov
+# atom). Stored and uploaded videos are written to a temporary file instead,
+# with the moov atom moved to the front: players and platform ingest handle
+# those far better than fragmented files.
+STREAMING_MOVFLAGS = "frag_keyframe+empty_moov"
+FASTSTART_MOVFLAGS = "+faststart"
+VIDEO_PRESETS = [
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow",
+]
+
+def _copy_stream(source: BinaryIO, target: BinaryIO):
+    for chunk in iter(lambda: source.read(64 * 1024), b""):
+        target.write(chunk)
+
+def encode_frames(frames: Iterable[np.ndarray], width: int, height: int, fps: int,
+                  codec: str = "h264", crf: int = 23, preset: str = "veryfast",
+                  output: Optional[BinaryIO] = None, streaming: bool = False) -> Optional[bytes]:
+    """
+    Pipe raw RGB frames straight into ffmpeg and collect the encoded video.
+
+    Frames are written to ffmpeg's stdin as they are produced. With
+    streaming, the fragmented MP4 is drained from ffmpeg's stdout as it is
+    encoded; otherwise ffmpeg writes a faststart MP4 to a temporary file
+    (outside the working directory), which is read back once finished. If
+    output is given the video is written to it and None is returned,
+    otherwise the encoded bytes are returned.
+    """
+    if codec not in VIDEO_CODECS:
+        raise ValueError(f"Unsupported codec '{codec}', expected one of {list(VIDEO_CODECS)}")
+    if preset not in VIDEO_PRESETS:
+        raise ValueError(f"Unsupported preset '{preset}', expected one of {VIDEO_PRESETS}")
+
+    spec = VIDEO_CODECS[codec]
+    target = output if output is not None else BytesIO()
+    if streaming:
+        _run_ffmpeg(frames, width, height, fps, spec, crf, preset, STREAMING_MOVFLAGS, "pipe:1", target)
+    else:
+        handle, path = tempfile.mkstemp(suffix=".mp4")
+        os.close(handle)
+        try:
+            _run_ffmpeg(frames, width, height, fps, spec, crf, preset, FASTSTART_MOVFLAGS, path)
+            with open(path, "rb") as encoded:
+                _copy_stream(encoded, target)
+        finally:
+            os.remove(path)
+
+    if output is None:
+        return target.getvalue()
+    return None
+
+def _run_ffmpeg(frames: Iterable[np.ndarray], width: int, height: int, fps: int, spec: dict,
+                crf: int, preset: str, movflags: str, destination: str, stdout: Optional[BinaryIO] = None):
+    """Encode frames fed through stdin to destination (a path, or pipe:1 drained into stdout)"""
+    command = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "pipe:0",
+        "-c:v", spec["encoder"], "-crf", str(crf), "-preset", preset, "-pix_fmt", "yuv420p",
+        *spec["args"], "-f", "mp4", "-movflags", movflags,
+        destination,
+    ]
+
+    errors = BytesIO()
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE if stdout is not None else subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    readers = [threading.Thread(target=_copy_stream, args=(process.stderr, errors), daemon=True)]
+    if stdout is not None:
+        readers.append(threading.Thread(target=_copy_stream, args=(process.stdout, stdout), daemon=True))
+    for reader in readers:
+        reader.start()
+
+    try:
+        for frame in frames:
+            process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+    except BrokenPipeError:
+        pass  # ffmpeg exited early; the error is reported below
+    finally:
+        process.stdin.close()
+        process.wait()
+        for reader in readers:
+            reader.join()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {errors.getvalue().decode(errors='replace').strip()}")
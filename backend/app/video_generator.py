@@ -1,54 +1,74 @@
-import os
+import asyncio
 import base64
-import requests
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-import moviepy.editor as mp
-import numpy as np
-from app.config import HUGGINGFACE_TOKEN
+from app.providers import get_hf_token, get_hf_http_client, get_hf_session
+from app.config import HF_REQUEST_TIMEOUT
+from app.provider_limits import hf_video_limiter
+from app.video_renderer import render_placeholder_video
+from app.media_pool import media_pool, MediaPoolBusyError
+from app.schemas import VideoEncodingOptions
+from app.media_store import media_store
+from app.generation_cache import GenerationCache
+from app.single_flight import video_flights
+from app.platform_specs import get_platform_spec
 
 class VideoGenerator:
-    def __init__(self):
-        self.hf_token = HUGGINGFACE_TOKEN or os.getenv("HF_TOKEN", "")
+    def __init__(self, session=None, async_http=None):
+        """HTTP clients default to the shared, pooled ones from app.providers"""
+        self.hf_token = get_hf_token()
         self.api_url = "https://api-inference.huggingface.co/models/damo-vilab/text-to-video-ms-1.7b"
+        self.session = session if session is not None else get_hf_session()
+        self.async_http = async_http if async_http is not None else get_hf_http_client()
         
         if self.hf_token:
             print("✅ Video Generator initialized with HuggingFace token")
         else:
             print("⚠️ No HuggingFace token found - will use placeholder videos")
 
-    def generate_video(self, prompt: str, duration: int = 5) -> dict:
+    def generate_video(self, prompt: str, duration: int = 5, encoding: VideoEncodingOptions = None,
+                       inline: bool = True) -> dict:
         """
         Generate video using HuggingFace Text-to-Video model
-        Returns dict with video data and metadata
+        Returns dict with the stored media reference and metadata; the base64
+        payload is only included when inline is True. Encoding options apply
+        to the locally rendered placeholder only. Identical requests made
+        while one is running share its result.
         """
+        key = self._flight_key(prompt, duration, encoding, inline)
+        return video_flights.run(key, lambda: self._generate_video(prompt, duration, encoding, inline))
+
+    async def agenerate_video(self, prompt: str, duration: int = 5, encoding: VideoEncodingOptions = None,
+                              inline: bool = True) -> dict:
+        """
+        Async variant of generate_video. The HuggingFace request is awaited on
+        the event loop and bounded by the video concurrency limit; the
+        placeholder is rendered on a media worker process and stored from a
+        worker thread. Identical requests attach to the one in flight.
+        """
+        key = self._flight_key(prompt, duration, encoding, inline)
+        return await video_flights.do(
+            key, lambda publish: self._agenerate_video(prompt, duration, encoding, inline)
+        )
+
+    def _flight_key(self, prompt: str, duration: int, encoding: VideoEncodingOptions, inline: bool) -> str:
+        return GenerationCache.make_key(prompt, "video", {
+            "duration": duration, "inline": inline, "encoding": encoding.model_dump() if encoding else None
+        })
+
+    def _generate_video(self, prompt: str, duration: int, encoding: VideoEncodingOptions, inline: bool) -> dict:
         if self.hf_token:
             try:
                 print(f"🎬 Generating AI video with prompt: {prompt[:100]}...")
                 
                 headers = {"Authorization": f"Bearer {self.hf_token}"}
-                payload = {
-                    "inputs": prompt,
-                    "parameters": {
-                        "num_frames": duration * 24,  # 24 FPS
-                        "height": 512,
-                        "width": 512
-                    }
-                }
+                payload = self._build_video_payload(prompt, duration)
                 
-                response = requests.post(self.api_url, headers=headers, json=payload)
+                with hf_video_limiter.sync_slot():
+                    response = self.session.post(self.api_url, headers=headers, json=payload, timeout=HF_REQUEST_TIMEOUT)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        response.raise_for_status()  # Let the limiter see quota and server errors
                 
                 if response.status_code == 200:
-                    video_bytes = response.content
-                    video_base64 = base64.b64encode(video_bytes).decode("utf-8")
-                    
-                    return {
-                        "success": True,
-                        "video_base64": video_base64,
-                        "source": "huggingface",
-                        "format": "mp4",
-                        "duration": duration
-                    }
+                    return self._finalize(response.content, "huggingface", duration, inline)
                 else:
                     print(f"❌ HuggingFace API error: {response.status_code}")
                     
@@ -57,14 +77,63 @@ class VideoGenerator:
         
         # Fallback to placeholder video
         print("🎬 Generating placeholder video...")
-        placeholder = self._generate_placeholder_video(prompt, duration)
-        return {
-            "success": False,
-            "video_base64": placeholder,
-            "source": "placeholder",
+        placeholder = self._generate_placeholder_video(prompt, duration, encoding)
+        return self._finalize(placeholder, "placeholder", duration, inline)
+
+    async def _agenerate_video(self, prompt: str, duration: int, encoding: VideoEncodingOptions,
+                               inline: bool) -> dict:
+        if self.hf_token:
+            try:
+                print(f"🎬 Generating AI video with prompt: {prompt[:100]}...")
+                
+                headers = {"Authorization": f"Bearer {self.hf_token}"}
+                payload = self._build_video_payload(prompt, duration)
+                
+                async with hf_video_limiter.slot():
+                    response = await self.async_http.post(self.api_url, headers=headers, json=payload)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        response.raise_for_status()  # Let the limiter see quota and server errors
+                
+                if response.status_code == 200:
+                    return await asyncio.to_thread(self._finalize, response.content, "huggingface", duration, inline)
+                else:
+                    print(f"❌ HuggingFace API error: {response.status_code}")
+                    
+            except Exception as e:
+                print(f"❌ HuggingFace video generation failed: {str(e)}")
+        
+        print("🎬 Generating placeholder video...")
+        placeholder = await self._agenerate_placeholder_video(prompt, duration, encoding)
+        return await asyncio.to_thread(self._finalize, placeholder, "placeholder", duration, inline)
+
+    def _finalize(self, video_bytes: bytes, source: str, duration: int, inline: bool) -> dict:
+        """Store generated MP4 bytes and build the result dict"""
+        result = {
+            "success": source != "placeholder",
+            "video_base64": None,
+            "source": source,
             "format": "mp4",
             "duration": duration
         }
+        if video_bytes is None:
+            return result
+
+        ref = media_store.put(video_bytes, "video/mp4")
+        result["media_id"] = ref.media_id
+        result["video_url"] = ref.url
+        if inline:
+            result["video_base64"] = base64.b64encode(video_bytes).decode("utf-8")
+        return result
+
+    def _build_video_payload(self, prompt: str, duration: int) -> dict:
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "num_frames": duration * 24,  # 24 FPS
+                "height": 512,
+                "width": 512
+            }
+        }
 
     def create_video_prompt(self, business_type: str, content_description: str, video_style: str = "professional") -> str:
         """Create an optimized prompt for video generation"""
@@ -79,124 +148,31 @@ class VideoGenerator:
         
         return f"A {style_text} video about {business_type}: {content_description}, high quality, smooth transitions, 4k resolution"
 
-    def _generate_placeholder_video(self, prompt: str, duration: int = 5) -> str:
-        """Generate a placeholder video with animated text"""
+    def _placeholder_video_args(self, prompt: str, duration: int, encoding: VideoEncodingOptions) -> tuple:
+        encoding = encoding or VideoEncodingOptions()
+        prompt_lines = self._wrap_text(prompt, 60).split('\n')[:5]
+        return prompt_lines, duration, encoding.codec, encoding.crf, encoding.preset
+
+    def _generate_placeholder_video(self, prompt: str, duration: int = 5, encoding: VideoEncodingOptions = None) -> bytes:
+        """Generate a placeholder video with animated text on a media worker process"""
         try:
-            # Create frames for the video
-            fps = 24
-            total_frames = duration * fps
-            width, height = 800, 600
-            
-            frames = []
-            
-            for frame_num in range(total_frames):
-                # Create frame
-                img = Image.new('RGB', (width, height), color='#f0f8ff')
-                draw = ImageDraw.Draw(img)
-                
-                # Try to load font
-                try:
-                    title_font = ImageFont.truetype("arial.ttf", 36)
-                    content_font = ImageFont.truetype("arial.ttf", 20)
-                    small_font = ImageFont.truetype("arial.ttf", 16)
-                except:
-                    title_font = ImageFont.load_default()
-                    content_font = ImageFont.load_default()
-                    small_font = ImageFont.load_default()
-                
-                # Animated background gradient
-                progress = frame_num / total_frames
-                bg_color = self._interpolate_color('#667eea', '#764ba2', progress)
-                
-                # Create gradient background
-                for y in range(height):
-                    gradient_progress = y / height
-                    color = self._interpolate_color(bg_color, '#f0f8ff', gradient_progress)
-                    draw.line([(0, y), (width, y)], fill=color)
-                
-                # Add animated title
-                title = "🎬 EcoLens AI Video Generator"
-                title_y = 100 + int(20 * np.sin(frame_num * 0.1))  # Floating animation
-                self._draw_text_with_shadow(draw, title, (width//2, title_y), title_font, center=True)
-                
-                # Add content with fade-in effect
-                if frame_num > fps:  # Start after 1 second
-                    alpha = min(1.0, (frame_num - fps) / fps)  # Fade in over 1 second
-                    content_alpha = int(255 * alpha)
-                    
-                    # Wrap and display prompt
-                    wrapped_prompt = self._wrap_text(prompt, 60)
-                    lines = wrapped_prompt.split('\n')[:5]  # Max 5 lines
-                    
-                    y_offset = 250
-                    for line in lines:
-                        self._draw_text_with_shadow(draw, line, (width//2, y_offset), content_font, center=True, alpha=content_alpha)
-                        y_offset += 30
-                
-                # Add progress bar
-                bar_width = 400
-                bar_height = 8
-                bar_x = (width - bar_width) // 2
-                bar_y = height - 80
-                
-                # Background bar
-                draw.rectangle([bar_x, bar_y, bar_x + bar_width, bar_y + bar_height], fill='#e0e0e0')
-                # Progress bar
-                progress_width = int(bar_width * progress)
-                draw.rectangle([bar_x, bar_y, bar_x + progress_width, bar_y + bar_height], fill='#667eea')
-                
-                # Add timestamp
-                timestamp = f"{frame_num / fps:.1f}s / {duration}.0s"
-                self._draw_text_with_shadow(draw, timestamp, (width//2, height - 50), small_font, center=True)
-                
-                # Convert PIL image to numpy array
-                frame_array = np.array(img)
-                frames.append(frame_array)
-            
-            # Create video clip using moviepy
-            clip = mp.ImageSequenceClip(frames, fps=fps)
-            
-            # Save to bytes
-            temp_path = f"temp_video_{os.getpid()}.mp4"
-            clip.write_videofile(temp_path, verbose=False, logger=None)
-            
-            # Read and encode
-            with open(temp_path, 'rb') as f:
-                video_bytes = f.read()
-            
-            # Clean up
-            os.remove(temp_path)
-            
-            video_base64 = base64.b64encode(video_bytes).decode("utf-8")
-            return video_base64
-            
+            return media_pool.run(render_placeholder_video, *self._placeholder_video_args(prompt, duration, encoding))
+        except MediaPoolBusyError:
+            raise
         except Exception as e:
             print(f"❌ Placeholder video generation failed: {str(e)}")
             return None
 
-    def _interpolate_color(self, color1: str, color2: str, t: float) -> tuple:
-        """Interpolate between two hex colors"""
-        c1 = tuple(int(color1[i:i+2], 16) for i in (1, 3, 5))
-        c2 = tuple(int(color2[i:i+2], 16) for i in (1, 3, 5))
-        
-        return tuple(int(c1[i] + (c2[i] - c1[i]) * t) for i in range(3))
-
-    def _draw_text_with_shadow(self, draw, text: str, position: tuple, font, center: bool = False, alpha: int = 255):
-        """Draw text with shadow effect"""
-        x, y = position
-        
-        if center:
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = bbox[2] - bbox[0]
-            x = x - text_width // 2
-        
-        # Shadow
-        shadow_color = (0, 0, 0, alpha // 2) if alpha < 255 else (0, 0, 0, 128)
-        draw.text((x + 2, y + 2), text, fill=shadow_color[:3], font=font)
-        
-        # Main text
-        text_color = (255, 255, 255, alpha) if alpha < 255 else (255, 255, 255)
-        draw.text((x, y), text, fill=text_color[:3], font=font)
+    async def _agenerate_placeholder_video(self, prompt: str, duration: int = 5,
+                                           encoding: VideoEncodingOptions = None) -> bytes:
+        """Async variant of _generate_placeholder_video"""
+        try:
+            return await media_pool.arun(render_placeholder_video, *self._placeholder_video_args(prompt, duration, encoding))
+        except MediaPoolBusyError:
+            raise
+        except Exception as e:
+            print(f"❌ Placeholder video generation failed: {str(e)}")
+            return None
 
     def _wrap_text(self, text: str, width: int) -> str:
         """Simple text wrapping"""
@@ -220,16 +196,21 @@ class VideoGenerator:
         
         return '\n'.join(lines)
 
-    def generate_social_media_video(self, content: str, platform: str = "instagram") -> dict:
+    def generate_social_media_video(self, content: str, platform: str = "instagram",
+                                    encoding: VideoEncodingOptions = None, inline: bool = True) -> dict:
         """Generate platform-specific video content"""
-        platform_specs = {
-            "instagram": {"width": 1080, "height": 1080, "duration": 15, "style": "creative"},
-            "tiktok": {"width": 1080, "height": 1920, "duration": 30, "style": "creative"},
-            "youtube": {"width": 1920, "height": 1080, "duration": 60, "style": "professional"},
-            "linkedin": {"width": 1200, "height": 675, "duration": 30, "style": "professional"}
-        }
-        
-        specs = platform_specs.get(platform, platform_specs["instagram"])
+        prompt, duration = self._social_media_video_prompt(content, platform)
+        return self.generate_video(prompt, duration, encoding, inline)
+
+    async def agenerate_social_media_video(self, content: str, platform: str = "instagram",
+                                           encoding: VideoEncodingOptions = None, inline: bool = True) -> dict:
+        """Async variant of generate_social_media_video"""
+        prompt, duration = self._social_media_video_prompt(content, platform)
+        return await self.agenerate_video(prompt, duration, encoding, inline)
+
+    def _social_media_video_prompt(self, content: str, platform: str) -> tuple:
+        """Return the (prompt, duration) pair for a platform-specific video"""
+        specs = get_platform_spec(platform)
         prompt = f"{content}, optimized for {platform}, {specs['style']} style"
         
-        return self.generate_video(prompt, specs["duration"])
+        return prompt, specs["duration"]
@@ -0,0 +1,148 @@
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from app.video_encoder import encode_frames
+
+@lru_cache(maxsize=None)
+def load_font(size: int):
+    """Load a TrueType font once per process, falling back to PIL's default"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+def hex_to_rgb(color: str) -> np.ndarray:
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32)
+
+class TextLayer:
+    """A pre-rendered, full-width strip of centered, shadowed text lines"""
+
+    def __init__(self, lines: List[str], font, width: int, line_height: int):
+        probe = ImageDraw.Draw(Image.new("L", (1, 1)))
+        text_height = max((probe.textbbox((0, 0), line, font=font)[3] for line in lines), default=0)
+        height = max(1, line_height * (len(lines) - 1) + text_height + 2)
+
+        canvas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+        for i, line in enumerate(lines):
+            bbox = draw.textbbox((0, 0), line, font=font)
+            x = width // 2 - (bbox[2] - bbox[0]) // 2
+            y = i * line_height
+            draw.text((x + 2, y + 2), line, fill=(0, 0, 0, 255), font=font)  # Shadow
+            draw.text((x, y), line, fill=(255, 255, 255, 255), font=font)
+
+        pixels = np.asarray(canvas, dtype=np.float32)
+        self.rgb = pixels[:, :, :3]
+        self.alpha = pixels[:, :, 3:] / 255.0
+        self.height = height
+
+    def composite(self, frame: np.ndarray, y: int, opacity: float = 1.0):
+        """Alpha-blend this layer onto frame (in place) with its top edge at y"""
+        top, bottom = max(y, 0), min(y + self.height, frame.shape[0])
+        if top >= bottom or opacity <= 0:
+            return
+        alpha = self.alpha[top - y:bottom - y] * opacity
+        region = frame[top:bottom].astype(np.float32)
+        frame[top:bottom] = region + (self.rgb[top - y:bottom - y] - region) * alpha
+
+class PlaceholderVideoRenderer:
+    """
+    Renders placeholder video frames with NumPy.
+
+    The gradient is computed as a single broadcast per frame and every text
+    element is rasterized once up front; each frame only blends the animated
+    pieces (floating title, fading prompt, progress bar and timestamp) onto
+    the background. Frames are yielded one at a time so the whole clip is
+    never held in memory.
+    """
+
+    TITLE = "🎬 EcoLens AI Video Generator"
+    GRADIENT_START = "#667eea"
+    GRADIENT_END = "#764ba2"
+    BACKGROUND = "#f0f8ff"
+    BAR_BACKGROUND = (224, 224, 224)
+    BAR_FILL = (102, 126, 234)
+
+    def __init__(self, prompt_lines: List[str], duration: int, fps: int = 24,
+                 width: int = 800, height: int = 600):
+        self.duration = duration
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.total_frames = duration * fps
+
+        self._start = hex_to_rgb(self.GRADIENT_START)
+        self._end = hex_to_rgb(self.GRADIENT_END)
+        self._background = hex_to_rgb(self.BACKGROUND)
+        self._rows = (np.arange(height, dtype=np.float32) / height)[:, None]
+
+        self._title_layer = TextLayer([self.TITLE], load_font(36), width, 0)
+        self._content_layer = TextLayer(prompt_lines, load_font(20), width, 30)
+        self._timestamp_font = load_font(16)
+        self._timestamp_layers = {}
+
+    def _timestamp_layer(self, text: str) -> TextLayer:
+        layer = self._timestamp_layers.get(text)
+        if layer is None:
+            layer = self._timestamp_layers[text] = TextLayer([text], self._timestamp_font, self.width, 0)
+        return layer
+
+    def _background_frame(self, progress: float) -> np.ndarray:
+        top_color = np.floor(self._start + (self._end - self._start) * progress)
+        column = (top_color + (self._background - top_color) * self._rows).astype(np.uint8)
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        frame[:] = column[:, None, :]
+        return frame
+
+    def _draw_progress_bar(self, frame: np.ndarray, progress: float):
+        bar_width, bar_height = 400, 8
+        bar_x = (self.width - bar_width) // 2
+        bar_y = self.height - 80
+        frame[bar_y:bar_y + bar_height + 1, bar_x:bar_x + bar_width + 1] = self.BAR_BACKGROUND
+        progress_width = int(bar_width * progress)
+        frame[bar_y:bar_y + bar_height + 1, bar_x:bar_x + progress_width + 1] = self.BAR_FILL
+
+    def render_frame(self, frame_num: int) -> np.ndarray:
+        progress = frame_num / self.total_frames
+        frame = self._background_frame(progress)
+
+        # Floating title
+        title_y = 100 + int(20 * np.sin(frame_num * 0.1))
+        self._title_layer.composite(frame, title_y)
+
+        # Prompt text fades in over the second second
+        if frame_num > self.fps:
+            self._content_layer.composite(frame, 250, min(1.0, (frame_num - self.fps) / self.fps))
+
+        self._draw_progress_bar(frame, progress)
+
+        timestamp = f"{frame_num / self.fps:.1f}s / {self.duration}.0s"
+        self._timestamp_layer(timestamp).composite(frame, self.height - 50)
+        return frame
+
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        for frame_num in range(self.total_frames):
+            yield self.render_frame(frame_num)
+
+    def frame_at(self, t: float) -> np.ndarray:
+        """Frame for time t in seconds, for time-based consumers such as moviepy"""
+        return self.render_frame(min(int(round(t * self.fps)), self.total_frames - 1))
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+def render_placeholder_video(prompt_lines: List[str], duration: int, codec: str, crf: int, preset: str) -> bytes:
+    """Render and encode a placeholder clip to MP4 bytes; runs on a media worker process"""
+    renderer = PlaceholderVideoRenderer(prompt_lines, duration, fps=24)
+    # Frames stream straight from the renderer into ffmpeg
+    return encode_frames(
+        renderer.iter_frames(),
+        renderer.width,
+        renderer.height,
+        renderer.fps,
+        codec=codec,
+        crf=crf,
+        preset=preset
+    )
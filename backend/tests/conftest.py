@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Settings are read when app.config is imported, so point every on-disk store
+# at a scratch directory before any test module imports the app
+_scratch = tempfile.mkdtemp(prefix="trendify-tests-")
+os.environ.setdefault("SCHEDULER_DB_PATH", os.path.join(_scratch, "scheduler.sqlite"))
+os.environ.setdefault("MEDIA_STORE_DIR", os.path.join(_scratch, "media"))
+os.environ.setdefault("GENERATION_CACHE_DIR", os.path.join(_scratch, "cache"))
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from app.generation_cache import GenerationCache
+
+def _cache(tmp_path, **overrides) -> GenerationCache:
+    settings = dict(
+        name="test", cache_dir=str(tmp_path), ttl=60, max_entries=3,
+        max_memory_bytes=10_000, max_disk_bytes=100_000,
+    )
+    settings.update(overrides)
+    return GenerationCache(**settings)
+
+def _forget_memory(cache: GenerationCache):
+    cache._memory.clear()
+    cache._memory_bytes = 0
+
+def test_keys_normalize_whitespace_and_case():
+    key = GenerationCache.make_key("A  cat\non a mat", "model", {"t": 0.7})
+    assert key == GenerationCache.make_key("a cat on a MAT", "model", {"t": 0.7})
+    assert key != GenerationCache.make_key("a cat on a mat", "other-model", {"t": 0.7})
+    assert key != GenerationCache.make_key("a cat on a mat", "model", {"t": 0.9})
+
+def test_memory_lru_evicts_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_disk_bytes=0)  # Memory tier only
+    for key in "abc":
+        cache.set(key, key.upper())
+    assert cache.get("a") == "A"  # Now most recently used
+    cache.set("d", "D")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    assert cache.stats()["evictions"] >= 1
+
+def test_memory_is_bounded_by_size(tmp_path):
+    cache = _cache(tmp_path, max_entries=100, max_memory_bytes=200, max_disk_bytes=0)
+    cache.set("a", "x" * 100)
+    cache.set("b", "y" * 100)
+    stats = cache.stats()
+    assert stats["memory_entries"] == 1
+    assert stats["memory_bytes"] <= 200
+    cache.set("huge", "z" * 1000)  # Larger than the whole tier: never held in memory
+    assert "huge" not in cache._memory
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("a", {"content": "hello"})
+    _forget_memory(cache)
+    assert cache.get("a") == {"content": "hello"}
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("a") == {"content": "hello"}
+    assert cache.stats()["memory_hits"] == 1
+
+def test_expired_entries_are_dropped_from_both_tiers(tmp_path):
+    cache = _cache(tmp_path, ttl=0.05)
+    cache.set("a", "A")
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert not os.path.exists(cache._path("a"))
+    assert cache.stats()["misses"] == 1
+
+def test_disk_tier_evicts_oldest_files_over_budget(tmp_path):
+    cache = _cache(tmp_path, max_disk_bytes=250)
+    for i, key in enumerate("abc"):
+        cache.set(key, "v" * 60)
+        past = time.time() - 100 + i  # Distinct, increasing write times
+        os.utime(cache._path(key), (past, past))
+    cache.set("d", "v" * 60)
+    on_disk = sorted(entry.name for entry in os.scandir(tmp_path))
+    assert "a.json" not in on_disk
+    assert "d.json" in on_disk
+    assert cache.stats()["disk_bytes"] <= 250
+
+def test_disk_usage_survives_restart(tmp_path):
+    _cache(tmp_path).set("a", "A")
+    reopened = _cache(tmp_path)
+    assert reopened.get("a") == "A"
+    reopened.set("b", "B")
+    assert reopened.stats()["disk_bytes"] == sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = _cache(tmp_path, enabled=False)
+    cache.set("a", "A")
+    assert cache.get("a") is None
+    assert asyncio.run(cache.aget("a")) is None
+    assert not os.listdir(tmp_path)
+
+def test_async_api(tmp_path):
+    cache = _cache(tmp_path)
+
+    async def main():
+        await cache.aset("a", [1, 2])
+        _forget_memory(cache)
+        return await cache.aget("a")
+
+    assert asyncio.run(main()) == [1, 2]
@@ -0,0 +1,90 @@
+import io
+import os
+import pytest
+from app.http_client import MultipartStream
+
+IMAGE = bytes(range(256)) * 40
+
+def expected_body(stream: MultipartStream, fields: dict, files: dict) -> bytes:
+    body = b""
+    for name, value in fields.items():
+        body += (f'--{stream.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n').encode()
+    for name, (filename, data, content_type) in files.items():
+        body += (
+            f'--{stream.boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode() + data + b"\r\n"
+    return body + f"--{stream.boundary}--\r\n".encode()
+
+@pytest.fixture
+def stream():
+    return MultipartStream(
+        {"message": "Hello ✨", "published": "true"},
+        {"source": ("image.png", io.BytesIO(IMAGE), "image/png")}
+    )
+
+@pytest.fixture
+def body(stream):
+    return expected_body(
+        stream,
+        {"message": "Hello ✨", "published": "true"},
+        {"source": ("image.png", IMAGE, "image/png")}
+    )
+
+def test_full_read_matches_encoded_body(stream, body):
+    assert stream.read() == body
+    assert len(stream) == len(body)
+    assert stream.content_type == f"multipart/form-data; boundary={stream.boundary}"
+
+@pytest.mark.parametrize("size", [1, 7, 100, 4096])
+def test_small_reads_cross_part_boundaries(stream, body, size):
+    chunks = []
+    while chunk := stream.read(size):
+        assert len(chunk) <= size
+        chunks.append(chunk)
+    assert b"".join(chunks) == body
+    assert stream.tell() == len(body)
+
+def test_readinto_fills_buffer_from_several_parts(stream, body):
+    buffer = bytearray(len(body) - 10)
+    assert stream.readinto(buffer) == len(buffer)
+    assert bytes(buffer) == body[:len(buffer)]
+
+    rest = bytearray(64)
+    assert stream.readinto(rest) == 10
+    assert bytes(rest[:10]) == body[-10:]
+    assert stream.readinto(rest) == 0
+
+def test_seek_and_rewind_for_retries(stream, body):
+    stream.read(200)
+    assert stream.seek(0) == 0
+    assert stream.read() == body
+
+    middle = body.index(IMAGE) + 1000  # Inside the file part
+    assert stream.seek(middle) == middle
+    assert stream.read(50) == body[middle:middle + 50]
+    assert stream.seek(-20, os.SEEK_CUR) == middle + 30
+    assert stream.read(20) == body[middle + 30:middle + 50]
+    assert stream.seek(-5, os.SEEK_END) == len(body) - 5
+    assert stream.read() == body[-5:]
+
+def test_seek_is_clamped_to_the_body(stream, body):
+    assert stream.seek(-10) == 0
+    assert stream.seek(10, os.SEEK_END) == len(body)
+    assert stream.read() == b""
+
+def test_file_part_starts_at_current_position():
+    source = io.BytesIO(b"skipped" + IMAGE)
+    source.seek(7)
+    stream = MultipartStream({}, {"source": ("image.png", source, "image/png")})
+    assert stream.read() == expected_body(stream, {}, {"source": ("image.png", IMAGE, "image/png")})
+
+def test_reads_open_files(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(IMAGE)
+    with open(path, "rb") as f:
+        stream = MultipartStream({"description": "clip"}, {"source": ("video.mp4", f, "video/mp4")})
+        body = expected_body(stream, {"description": "clip"}, {"source": ("video.mp4", IMAGE, "video/mp4")})
+        assert stream.read() == body
+        stream.seek(0)
+        assert stream.read() == body
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from app.image_backends import ImageBackendRouter, FakeImageBackend, parse_image_backends
+from app.image_generator import ImageGenerator
+
+class TimingOutBackend(FakeImageBackend):
+    """Raises like huggingface_hub's InferenceTimeoutError, a TimeoutError subclass"""
+
+    async def _agenerate(self, prompt):
+        raise TimeoutError("Model too busy")
+
+def _measure(backend, *latencies):
+    for latency in latencies:
+        backend.record(latency, True)
+
+def test_unbudgeted_request_prefers_requested_tier():
+    router = ImageBackendRouter()
+    best = router.register(FakeImageBackend("best", "best"))
+    fast = router.register(FakeImageBackend("fast", "fast"))
+    assert router.route() == [best, fast]
+    assert router.route(quality="fast") == [fast, best]
+
+def test_budget_excludes_backends_whose_measured_p95_is_too_slow():
+    router = ImageBackendRouter()
+    best = router.register(FakeImageBackend("best", "best"))
+    fast = router.register(FakeImageBackend("fast", "fast"))
+    _measure(best, 2.0, 2.1, 2.2)
+    _measure(fast, 0.2, 0.3)
+    assert router.route(latency_budget=1.0) == [fast]
+    assert router.route(latency_budget=5.0) == [best, fast]
+
+def test_unmeasured_backends_stay_eligible_but_slow_priors_go_last():
+    router = ImageBackendRouter()
+    best = router.register(FakeImageBackend("best", "best"))
+    fast = router.register(FakeImageBackend("fast", "fast"))
+    # Neither fits a 1s budget on its tier prior; the quicker prior goes first
+    assert router.route(latency_budget=1.0) == [fast, best]
+
+def test_unhealthy_backends_go_to_the_back():
+    router = ImageBackendRouter(min_success_rate=0.5)
+    best = router.register(FakeImageBackend("best", "best"))
+    fast = router.register(FakeImageBackend("fast", "fast"))
+    for _ in range(3):
+        best.record(None, False)
+    assert router.route() == [fast, best]
+
+def test_unknown_quality_is_rejected():
+    with pytest.raises(ValueError):
+        ImageBackendRouter().route(quality="ultra")
+
+def test_percentiles_and_stats():
+    backend = FakeImageBackend("fast", "fast")
+    _measure(backend, *[i / 10 for i in range(1, 11)])
+    backend.record(None, False)
+    stats = backend.stats()
+    assert stats["p50_ms"] == pytest.approx(500.0)
+    assert stats["p95_ms"] == pytest.approx(1000.0)
+    assert stats["samples"] == 10
+    assert stats["success_rate"] == pytest.approx(10 / 11, abs=1e-3)
+
+def test_parse_image_backends():
+    assert parse_image_backends("a=org/model-a:best, b=org/model-b:fast,") == [
+        ("a", "org/model-a", "best"), ("b", "org/model-b", "fast")
+    ]
+    with pytest.raises(ValueError):
+        parse_image_backends("a=org/model-a:ultra")
+
+def test_timeout_without_budget_falls_through_to_next_backend():
+    router = ImageBackendRouter()
+    slow = router.register(TimingOutBackend("slow", "best"))
+    router.register(FakeImageBackend("fast", "fast"))
+    result = asyncio.run(ImageGenerator(router=router).agenerate_image(
+        "timeout without budget", use_cache=False, inline=False
+    ))
+    assert result["backend"] == "fast"
+    assert slow.stats()["success_rate"] == 0.0
+
+def test_timeout_without_budget_falls_back_to_placeholder():
+    router = ImageBackendRouter()
+    router.register(TimingOutBackend("slow", "best"))
+    result = asyncio.run(ImageGenerator(router=router).agenerate_image(
+        "timeout without budget placeholder", use_cache=False, inline=False
+    ))
+    assert result["source"] == "placeholder"
+    assert result["media_id"]
+
+def test_spent_budget_skips_remaining_backends():
+    router = ImageBackendRouter()
+    # Both priors exceed the budget, so the quicker "fast" tier is tried first
+    first = router.register(FakeImageBackend("first", "fast", delay=0.3))
+    second = router.register(FakeImageBackend("second", "best"))
+    result = asyncio.run(ImageGenerator(router=router).agenerate_image(
+        "spent budget", use_cache=False, inline=False, latency_budget=0.2
+    ))
+    assert result["source"] == "placeholder"
+    assert first.stats()["samples"] == 1
+    assert second.stats()["samples"] == 0  # Never called with no time left
@@ -0,0 +1,31 @@
+import os
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from app.media_pool import MediaWorkerPool
+
+def _crash():
+    os._exit(1)  # Dies like an OOM-killed worker
+
+@pytest.fixture
+def pool():
+    pool = MediaWorkerPool(max_workers=1, queue_size=1)
+    yield pool
+    pool.shutdown()
+
+def test_runs_work_on_a_worker_process(pool):
+    assert pool.run(pow, 2, 10) == 1024
+    assert pool.run(os.getpid) != os.getpid()
+    assert pool.stats()["completed"] == 2
+
+def test_broken_pool_is_shut_down_and_replaced(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.run(_crash)
+    broken = pool._executor
+    shutdowns = []
+    shutdown = broken.shutdown
+    broken.shutdown = lambda **kwargs: (shutdowns.append(kwargs), shutdown(**kwargs))
+
+    assert pool.run(pow, 2, 3) == 8
+    assert pool._executor is not broken
+    assert shutdowns == [{"wait": False, "cancel_futures": True}]  # Shut down, not just dropped
+    assert pool.stats()["failed"] == 1
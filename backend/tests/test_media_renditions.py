@@ -0,0 +1,58 @@
+import asyncio
+import io
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from app import image_renditions, main
+from app.media_store import MediaStore
+
+def _png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), "green").save(buffer, "PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MediaStore(str(tmp_path), ttl=60)
+    monkeypatch.setattr(main, "media_store", store)
+    monkeypatch.setattr(image_renditions, "media_store", store)
+    monkeypatch.setattr(image_renditions, "media_pool", InProcessPool())
+    return store
+
+class InProcessPool:
+    """Renders in the test process instead of on a media worker"""
+
+    def run(self, func, *args):
+        return func(*args)
+
+def _rendition(media_id: str, image_format: str = "webp"):
+    return asyncio.run(main._rendition_ref(media_id, None, image_format, None))
+
+def test_unknown_media_is_404(store):
+    with pytest.raises(HTTPException) as raised:
+        _rendition("0" * 32)
+    assert raised.value.status_code == 404
+
+def test_videos_have_no_image_renditions(store):
+    ref = store.put(b"\x00\x00\x00\x18ftypmp42", "video/mp4")
+    with pytest.raises(HTTPException) as raised:
+        _rendition(ref.media_id)
+    assert raised.value.status_code == 415
+
+def test_undecodable_image_is_400(store):
+    ref = store.put(b"not really a png", "image/png")
+    with pytest.raises(HTTPException) as raised:
+        _rendition(ref.media_id)
+    assert raised.value.status_code == 400
+
+def test_image_rendition_is_stored(store):
+    ref = store.put(_png(), "image/png")
+    rendition = _rendition(ref.media_id)
+    assert rendition.content_type == "image/webp"
+    assert store.read(rendition.media_id)[8:12] == b"WEBP"
+
+def test_bad_options_are_400(store):
+    ref = store.put(_png(), "image/png")
+    with pytest.raises(HTTPException) as raised:
+        _rendition(ref.media_id, image_format="bmp")
+    assert raised.value.status_code == 400
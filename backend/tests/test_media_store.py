@@ -0,0 +1,95 @@
+import os
+import time
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app import media_store as media_store_module
+from app.media_store import MediaStore, media_response, content_disposition
+
+PAYLOAD = bytes(range(256)) * 4  # 1024 bytes
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MediaStore(str(tmp_path), ttl=60)
+    monkeypatch.setattr(media_store_module, "media_store", store)
+    return store
+
+@pytest.fixture
+def client(store):
+    app = FastAPI()
+
+    @app.get("/media/{media_id}")
+    def serve(request: Request, media_id: str, filename: str = None):
+        return media_response(request, media_id, filename)
+
+    return TestClient(app)
+
+def test_put_is_content_addressed(store):
+    first = store.put(PAYLOAD, "image/png")
+    assert store.put(PAYLOAD, "image/png").media_id == first.media_id
+    assert store.get(first.media_id).size == len(PAYLOAD)
+    assert store.read(first.media_id) == PAYLOAD
+    assert not store.exists("../../etc/passwd")
+    with pytest.raises(ValueError):
+        store.put(PAYLOAD, "application/x-unknown")
+
+def test_cleanup_removes_expired_unpinned_media(store):
+    kept = store.put(b"kept", "image/png")
+    pinned = store.put(b"pinned", "image/png")
+    store.add_pin_source(lambda: [pinned.media_id])
+    old = time.time() - 120
+    os.utime(store.path(kept.media_id), (old, old))
+    os.utime(store.path(pinned.media_id), (old, old))
+    assert store.cleanup_expired() == 1
+    assert not store.exists(kept.media_id)
+    assert store.exists(pinned.media_id)
+
+def test_full_response_without_range(store, client):
+    ref = store.put(PAYLOAD, "image/png")
+    response = client.get(f"/media/{ref.media_id}")
+    assert response.status_code == 200
+    assert response.content == PAYLOAD
+    assert response.headers["accept-ranges"] == "bytes"
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-24", 1000, 1023),
+    ("bytes=1000-5000", 1000, 1023),  # End clamped to the file
+])
+def test_range_requests(store, client, header, start, end):
+    ref = store.put(PAYLOAD, "image/png")
+    response = client.get(f"/media/{ref.media_id}", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == PAYLOAD[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/1024"
+
+def test_unsatisfiable_range(store, client):
+    ref = store.put(PAYLOAD, "image/png")
+    response = client.get(f"/media/{ref.media_id}", headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+def test_malformed_range_serves_whole_file(store, client):
+    ref = store.put(PAYLOAD, "image/png")
+    response = client.get(f"/media/{ref.media_id}", headers={"Range": "bytes=0-1,5-9"})
+    assert response.status_code == 200
+    assert len(response.content) == len(PAYLOAD)
+
+def test_unknown_media_is_404(client):
+    assert client.get("/media/" + "0" * 32).status_code == 404
+
+def test_content_disposition_is_quoted_and_sanitized():
+    header = content_disposition('my "post"; name=evil.png')
+    assert header.startswith('attachment; filename="my _post__ name_evil.png";')
+    assert "filename*=UTF-8''my%20%22post%22%3B%20name%3Devil.png" in header
+    assert content_disposition("../../secret.mp4").startswith('attachment; filename="secret.mp4"')
+    assert 'filename="caf_.png"' in content_disposition("café.png")
+    assert "\r" not in content_disposition("a\r\nSet-Cookie: x.png")
+
+def test_download_filename_header(store, client):
+    ref = store.put(PAYLOAD, "image/png")
+    response = client.get(f"/media/{ref.media_id}", params={"filename": "launch post; v2.png"})
+    assert response.headers["content-disposition"] == (
+        "attachment; filename=\"launch post_ v2.png\"; filename*=UTF-8''launch%20post%3B%20v2.png"
+    )
@@ -0,0 +1,34 @@
+import pytest
+from app import placeholder_renderer
+from app.placeholder_renderer import render_enhanced_placeholder, placeholder_cache_stats
+
+class CountingPool:
+    """Renders in the test process and counts the renders"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, func, *args):
+        self.calls += 1
+        return func(*args)
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = CountingPool()
+    monkeypatch.setattr(placeholder_renderer, "media_pool", pool)
+    placeholder_renderer._render_enhanced.cache_clear()
+    yield pool
+    placeholder_renderer._render_enhanced.cache_clear()
+
+def test_repeated_placeholder_is_rendered_once(pool):
+    first = render_enhanced_placeholder("Technology", "A solar farm at dawn")
+    assert first[:8] == b"\x89PNG\r\n\x1a\n"
+    assert render_enhanced_placeholder("Technology", "A solar farm at dawn") == first
+    assert pool.calls == 1
+    assert placeholder_cache_stats()["enhanced"]["hits"] == 1
+
+def test_different_prompts_render_separately(pool):
+    first = render_enhanced_placeholder("Technology", "A solar farm at dawn")
+    assert render_enhanced_placeholder("Technology", "") != first
+    assert render_enhanced_placeholder("Food", "A solar farm at dawn") != first
+    assert pool.calls == 3
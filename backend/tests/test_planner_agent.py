@@ -0,0 +1,64 @@
+import asyncio
+import json
+from app.planner_agent import PlannerAgent, PlannerInput
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Answers batched prompts with the queued replies, single prompts with "single" """
+
+    def __init__(self, *batch_replies):
+        self.batch_replies = list(batch_replies)
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        self.prompts.append(prompt)
+        if "### Request 1" in prompt:
+            return FakeResponse(self.batch_replies.pop(0))
+        return FakeResponse("single")
+
+def _agent(model=None) -> PlannerAgent:
+    agent = object.__new__(PlannerAgent)  # Skip the Gemini SDK setup
+    agent.model = model
+    agent.generation_config = None
+    agent._image_generator = None
+    return agent
+
+def _input(name: str) -> PlannerInput:
+    return PlannerInput(
+        business_name=name, output_type="text", periodic_content=False,
+        additional_prompt=f"launch post for {name}", use_cache=False
+    )
+
+def test_parse_batch_response():
+    parse = PlannerAgent._parse_batch_response
+    assert parse('["a", "b"]', 2) == ["a", "b"]
+    assert parse('```json\n["a", "b"]\n```', 2) == ["a", "b"]
+    assert parse('["a"]', 2) is None
+    assert parse('["a", ""]', 2) is None
+    assert parse('["a", 3]', 2) is None
+    assert parse('{"a": "b"}', 1) is None
+    assert parse("not json", 1) is None
+
+def test_batch_prompt_only_asks_for_the_json_array():
+    agent = _agent()
+    single = agent._build_text_prompt(_input("Cafe"))
+    batch = agent._build_batch_prompt([_input("Cafe"), _input("Bakery")])
+    assert "Respond ONLY with the final content" in single
+    assert "Respond ONLY with the final content" not in batch
+    assert batch.count("Respond ONLY") == 1
+    assert "### Request 2" in batch and "Bakery" in batch
+
+def test_text_batch_splits_one_reply_per_request():
+    model = FakeModel(json.dumps(["first", "second"]))
+    results = asyncio.run(_agent(model).agenerate_text_batch([_input("Cafe"), _input("Bakery")]))
+    assert [result["content"] for result in results] == ["first", "second"]
+    assert len(model.prompts) == 1
+
+def test_text_batch_falls_back_to_single_calls_when_reply_does_not_line_up():
+    model = FakeModel(json.dumps(["only one"]))
+    results = asyncio.run(_agent(model).agenerate_text_batch([_input("Cafe"), _input("Bakery")]))
+    assert [result["content"] for result in results] == ["single", "single"]
+    assert len(model.prompts) == 3
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.provider_limits import AdaptiveProviderLimiter, ProviderTrippedError, classify_provider_error
+
+class QuotaError(Exception):
+    status_code = 429
+
+class ServerError(Exception):
+    status_code = 503
+
+def _limiter(limit=4, cooldown=60.0, trip_quota_errors=3):
+    return AdaptiveProviderLimiter(
+        "test", limit, min_limit=1, window=10,
+        trip_quota_errors=trip_quota_errors, trip_error_rate=0.5, cooldown=cooldown,
+    )
+
+def _fail(limiter, error):
+    with pytest.raises(type(error)):
+        with limiter.sync_slot():
+            raise error
+
+def test_classify_provider_error():
+    assert classify_provider_error(QuotaError()) == "quota"
+    assert classify_provider_error(Exception("Resource exhausted: quota")) == "quota"
+    assert classify_provider_error(ServerError()) == "server"
+    assert classify_provider_error(TimeoutError()) == "server"
+    assert classify_provider_error(ValueError("prompt blocked")) == "client"
+
+def test_sync_slot_records_success():
+    limiter = _limiter()
+    with limiter.sync_slot():
+        assert limiter.in_flight == 1
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["latency_ms"] is not None
+    assert stats["error_rate"] == 0.0
+
+def test_sync_slot_failures_shrink_limit_and_trip():
+    limiter = _limiter(limit=8)
+    _fail(limiter, QuotaError())
+    assert limiter.limit == 4
+    _fail(limiter, QuotaError())
+    _fail(limiter, QuotaError())
+    assert limiter.state == "open"
+    with pytest.raises(ProviderTrippedError):
+        with limiter.sync_slot():
+            pass
+    assert limiter.stats()["short_circuited"] == 1
+
+def test_client_errors_do_not_count_against_health():
+    limiter = _limiter()
+    for _ in range(5):
+        _fail(limiter, ValueError("bad request"))
+    assert limiter.state == "closed"
+    assert limiter.stats()["error_rate"] == 0.0
+
+def test_half_open_trial_through_sync_slot_closes_circuit():
+    limiter = _limiter(cooldown=0.05, trip_quota_errors=1)
+    _fail(limiter, QuotaError())
+    assert limiter.state == "open"
+    time.sleep(0.06)
+    with limiter.sync_slot():
+        assert limiter.state == "half_open"
+    assert limiter.state == "closed"
+    assert limiter.limit == 1
+
+def test_failed_half_open_trial_trips_again():
+    limiter = _limiter(cooldown=0.05, trip_quota_errors=1)
+    _fail(limiter, QuotaError())
+    time.sleep(0.06)
+    _fail(limiter, ServerError())
+    assert limiter.state == "open"
+
+def test_sync_slot_waits_for_capacity():
+    limiter = _limiter(limit=1)
+    order = []
+    release = threading.Event()
+
+    def holder():
+        with limiter.sync_slot():
+            order.append("held")
+            release.wait(1)
+        order.append("released")
+
+    def waiter():
+        with limiter.sync_slot():
+            order.append("acquired")
+
+    first = threading.Thread(target=holder)
+    first.start()
+    while not order:
+        time.sleep(0.01)
+    second = threading.Thread(target=waiter)
+    second.start()
+    time.sleep(0.05)
+    assert limiter.stats()["waiting"] == 1
+    release.set()
+    first.join()
+    second.join()
+    assert order == ["held", "released", "acquired"]
+
+def test_sync_release_wakes_async_waiters():
+    limiter = _limiter(limit=1)
+
+    async def main():
+        async with limiter.slot():
+            pass  # Binds the limiter to this loop
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with limiter.sync_slot():
+                acquired.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        await asyncio.to_thread(acquired.wait, 1)
+
+        async def waiter():
+            async with limiter.slot():
+                return "ran"
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        release.set()
+        result = await asyncio.wait_for(task, 1)
+        thread.join()
+        return result
+
+    assert asyncio.run(main()) == "ran"
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import time
+import pytest
+from app import publish_dispatcher, social_media_posting
+from app.jobs import JobManager
+from app.publish_dispatcher import TokenBucket, SQLiteTokenBucket, PublishDispatcher, PublishQuotaExceededError
+from app.social_media_posting import BatchPostRequest, FacebookPostNow, batch_post
+
+def test_bucket_grants_burst_then_queues_reservations():
+    bucket = TokenBucket(rate_per_second=10, capacity=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+    assert bucket.stats()["backlog_seconds"] == pytest.approx(0.2, abs=0.05)
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate_per_second=100, capacity=2)
+    bucket.reserve(2)
+    time.sleep(0.05)
+    assert bucket.estimate(2) == 0.0
+    assert bucket.stats()["available"] == 2
+
+def test_reservation_beyond_max_delay_takes_nothing():
+    bucket = TokenBucket(rate_per_second=1, capacity=1)
+    assert bucket.reserve(5, max_delay=2) is None
+    assert bucket.estimate(1) == 0.0  # Still untouched
+    assert bucket.reserve(3, max_delay=2) == pytest.approx(2.0, abs=0.01)
+
+def test_dispatcher_raises_with_retry_hint():
+    dispatcher = PublishDispatcher({"facebook": 60}, burst_size=1)
+    dispatcher.reserve("facebook", "page", 1)
+    with pytest.raises(PublishQuotaExceededError) as raised:
+        dispatcher.reserve("facebook", "page", 5, max_delay=1)
+    assert raised.value.delay == pytest.approx(5.0, abs=0.05)
+    assert raised.value.retry_after == pytest.approx(4.0, abs=0.05)
+    # Accounts are paced independently
+    assert dispatcher.reserve("facebook", "other page", 1, max_delay=0) == 0.0
+
+def test_workers_sharing_a_database_share_the_quota(tmp_path):
+    db_path = str(tmp_path / "quota.sqlite")
+    first = PublishDispatcher({"facebook": 60}, burst_size=2, db_path=db_path)
+    second = PublishDispatcher({"facebook": 60}, burst_size=2, db_path=db_path)
+
+    assert first.reserve("facebook", "page") == 0.0
+    assert second.reserve("facebook", "page") == 0.0
+    assert first.reserve("facebook", "page") == pytest.approx(1.0, abs=0.05)
+    assert second.estimate("facebook", "page") == pytest.approx(2.0, abs=0.05)
+    assert second.reserve("facebook", "other page") == 0.0
+
+def test_shared_bucket_refills_by_wall_clock(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(publish_dispatcher.time, "time", lambda: now[0])
+    bucket = SQLiteTokenBucket(str(tmp_path / "quota.sqlite"), "facebook:page", rate_per_second=1, capacity=2)
+
+    assert bucket.reserve(3) == pytest.approx(1.0)
+    now[0] += 2
+    assert bucket.estimate(1) == 0.0
+    now[0] += 60
+    assert bucket.stats()["available"] == 2  # Capped at capacity
+
+def test_shared_bucket_falls_back_to_process_quota(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    bucket = SQLiteTokenBucket(str(blocker / "quota.sqlite"), "facebook:page", rate_per_second=1, capacity=1)
+
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+def test_account_keys_do_not_expose_tokens():
+    key = PublishDispatcher.account_key("secret-token")
+    assert "secret" not in key and len(key) == 12
+
+@pytest.fixture
+def facebook_batch(monkeypatch):
+    """Fast in-memory Facebook batch publishing with a fresh, slow quota"""
+    calls = []
+
+    def post_batch(messages, quota_reserved=False):
+        calls.append((len(messages), quota_reserved))
+        return [{"success": True, "post_id": str(i)} for i in range(len(messages))]
+
+    dispatcher = PublishDispatcher({"facebook": 60, "linkedin": 60}, burst_size=3)
+    monkeypatch.setattr(social_media_posting, "publish_dispatcher", dispatcher)
+    monkeypatch.setattr(social_media_posting, "post_batch_to_facebook", post_batch)
+    monkeypatch.setattr(social_media_posting, "FB_PAGE_ID", "page")
+    monkeypatch.setattr(social_media_posting, "job_manager", JobManager(1, 10, 60))
+    return calls
+
+def _batch(count: int) -> BatchPostRequest:
+    return BatchPostRequest(posts=[{"platform": "facebook", "content": f"post {i}"} for i in range(count)])
+
+def test_small_batch_is_published_inline(facebook_batch):
+    result = asyncio.run(batch_post(_batch(3)))
+    assert result["succeeded"] == 3
+    assert result["expected_delay"] == 0.0
+    assert facebook_batch == [(3, True)]
+
+def test_batch_beyond_max_delay_becomes_a_job(facebook_batch):
+    async def main():
+        response = await batch_post(_batch(50))
+        body = json.loads(response.body)
+        return response.status_code, body
+
+    status, body = asyncio.run(main())
+    assert status == 202
+    assert body["status_url"] == f"/jobs/{body['job_id']}"
+    assert body["expected_delay"] == pytest.approx(47.0, abs=0.5)
+    assert facebook_batch == []  # Nothing published or slept on in the request
+
+class _Response:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+        self.content = json.dumps(body).encode()
+        self.text = self.content.decode()
+
+    def json(self):
+        return self._body
+
+@pytest.fixture
+def linkedin_reused_asset(monkeypatch):
+    """LinkedIn rejects the cached asset once, then accepts the re-uploaded one"""
+    responses = [_Response(422, {"message": "asset expired"}), _Response(201, {"id": "urn:li:share:1"})]
+
+    def get_asset(token, owner_urn, image_id=None, refresh=False):
+        # (asset URN, reused from the cache)
+        return ("urn:li:digitalmediaAsset:new", False) if refresh else ("urn:li:digitalmediaAsset:old", True)
+
+    class FakeHTTP:
+        def post(self, url, **kwargs):
+            return responses.pop(0)
+
+    dispatcher = PublishDispatcher({"facebook": 60, "linkedin": 60}, burst_size=1)
+    monkeypatch.setattr(social_media_posting, "publish_dispatcher", dispatcher)
+    monkeypatch.setattr(social_media_posting, "publishing_http", FakeHTTP())
+    monkeypatch.setattr(social_media_posting, "get_person_id", lambda token: "person")
+    monkeypatch.setattr(social_media_posting, "store_image_reference", lambda data, image_id: image_id)
+    monkeypatch.setattr(social_media_posting, "get_publish_rendition_id", lambda image_id, platform: image_id)
+    monkeypatch.setattr(social_media_posting, "get_linkedin_asset", get_asset)
+    return dispatcher
+
+def test_reserved_linkedin_retry_reuses_the_callers_quota(linkedin_reused_asset):
+    linkedin_reused_asset.reserve("linkedin", "token")
+    result = social_media_posting.post_to_linkedin("hello", "token", image_id="image", quota_reserved=True)
+    assert result == {"post_id": "urn:li:share:1"}
+    assert linkedin_reused_asset.estimate("linkedin", "token") == pytest.approx(1.0, abs=0.05)  # Still one post owed
+
+def test_unreserved_linkedin_retry_gives_up_past_max_delay(linkedin_reused_asset, monkeypatch):
+    monkeypatch.setattr(social_media_posting, "PUBLISH_MAX_QUEUE_DELAY", 0)
+    with pytest.raises(PublishQuotaExceededError):
+        social_media_posting.post_to_linkedin("hello", "token", image_id="image")
+
+@pytest.fixture
+def facebook_post(facebook_batch, monkeypatch):
+    """Fast in-memory single Facebook posts on the slow quota from facebook_batch"""
+    calls = []
+
+    def post(message, quota_reserved=False):
+        calls.append((message, quota_reserved))
+        return {"post_id": str(len(calls))}
+
+    monkeypatch.setattr(social_media_posting, "post_to_facebook", post)
+    return calls
+
+def test_post_now_publishes_inline_while_quota_lasts(facebook_post):
+    result = asyncio.run(social_media_posting.post_to_facebook_now(FacebookPostNow(content="hello")))
+    assert result["success"] and result["post_id"] == "1"
+    assert facebook_post == [("hello", True)]
+
+_real_sleep = asyncio.sleep
+
+async def _no_sleep(delay, *args):
+    """Skip quota waits in jobs while still yielding to the event loop"""
+    await _real_sleep(0)
+
+def test_post_now_queues_a_job_instead_of_waiting(facebook_post, monkeypatch):
+    monkeypatch.setattr(social_media_posting.asyncio, "sleep", _no_sleep)
+
+    async def main():
+        for i in range(3):
+            await social_media_posting.post_to_facebook_now(FacebookPostNow(content=f"burst {i}"))
+        started = time.monotonic()
+        response = await social_media_posting.post_to_facebook_now(FacebookPostNow(content="queued"))
+        elapsed = time.monotonic() - started
+        body = json.loads(response.body)
+        assert ("queued", True) not in facebook_post  # Not published in the request
+        job = social_media_posting.job_manager.get(body["job_id"])
+        while not job.finished:
+            await job.watch().wait()
+        return response.status_code, body, elapsed, job
+
+    status, body, elapsed, job = asyncio.run(main())
+    assert status == 202
+    assert body["expected_delay"] == pytest.approx(1.0, abs=0.1)
+    assert elapsed < 0.5
+    assert job.status == "succeeded" and job.result == {"post_id": "4"}
+    assert facebook_post[-1] == ("queued", True)
@@ -0,0 +1,159 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+import pytest
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from app import scheduler_store
+from app.scheduler_store import SchedulerLease, SQLiteJobStore
+
+def publish(content):
+    return content
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "scheduler.sqlite")
+
+@pytest.fixture
+def scheduler(db_path):
+    scheduler = BackgroundScheduler(jobstores={"default": SQLiteJobStore(db_path)}, timezone=timezone.utc)
+    scheduler.start(paused=True)  # Store jobs without running them
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+def at(minutes: int) -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0) + timedelta(minutes=minutes)
+
+def test_jobs_round_trip_through_the_store(scheduler, db_path):
+    scheduler.add_job(publish, "date", run_date=at(5), args=[{"text": "hello"}], id="post-1")
+
+    job = scheduler.get_job("post-1")
+    assert job.func is publish
+    assert job.args == ({"text": "hello"},)
+    assert job.next_run_time == at(5)
+
+    # A second store on the same file (another worker) sees the same job
+    other = SQLiteJobStore(db_path)
+    other.start(scheduler, "default")
+    assert other.lookup_job("post-1").args == ({"text": "hello"},)
+    assert other.lookup_job("missing") is None
+
+def test_jobs_are_ordered_by_next_run_time(scheduler):
+    store = scheduler._lookup_jobstore("default")
+    scheduler.add_job(publish, "date", run_date=at(30), args=["late"], id="late")
+    scheduler.add_job(publish, "date", run_date=at(10), args=["early"], id="early")
+
+    assert [job.id for job in store.get_all_jobs()] == ["early", "late"]
+    assert store.get_next_run_time() == at(10)
+    assert [job.id for job in store.get_due_jobs(at(20))] == ["early"]
+    assert store.get_due_jobs(at(0)) == []
+
+def test_update_and_remove_jobs(scheduler):
+    store = scheduler._lookup_jobstore("default")
+    scheduler.add_job(publish, "date", run_date=at(5), args=["old"], id="post-1")
+    scheduler.modify_job("post-1", args=["new"])
+    assert list(store.lookup_job("post-1").args) == ["new"]
+
+    scheduler.remove_job("post-1")
+    assert store.lookup_job("post-1") is None
+    assert store.get_next_run_time() is None
+    with pytest.raises(JobLookupError):
+        store.remove_job("post-1")
+
+def test_duplicate_ids_conflict(scheduler):
+    scheduler.add_job(publish, "date", run_date=at(5), args=["a"], id="post-1")
+    with pytest.raises(ConflictingIdError):
+        scheduler.add_job(publish, "date", run_date=at(6), args=["b"], id="post-1")
+
+def test_remove_all_jobs(scheduler):
+    for i in range(3):
+        scheduler.add_job(publish, "date", run_date=at(i + 1), args=[i], id=f"post-{i}")
+    scheduler.remove_all_jobs()
+    assert scheduler.get_jobs() == []
+
+def test_unrestorable_jobs_are_dropped(scheduler):
+    store = scheduler._lookup_jobstore("default")
+    scheduler.add_job(publish, "date", run_date=at(5), args=["ok"], id="good")
+    store._execute(
+        f"INSERT INTO {store.tablename} (id, next_run_time, job_state) VALUES (?, ?, ?)",
+        ("broken", at(6).timestamp(), b"not a pickle")
+    )
+
+    assert [job.id for job in store.get_all_jobs()] == ["good"]
+    _, rows = store._execute(f"SELECT id FROM {store.tablename}")
+    assert rows == [("good",)]
+
+def test_only_one_process_holds_the_lease(db_path):
+    first = SchedulerLease(db_path, ttl=30)
+    second = SchedulerLease(db_path, ttl=30)
+
+    assert first.acquire()
+    assert not second.acquire()
+    assert first.acquire()  # Renewal by the holder
+
+def test_expired_lease_is_taken_over(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduler_store.time, "time", lambda: now[0])
+    first = SchedulerLease(db_path, ttl=30)
+    second = SchedulerLease(db_path, ttl=30)
+
+    assert first.acquire()
+    now[0] += 20
+    assert not second.acquire()
+    now[0] += 20  # First holder stopped renewing 40s ago
+    assert second.acquire()
+    assert not first.acquire()
+
+def test_renewal_extends_the_lease(db_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scheduler_store.time, "time", lambda: now[0])
+    first = SchedulerLease(db_path, ttl=30)
+    second = SchedulerLease(db_path, ttl=30)
+
+    assert first.acquire()
+    now[0] += 20
+    assert first.acquire()
+    now[0] += 20
+    assert not second.acquire()
+
+def test_released_lease_is_free_immediately(db_path):
+    first = SchedulerLease(db_path, ttl=30)
+    second = SchedulerLease(db_path, ttl=30)
+
+    assert first.acquire()
+    second.release()  # Not the holder, nothing happens
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+
+def test_leases_are_per_name(db_path):
+    assert SchedulerLease(db_path, ttl=30, name="posting").acquire()
+    assert SchedulerLease(db_path, ttl=30, name="cleanup").acquire()
+
+def test_lease_opens_no_database_until_used(db_path):
+    lease = SchedulerLease(db_path, ttl=30)
+    assert not os.path.exists(db_path)
+    assert lease.acquire()
+    assert os.path.exists(db_path)
+
+def test_importing_the_app_touches_no_scheduler_database(tmp_path):
+    db_path = tmp_path / "scheduler.sqlite"
+    env = {**os.environ, "SCHEDULER_DB_PATH": str(db_path), "PROVIDER_WARMUP": ""}
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", "import app.main"], cwd=backend, env=env, check=True, timeout=60)
+    assert not db_path.exists()
+
+def test_posting_scheduler_starts_and_stops_with_the_app(monkeypatch, tmp_path):
+    from app import social_media_posting
+    monkeypatch.setattr(scheduler_store, "SCHEDULER_DB_PATH", str(tmp_path / "scheduler.sqlite"))
+
+    social_media_posting.start_posting_scheduler()
+    try:
+        assert social_media_posting.scheduler_coordinator.is_leader
+        assert social_media_posting.scheduled_media_ids() == set()
+    finally:
+        social_media_posting.stop_posting_scheduler()
+    assert social_media_posting.scheduler is None
+    with pytest.raises(RuntimeError):
+        social_media_posting.scheduled_media_ids()
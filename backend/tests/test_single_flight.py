@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work(publish):
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 5
+    assert len({id(result) for result in results}) == 5  # Each caller gets its own copy
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+def test_different_keys_and_later_calls_run_separately():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def work(publish):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        await asyncio.gather(flights.do("a", work), flights.do("b", work))
+        await flights.do("a", work)  # Nothing kept once finished
+
+    asyncio.run(main())
+    assert len(calls) == 3
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight("test")
+
+    async def work(publish):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_cancelled_leader_does_not_cancel_shared_work():
+    flights = SingleFlight("test")
+
+    async def work(publish):
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+def test_work_is_cancelled_when_last_waiter_leaves():
+    flights = SingleFlight("test")
+    cancelled = []
+
+    async def work(publish):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        caller = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert cancelled == [True]
+    assert flights.stats()["in_flight"] == 0
+
+def test_late_listener_gets_published_items_replayed():
+    flights = SingleFlight("test")
+
+    async def work(publish):
+        for chunk in ("a", "b", "c"):
+            publish(chunk)
+            await asyncio.sleep(0.02)
+        return "abc"
+
+    async def main():
+        early, late = [], []
+        first = asyncio.create_task(flights.do("key", work, early.append))
+        await asyncio.sleep(0.03)  # "a" and "b" already published
+        second = await flights.do("key", work, late.append)
+        await first
+        return early, late, second
+
+    early, late, result = asyncio.run(main())
+    assert early == ["a", "b", "c"]
+    assert late == ["a", "b", "c"]
+    assert result == "abc"
+
+def test_failing_listener_does_not_break_the_flight():
+    flights = SingleFlight("test")
+
+    async def work(publish):
+        publish("chunk")
+        return "ok"
+
+    def broken(item):
+        raise ValueError("client went away")
+
+    assert asyncio.run(flights.do("key", work, broken)) == "ok"
+
+def test_disabled_flights_run_every_call():
+    flights = SingleFlight("test", enabled=False)
+    calls, chunks = [], []
+
+    async def work(publish):
+        calls.append(1)
+        publish("chunk")
+        await asyncio.sleep(0.01)
+        return 1
+
+    async def main():
+        await asyncio.gather(flights.do("key", work, chunks.append), flights.do("key", work))
+
+    asyncio.run(main())
+    assert len(calls) == 2
+    assert chunks == ["chunk"]
+
+def test_blocking_callers_share_one_call():
+    flights = SingleFlight("test")
+    calls, results = [], []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"value": 1}
+
+    leader = threading.Thread(target=lambda: results.append(flights.run("key", work)))
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=lambda: results.append(flights.run("key", work))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 4
+    assert flights.stats()["in_flight"] == 0
+
+def test_blocking_errors_reach_followers():
+    flights = SingleFlight("test")
+    started = threading.Event()
+    errors = []
+
+    def work():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    def call():
+        try:
+            flights.run("key", work)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
@@ -0,0 +1,38 @@
+from io import BytesIO
+import numpy as np
+import pytest
+from app.video_encoder import encode_frames
+
+def _frames(count=12, size=64):
+    for i in range(count):
+        yield np.full((size, size, 3), i * 20, dtype=np.uint8)
+
+def _top_level_boxes(data: bytes) -> list:
+    boxes, offset = [], 0
+    while offset + 8 <= len(data):
+        size = int.from_bytes(data[offset:offset + 4], "big")
+        boxes.append(data[offset + 4:offset + 8].decode("latin-1"))
+        if size < 8:
+            break
+        offset += size
+    return boxes
+
+def test_stored_output_is_faststart_mp4():
+    boxes = _top_level_boxes(encode_frames(_frames(), 64, 64, 12))
+    assert "moof" not in boxes
+    assert boxes.index("moov") < boxes.index("mdat")
+
+def test_streaming_output_is_fragmented():
+    boxes = _top_level_boxes(encode_frames(_frames(), 64, 64, 12, streaming=True))
+    assert "moof" in boxes
+
+def test_output_stream_receives_the_video():
+    target = BytesIO()
+    assert encode_frames(_frames(), 64, 64, 12, output=target) is None
+    assert "moov" in _top_level_boxes(target.getvalue())
+
+def test_invalid_options_are_rejected():
+    with pytest.raises(ValueError):
+        encode_frames(_frames(), 64, 64, 12, codec="vp9")
+    with pytest.raises(ValueError):
+        encode_frames(_frames(), 64, 64, 12, preset="turbo")